@@ -1,24 +1,49 @@
+import os
 from flask import Flask
 from flask_sqlalchemy import SQLAlchemy
 from flask_migrate import Migrate
 from flask_cors import CORS
 from config import Config
+from app.json_provider import FastJSONProvider
 
 db = SQLAlchemy()
-migrate = Migrate()
+# 迁移脚本位于backend/migrations，不依赖当前工作目录
+migrate = Migrate(directory=os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations'))
 
 def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
+    app.json = FastJSONProvider(app)
     
     # 初始化扩展
     db.init_app(app)
     migrate.init_app(app, db)
     CORS(app)
     
+    from app.services.favorite_cache import favorite_cache
+    from app.services.event_pipeline import event_pipeline
+    from app.services.recommendation_service import recommender
+    from app.services.pantry_service import pantry_suggester
+    from app.services.catalog_snapshot import catalog_store
+    from app.services.query_stats import query_instrumentation
+    from app.services.metrics import metrics
+    from app.services.slow_request_profiler import slow_request_profiler
+    favorite_cache.init_app(app)
+    event_pipeline.init_app(app)
+    recommender.init_app(app)
+    pantry_suggester.init_app(app)
+    catalog_store.init_app(app)
+    query_instrumentation.init_app(app)
+    metrics.init_app(app)  # 需在query_instrumentation之后注册
+    metrics.register_cache('favorites', favorite_cache)
+    metrics.register_cache('recommendation_profiles', recommender)
+    metrics.register_cache('pantry_suggestions', pantry_suggester)
+    slow_request_profiler.init_app(app)  # 需在query_instrumentation之后注册
+    from app.services import change_feed  # 注册变更记录的会话事件
+    
     # 导入模型以确保它们被注册到SQLAlchemy
     # 移到应用上下文外部，避免循环导入
-    from app.models import user, recipe, ingredient, favorite
+    from app.models import user, recipe, ingredient, favorite, event, change
     
     # 注册蓝图
     from app.routes import api_bp
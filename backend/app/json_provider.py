@@ -0,0 +1,83 @@
+import dataclasses
+import decimal
+import json
+import uuid
+from datetime import date, datetime
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:  # 未安装orjson时回退到标准库json
+    orjson = None
+
+def _default(o):
+    """序列化json/orjson无法直接处理的类型"""
+    if isinstance(o, (datetime, date)):
+        return o.isoformat()
+    if isinstance(o, decimal.Decimal):
+        return str(o)
+    if isinstance(o, uuid.UUID):
+        return str(o)
+    if dataclasses.is_dataclass(o):
+        return dataclasses.asdict(o)
+    if hasattr(o, '__html__'):
+        return str(o.__html__())
+    raise TypeError(f'Object of type {type(o).__name__} is not JSON serializable')
+
+def dumps(obj, indent: bool = False) -> bytes:
+    """序列化为UTF-8字节（指标、备份等文件写入使用），未安装orjson时使用标准库json"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default, option=orjson.OPT_INDENT_2 if indent else None)
+    if indent:
+        return json.dumps(obj, default=_default, ensure_ascii=False, indent=2).encode('utf-8')
+    return json.dumps(obj, default=_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+def loads(data):
+    """解析JSON字节或字符串"""
+    return orjson.loads(data) if orjson is not None else json.loads(data)
+
+class FastJSONProvider(DefaultJSONProvider):
+    """
+    基于orjson的JSON提供者
+
+    - 已安装orjson时使用orjson序列化，datetime/date原生输出为ISO 8601
+    - 未安装时回退到标准库json，datetime同样输出为ISO 8601（而不是Flask默认的HTTP日期格式）
+    """
+
+    default = staticmethod(_default)
+
+    def _orjson_option(self, indent=None):
+        option = orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        if indent:
+            option |= orjson.OPT_INDENT_2
+        return option
+
+    def _orjson_dumps(self, obj, indent=None) -> bytes:
+        return orjson.dumps(obj, default=self.default, option=self._orjson_option(indent))
+
+    def dumps(self, obj, **kwargs) -> str:
+        # orjson不支持的参数（如cls、ensure_ascii）交给标准库处理
+        if orjson is None or set(kwargs) - {'indent', 'separators'}:
+            return super().dumps(obj, **kwargs)
+        return self._orjson_dumps(obj, kwargs.get('indent')).decode('utf-8')
+
+    def loads(self, s, **kwargs):
+        if orjson is None or kwargs:
+            return super().loads(s, **kwargs)
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        if orjson is None:
+            return super().response(*args, **kwargs)
+
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = None
+        if self.compact is False or (self.compact is None and self._app.debug):
+            indent = 2
+
+        # 直接使用orjson输出的bytes，省去一次解码/编码
+        return self._app.response_class(
+            self._orjson_dumps(obj, indent) + b'\n', mimetype=self.mimetype
+        )
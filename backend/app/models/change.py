@@ -0,0 +1,22 @@
+from datetime import datetime
+from app import db
+
+class UserChange(db.Model):
+    """用户数据变更记录（只追加），供移动端按序号增量同步"""
+    __tablename__ = 'user_changes'
+    
+    user_id = db.Column(db.Integer, primary_key=True)
+    seq = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)  # 用户内单调递增的变更序号
+    entity = db.Column(db.String(30), nullable=False)  # 实体类型：favorite、pantry、shopping_list等
+    entity_id = db.Column(db.Integer, nullable=False)  # 实体主键（收藏为recipe_id，库存为ingredient_id）
+    op = db.Column(db.String(10), nullable=False)  # 操作：upsert、delete
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'seq': self.seq,
+            'entity': self.entity,
+            'id': self.entity_id,
+            'op': self.op,
+            'created_at': self.created_at
+        }
@@ -0,0 +1,25 @@
+import keyword
+
+def compile_encoder(*fields, **renamed):
+    """
+    预编译模型的行序列化函数
+
+    生成形如 lambda obj: {'id': obj.id, 'name': obj.name} 的函数，避免在to_dict中
+    逐字段拼装字典。datetime/date保持原生类型，由FastJSONProvider统一输出ISO 8601。
+
+    Args:
+        fields: 输出键与属性同名的字段
+        renamed: 输出键与属性不同名的字段，如 id='recipe_id'
+
+    Returns:
+        Callable: 接收模型对象并返回字典的函数
+    """
+    mapping = [(name, name) for name in fields] + list(renamed.items())
+    for key, attr in mapping:
+        if not attr.isidentifier() or keyword.iskeyword(attr):
+            raise ValueError(f'Invalid attribute name: {attr}')
+
+    body = ', '.join(f'{key!r}: obj.{attr}' for key, attr in mapping)
+    namespace = {}
+    exec(f'def encode(obj):\n    return {{{body}}}\n', namespace)
+    return namespace['encode']
@@ -0,0 +1,21 @@
+from datetime import datetime
+from app import db
+
+class RecipeEvent(db.Model):
+    """菜谱行为事件模型（只追加，由EventPipeline批量写入）"""
+    __tablename__ = 'recipe_events'
+    
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    event_type = db.Column(db.String(20), nullable=False)  # 事件类型：view、plan等
+    recipe_id = db.Column(db.Integer, nullable=False, index=True)
+    user_id = db.Column(db.Integer)
+    created_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow, index=True)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'event_type': self.event_type,
+            'recipe_id': self.recipe_id,
+            'user_id': self.user_id,
+            'created_at': self.created_at
+        }
@@ -1,5 +1,9 @@
 from datetime import datetime
 from app import db
+from app.models.encoders import compile_encoder
+
+# 预编译的行序列化函数
+_encode_favorite = compile_encoder('id', 'user_id', 'recipe_id', 'created_at')
 
 class FavoriteRecipe(db.Model):
     """用户收藏菜谱模型"""
@@ -14,13 +18,14 @@ class FavoriteRecipe(db.Model):
     recipe = db.relationship('Recipe')
     
     # 添加唯一约束，确保用户不会重复收藏同一个菜谱
-    __table_args__ = (db.UniqueConstraint('user_id', 'recipe_id'),)
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'recipe_id'),
+        db.Index('ix_favorite_recipes_user_created', 'user_id', 'created_at'),  # 用户收藏列表按时间倒序
+        db.Index('ix_favorite_recipes_recipe_id', 'recipe_id'),  # 按菜谱统计收藏数
+    )
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'recipe_id': self.recipe_id,
-            'recipe': self.recipe.to_dict() if self.recipe else None,
-            'created_at': self.created_at.isoformat() if self.created_at else None
-        }
\ No newline at end of file
+    def to_dict(self, fields=None, include=None):
+        """fields和include作用于内嵌的菜谱，见Recipe.to_dict"""
+        data = _encode_favorite(self)
+        data['recipe'] = self.recipe.to_dict(fields, include) if self.recipe else None
+        return data
\ No newline at end of file
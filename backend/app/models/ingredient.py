@@ -1,4 +1,9 @@
 from app import db
+from app.models.encoders import compile_encoder
+
+# 预编译的行序列化函数
+_encode_ingredient = compile_encoder('id', 'name', 'unit', 'category', 'image_url')
+_encode_recipe_ingredient = compile_encoder('recipe_id', 'ingredient_id', 'amount', 'note')
 
 class Ingredient(db.Model):
     """食材模型"""
@@ -10,18 +15,16 @@ class Ingredient(db.Model):
     category = db.Column(db.String(50))  # 分类：肉类、蔬菜、调料等
     image_url = db.Column(db.String(255))
     
+    __table_args__ = (
+        db.Index('ix_ingredients_category_name', 'category', 'name'),  # 食材列表按分类筛选、按名称排序
+    )
+    
     # 关系
     recipe_ingredients = db.relationship('RecipeIngredient', backref='ingredient', lazy='dynamic')
     user_ingredients = db.relationship('UserIngredient', backref='ingredient', lazy='dynamic')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'unit': self.unit,
-            'category': self.category,
-            'image_url': self.image_url
-        }
+        return _encode_ingredient(self)
 
 class RecipeIngredient(db.Model):
     """菜谱食材关联模型"""
@@ -32,12 +35,14 @@ class RecipeIngredient(db.Model):
     amount = db.Column(db.Float, nullable=False)  # 数量
     note = db.Column(db.String(100))  # 备注，如"切片"、"切丁"等
     
+    # 主键以recipe_id开头，按食材反查菜谱需要单独的索引
+    __table_args__ = (
+        db.Index('ix_recipe_ingredients_ingredient_id', 'ingredient_id'),
+    )
+    
     def to_dict(self):
-        return {
-            'recipe_id': self.recipe_id,
-            'ingredient_id': self.ingredient_id,
-            'ingredient_name': self.ingredient.name if self.ingredient else None,
-            'amount': self.amount,
-            'unit': self.ingredient.unit if self.ingredient else None,
-            'note': self.note
-        }
\ No newline at end of file
+        data = _encode_recipe_ingredient(self)
+        ingredient = self.ingredient
+        data['ingredient_name'] = ingredient.name if ingredient else None
+        data['unit'] = ingredient.unit if ingredient else None
+        return data
\ No newline at end of file
@@ -1,5 +1,18 @@
 from datetime import datetime
 from app import db
+from app.models.ingredient import RecipeIngredient
+from app.models.encoders import compile_encoder
+
+# 预编译的行序列化函数，datetime由JSON提供者原生输出
+_encode_recipe = compile_encoder(
+    'id', 'name', 'description', 'difficulty', 'cooking_time', 'servings',
+    'image_url', 'category', 'created_at', 'updated_at'
+)
+_encode_step = compile_encoder('id', 'recipe_id', 'step_number', 'description', 'image_url')
+_encode_summary = compile_encoder(
+    'name', 'difficulty', 'cooking_time', 'image_url', 'category', 'created_at',
+    'ingredient_count', 'step_count', 'favorite_count', id='recipe_id'
+)
 
 class Recipe(db.Model):
     """菜谱模型"""
@@ -12,29 +25,59 @@ class Recipe(db.Model):
     cooking_time = db.Column(db.Integer)  # 烹饪时间（分钟）
     servings = db.Column(db.Integer)  # 份量（人数）
     image_url = db.Column(db.String(255))
-    category = db.Column(db.String(50), index=True)  # 分类：早餐、午餐、晚餐、小吃等
+    category = db.Column(db.String(50))  # 分类：早餐、午餐、晚餐、小吃等（由下方以分类开头的组合索引覆盖）
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
+    # 热度计数，由PopularityService增量维护
+    favorite_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 累计收藏数
+    view_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 累计浏览数
+    plan_count = db.Column(db.Integer, nullable=False, default=0, server_default='0')  # 被加入菜谱规划的次数
+    recent_activity = db.Column(db.Float, nullable=False, default=0, server_default='0')  # 上次批量计算后新增的加权活跃度
+    popularity_score = db.Column(db.Float, nullable=False, default=0, server_default='0', index=True)  # 时间衰减后的热度分
+    popularity_updated_at = db.Column(db.DateTime)  # 热度分最近一次批量计算时间
+    
+    __table_args__ = (
+        db.Index('ix_recipes_category_popularity', 'category', 'popularity_score'),
+        db.Index('ix_recipes_created_at', 'created_at'),  # 列表接口按创建时间倒序分页
+        db.Index('ix_recipes_category_created', 'category', 'created_at'),
+        db.Index('ix_recipes_difficulty_cooking_time', 'difficulty', 'cooking_time'),  # 按难度和烹饪时间筛选
+    )
+    
     # 关系
     steps = db.relationship('Step', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
     recipe_ingredients = db.relationship('RecipeIngredient', backref='recipe', lazy='dynamic', cascade='all, delete-orphan')
+    summary = db.relationship('RecipeSummary', uselist=False, cascade='all, delete-orphan')
+    neighbors = db.relationship('RecipeNeighbor', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'name': self.name,
-            'description': self.description,
-            'difficulty': self.difficulty,
-            'cooking_time': self.cooking_time,
-            'servings': self.servings,
-            'image_url': self.image_url,
-            'category': self.category,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'updated_at': self.updated_at.isoformat() if self.updated_at else None,
-            'steps': [step.to_dict() for step in self.steps],
-            'ingredients': [ri.to_dict() for ri in self.recipe_ingredients]
-        }
+    # 可按需加载的关联
+    RELATIONS = ('steps', 'ingredients')
+    
+    def to_dict(self, fields=None, include=None):
+        """
+        序列化菜谱
+        
+        Args:
+            fields: 需要返回的字段集合，None表示全部字段
+            include: 需要加载的关联（steps、ingredients），None时未指定fields则全部加载，
+                     指定了fields则不加载；未请求的关联不会触发数据库查询
+        """
+        if include is None:
+            include = () if fields else self.RELATIONS
+        
+        data = _encode_recipe(self)
+        if fields:
+            data = {key: value for key, value in data.items() if key == 'id' or key in fields}
+        
+        if 'steps' in include:
+            data['steps'] = [step.to_dict() for step in self.steps]
+        if 'ingredients' in include:
+            # 一次性连接食材表，避免逐条懒加载
+            data['ingredients'] = [
+                ri.to_dict() for ri in self.recipe_ingredients.options(db.joinedload(RecipeIngredient.ingredient))
+            ]
+        
+        return data
 
 class Step(db.Model):
     """菜谱步骤模型"""
@@ -46,11 +89,52 @@ class Step(db.Model):
     description = db.Column(db.Text, nullable=False)  # 步骤描述
     image_url = db.Column(db.String(255))  # 步骤图片
     
+    __table_args__ = (
+        db.Index('ix_steps_recipe_step', 'recipe_id', 'step_number'),
+    )
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'recipe_id': self.recipe_id,
-            'step_number': self.step_number,
-            'description': self.description,
-            'image_url': self.image_url
-        }
\ No newline at end of file
+        return _encode_step(self)
+
+class RecipeSummary(db.Model):
+    """菜谱摘要模型（列表视图使用的反规范化投影，由RecipeSummaryService在写入时维护）"""
+    __tablename__ = 'recipe_summaries'
+    
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True)
+    name = db.Column(db.String(100), nullable=False)
+    difficulty = db.Column(db.String(20))
+    cooking_time = db.Column(db.Integer)
+    image_url = db.Column(db.String(255))
+    category = db.Column(db.String(50))
+    created_at = db.Column(db.DateTime, index=True)
+    ingredient_count = db.Column(db.Integer, default=0)  # 食材数量
+    step_count = db.Column(db.Integer, default=0)  # 步骤数量
+    favorite_count = db.Column(db.Integer, default=0)  # 收藏数量
+    tags = db.Column(db.String(255))  # 标签，逗号分隔（菜谱分类 + 食材分类）
+    
+    __table_args__ = (
+        db.Index('ix_recipe_summaries_category_created', 'category', 'created_at'),
+    )
+    
+    def to_dict(self):
+        data = _encode_summary(self)
+        data['tags'] = self.tags.split(',') if self.tags else []
+        return data
+
+class RecipeNeighbor(db.Model):
+    """相似菜谱模型（离线任务按食材共现计算的Top-K近邻）"""
+    __tablename__ = 'recipe_neighbors'
+    
+    recipe_id = db.Column(db.Integer, db.ForeignKey('recipes.id'), primary_key=True)
+    rank = db.Column(db.Integer, primary_key=True)  # 相似度排名，从1开始
+    neighbor_id = db.Column(db.Integer, nullable=False, index=True)
+    score = db.Column(db.Float, nullable=False)  # 余弦相似度
+    built_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+
+class CatalogVersion(db.Model):
+    """菜谱目录版本（单行），菜谱、步骤或食材变化时递增，进程内目录快照据此判断是否需要重新加载"""
+    __tablename__ = 'catalog_version'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
\ No newline at end of file
@@ -1,6 +1,16 @@
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 from app import db
+from app.models.encoders import compile_encoder
+
+# 预编译的行序列化函数，datetime/date由JSON提供者原生输出
+_encode_user = compile_encoder('id', 'username', 'email', 'created_at')
+_encode_user_ingredient = compile_encoder('user_id', 'ingredient_id', 'amount', 'expiry_date')
+_encode_shopping_list = compile_encoder('id', 'user_id', 'name', 'created_at')
+_encode_shopping_list_item = compile_encoder(
+    'id', 'shopping_list_id', 'ingredient_id', 'amount', 'is_purchased', 'updated_at'
+)
+_encode_user_preference = compile_encoder('id', 'user_id', 'preference_type', 'value')
 
 class User(db.Model):
     """用户模型"""
@@ -12,6 +22,7 @@ class User(db.Model):
     password_hash = db.Column(db.String(128))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     google_id = db.Column(db.String(128), unique=True, nullable=True)  # Google OAuth ID
+    change_seq = db.Column(db.BigInteger, nullable=False, default=0, server_default='0')  # 最新的数据变更序号
     
     # 关系
     user_ingredients = db.relationship('UserIngredient', backref='user', lazy='dynamic', cascade='all, delete-orphan')
@@ -26,13 +37,8 @@ class User(db.Model):
         return check_password_hash(self.password_hash, password)
     
     def to_dict(self, include_favorites=False):
-        data = {
-            'id': self.id,
-            'username': self.username,
-            'email': self.email,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'has_google_account': self.google_id is not None
-        }
+        data = _encode_user(self)
+        data['has_google_account'] = self.google_id is not None
         
         if include_favorites:
             data['favorite_recipes'] = [fr.to_dict() for fr in self.favorite_recipes]
@@ -49,14 +55,11 @@ class UserIngredient(db.Model):
     expiry_date = db.Column(db.Date)  # 过期日期
     
     def to_dict(self):
-        return {
-            'user_id': self.user_id,
-            'ingredient_id': self.ingredient_id,
-            'ingredient_name': self.ingredient.name if self.ingredient else None,
-            'amount': self.amount,
-            'unit': self.ingredient.unit if self.ingredient else None,
-            'expiry_date': self.expiry_date.isoformat() if self.expiry_date else None
-        }
+        data = _encode_user_ingredient(self)
+        ingredient = self.ingredient
+        data['ingredient_name'] = ingredient.name if ingredient else None
+        data['unit'] = ingredient.unit if ingredient else None
+        return data
 
 class ShoppingList(db.Model):
     """购物清单模型"""
@@ -67,41 +70,59 @@ class ShoppingList(db.Model):
     name = db.Column(db.String(100), default='购物清单')
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        db.Index('ix_shopping_lists_user_created', 'user_id', 'created_at'),  # 用户清单按时间倒序分页
+    )
+    
     # 关系
     items = db.relationship('ShoppingListItem', backref='shopping_list', lazy='dynamic', cascade='all, delete-orphan')
     
-    def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'name': self.name,
-            'created_at': self.created_at.isoformat() if self.created_at else None,
-            'items': [item.to_dict() for item in self.items]
-        }
+    # 可按需加载的关联
+    RELATIONS = ('items',)
+    
+    def to_dict(self, fields=None, include=None):
+        """
+        序列化购物清单
+        
+        Args:
+            fields: 需要返回的字段集合，None表示全部字段
+            include: 需要加载的关联（items），规则同Recipe.to_dict
+        """
+        if include is None:
+            include = () if fields else self.RELATIONS
+        
+        data = _encode_shopping_list(self)
+        if fields:
+            data = {key: value for key, value in data.items() if key == 'id' or key in fields}
+        
+        if 'items' in include:
+            # 一次性连接食材表，避免逐条懒加载
+            data['items'] = [
+                item.to_dict() for item in self.items.options(db.joinedload(ShoppingListItem.ingredient))
+            ]
+        
+        return data
 
 class ShoppingListItem(db.Model):
     """购物清单项目模型"""
     __tablename__ = 'shopping_list_items'
     
     id = db.Column(db.Integer, primary_key=True)
-    shopping_list_id = db.Column(db.Integer, db.ForeignKey('shopping_lists.id'), nullable=False)
+    shopping_list_id = db.Column(db.Integer, db.ForeignKey('shopping_lists.id'), nullable=False, index=True)
     ingredient_id = db.Column(db.Integer, db.ForeignKey('ingredients.id'), nullable=False)
     amount = db.Column(db.Float)  # 数量
     is_purchased = db.Column(db.Boolean, default=False)  # 是否已购买
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # 离线同步按此判断先后
     
     # 关系
     ingredient = db.relationship('Ingredient')
     
     def to_dict(self):
-        return {
-            'id': self.id,
-            'shopping_list_id': self.shopping_list_id,
-            'ingredient_id': self.ingredient_id,
-            'ingredient_name': self.ingredient.name if self.ingredient else None,
-            'amount': self.amount,
-            'unit': self.ingredient.unit if self.ingredient else None,
-            'is_purchased': self.is_purchased
-        }
+        data = _encode_shopping_list_item(self)
+        ingredient = self.ingredient
+        data['ingredient_name'] = ingredient.name if ingredient else None
+        data['unit'] = ingredient.unit if ingredient else None
+        return data
 
 class UserPreference(db.Model):
     """用户偏好模型"""
@@ -112,10 +133,9 @@ class UserPreference(db.Model):
     preference_type = db.Column(db.String(50), nullable=False)  # 偏好类型：口味、禁忌、特殊要求等
     value = db.Column(db.String(100), nullable=False)  # 偏好值
     
+    __table_args__ = (
+        db.Index('ix_user_preferences_user_type', 'user_id', 'preference_type'),
+    )
+    
     def to_dict(self):
-        return {
-            'id': self.id,
-            'user_id': self.user_id,
-            'preference_type': self.preference_type,
-            'value': self.value
-        }
\ No newline at end of file
+        return _encode_user_preference(self)
\ No newline at end of file
@@ -3,4 +3,4 @@ from flask import Blueprint
 api_bp = Blueprint('api', __name__)
 
 # 导入路由模块
-from app.routes import recipe, ingredient, user, favorite, auth, meal_plan
\ No newline at end of file
+from app.routes import recipe, ingredient, user, favorite, auth, meal_plan, recommendation, sync
\ No newline at end of file
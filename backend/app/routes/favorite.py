@@ -1,9 +1,18 @@
-from flask import jsonify, request
+from math import ceil
+from flask import jsonify, request, abort
+from sqlalchemy.exc import IntegrityError
 from app import db
 from app.models.user import User
 from app.models.recipe import Recipe
 from app.models.favorite import FavoriteRecipe
+from app.services.recipe_summary_service import RecipeSummaryService
+from app.services.favorite_service import FavoriteService, MAX_BATCH_SIZE
+from app.services.favorite_cache import favorite_cache
+from app.services.catalog_snapshot import catalog_store
+from app.services.popularity_service import PopularityService
+from app.services.recommendation_service import recommender
 from app.routes import api_bp
+from app.routes.utils import get_field_params
 
 @api_bp.route('/users/<int:user_id>/favorites', methods=['GET'])
 def get_user_favorites(user_id):
@@ -13,21 +22,30 @@ def get_user_favorites(user_id):
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 10, type=int), 50)
     
-    pagination = FavoriteRecipe.query.filter_by(user_id=user_id).order_by(
-        FavoriteRecipe.created_at.desc()
-    ).paginate(page=page, per_page=per_page)
+    # 在缓存的有序收藏列表上分页，只查询当前页的菜谱
+    favorites, total = favorite_cache.page(user_id, page, per_page)
+    if page < 1 or (page > 1 and not favorites):
+        abort(404)
     
-    favorites = pagination.items
+    recipe_ids = [recipe_id for recipe_id, _, _ in favorites]
+    # 菜谱从目录快照读取，快照缺少的批量查询，不逐个加载步骤和食材
+    recipes = {recipe.id: recipe for recipe in catalog_store.get_recipes(recipe_ids)}
+    fields, include = get_field_params()
+    
+    items = []
+    for recipe_id, favorite_id, created_at in favorites:
+        recipe = recipes.get(recipe_id)
+        items.append({
+            'id': favorite_id,
+            'recipe_id': recipe_id,
+            'recipe': recipe.to_dict(fields, include) if recipe else None,
+            'created_at': created_at
+        })
     
     return jsonify({
-        'items': [{
-            'id': fav.id,
-            'recipe_id': fav.recipe_id,
-            'recipe': fav.recipe.to_dict() if fav.recipe else None,
-            'created_at': fav.created_at.isoformat() if fav.created_at else None
-        } for fav in favorites],
-        'total': pagination.total,
-        'pages': pagination.pages,
+        'items': items,
+        'total': total,
+        'pages': ceil(total / per_page) if total else 0,
         'page': page
     })
 
@@ -44,14 +62,7 @@ def add_favorite(user_id):
     # 确认菜谱存在
     recipe = Recipe.query.get_or_404(data['recipe_id'])
     
-    # 检查是否已收藏
-    existing = FavoriteRecipe.query.filter_by(
-        user_id=user_id, recipe_id=data['recipe_id']
-    ).first()
-    
-    if existing:
-        return jsonify({'error': 'Recipe already in favorites'}), 400
-    
+    # 是否已收藏以数据库的唯一约束为准，不依赖可能过期的缓存
     # 创建收藏记录
     favorite = FavoriteRecipe(
         user_id=user_id,
@@ -59,7 +70,16 @@ def add_favorite(user_id):
     )
     
     db.session.add(favorite)
-    db.session.commit()
+    try:
+        RecipeSummaryService.adjust_favorite_count(favorite.recipe_id, 1)
+        PopularityService.record('favorite', {favorite.recipe_id: 1})
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        favorite_cache.invalidate(user_id)
+        return jsonify({'error': 'Recipe already in favorites'}), 400
+    favorite_cache.add(user_id, favorite)
+    recommender.favorites_added(user_id, [recipe.id])
     
     return jsonify(favorite.to_dict()), 201
 
@@ -71,15 +91,66 @@ def remove_favorite(user_id, recipe_id):
     ).first_or_404()
     
     db.session.delete(favorite)
+    RecipeSummaryService.adjust_favorite_count(recipe_id, -1)
+    PopularityService.record('favorite', {recipe_id: -1})
     db.session.commit()
+    favorite_cache.remove(user_id, [recipe_id])
+    recommender.favorites_removed(user_id, [recipe_id])
     
     return '', 204
 
 @api_bp.route('/users/<int:user_id>/favorites/check/<int:recipe_id>', methods=['GET'])
 def check_favorite(user_id, recipe_id):
     """检查菜谱是否已收藏"""
-    favorite = FavoriteRecipe.query.filter_by(
-        user_id=user_id, recipe_id=recipe_id
-    ).first()
+    is_favorite = bool(favorite_cache.get_favorite_ids(user_id, [recipe_id]))
+    return jsonify({'is_favorite': is_favorite})
+
+def _get_recipe_ids(data):
+    """从请求体中读取recipe_ids列表，返回(ids, 错误响应)"""
+    recipe_ids = data.get('recipe_ids')
+    if not isinstance(recipe_ids, list) or not all(isinstance(i, int) for i in recipe_ids):
+        return None, (jsonify({'error': 'recipe_ids must be a list of integers'}), 400)
+    if len(recipe_ids) > MAX_BATCH_SIZE:
+        return None, (jsonify({'error': f'At most {MAX_BATCH_SIZE} recipe_ids per request'}), 400)
+    return recipe_ids, None
+
+@api_bp.route('/users/<int:user_id>/favorites/check', methods=['POST'])
+def check_favorites(user_id):
+    """批量检查菜谱是否已收藏"""
+    recipe_ids, error = _get_recipe_ids(request.get_json() or {})
+    if error:
+        return error
+    
+    favorite_ids = FavoriteService.get_favorite_ids(user_id, recipe_ids)
+    return jsonify({'favorite_ids': sorted(favorite_ids)})
+
+@api_bp.route('/users/<int:user_id>/favorites/batch', methods=['POST'])
+def add_favorites(user_id):
+    """批量添加收藏菜谱"""
+    User.query.get_or_404(user_id)  # 确认用户存在
+    recipe_ids, error = _get_recipe_ids(request.get_json() or {})
+    if error:
+        return error
+    
+    result = FavoriteService.add_many(user_id, recipe_ids)
+    db.session.commit()
+    if result['added']:
+        # 批量插入拿不到新记录的ID和时间，直接失效让下次访问重新加载
+        favorite_cache.invalidate(user_id)
+        recommender.favorites_added(user_id, result['added'])
+    
+    return jsonify(result), 201 if result['added'] else 200
+
+@api_bp.route('/users/<int:user_id>/favorites/batch', methods=['DELETE'])
+def remove_favorites(user_id):
+    """批量取消收藏菜谱"""
+    recipe_ids, error = _get_recipe_ids(request.get_json() or {})
+    if error:
+        return error
+    
+    removed_ids = FavoriteService.remove_many(user_id, recipe_ids)
+    db.session.commit()
+    favorite_cache.remove(user_id, removed_ids)
+    recommender.favorites_removed(user_id, removed_ids)
     
-    return jsonify({'is_favorite': favorite is not None})
\ No newline at end of file
+    return jsonify({'removed': removed_ids})
\ No newline at end of file
@@ -1,5 +1,7 @@
 from flask import Blueprint, request, jsonify, current_app
 from app.services.deepseek_service import DeepSeekService
+from app.services.popularity_service import PopularityService
+from app.services.event_pipeline import event_pipeline
 from app.routes import api_bp
 import logging
 
@@ -59,6 +61,9 @@ def generate_meal_plan():
         )
         
         if result['success']:
+            # 记录被选入规划的菜谱，由事件管道异步计入热度
+            for recipe_id in PopularityService.extract_plan_recipe_ids(result.get('data')):
+                event_pipeline.record('plan', recipe_id)
             return jsonify(result), 200
         else:
             return jsonify(result), 500
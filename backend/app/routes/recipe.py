@@ -1,29 +1,74 @@
-from flask import jsonify, request, current_app
+from datetime import datetime
+from math import ceil
+from flask import abort, jsonify, request, current_app
 from app import db
-from app.models.recipe import Recipe, Step
+from app.models.recipe import Recipe, Step, RecipeSummary
 from app.models.ingredient import RecipeIngredient, Ingredient
+from app.services.favorite_service import FavoriteService
+from app.services.event_pipeline import event_pipeline
+from app.services.similarity_service import SimilarRecipeService
+from app.services.catalog_snapshot import catalog_store
 from app.routes import api_bp
+from app.routes.utils import get_field_params
+
+def _mark_favorites(items):
+    """提供user_id参数时，为列表中的每个菜谱附加is_favorite（一次查询）"""
+    user_id = request.args.get('user_id', type=int)
+    if user_id is None:
+        return items
+    
+    favorite_ids = FavoriteService.get_favorite_ids(user_id, [item['id'] for item in items])
+    for item in items:
+        item['is_favorite'] = item['id'] in favorite_ids
+    return items
 
 @api_bp.route('/recipes', methods=['GET'])
 def get_recipes():
-    """获取菜谱列表"""
+    """获取菜谱列表（view=summary时返回轻量摘要）"""
     page = request.args.get('page', 1, type=int)
     per_page = min(request.args.get('per_page', 10, type=int), 50)
     category = request.args.get('category')
     difficulty = request.args.get('difficulty')
     
-    query = Recipe.query
+    # 摘要视图直接读取反规范化的摘要表，不加载步骤和食材
+    model = RecipeSummary if request.args.get('view') == 'summary' else Recipe
+    
+    # 完整视图优先从进程内目录快照分页，不构造ORM对象
+    snapshot = catalog_store.current() if model is Recipe else None
+    if snapshot is not None:
+        if page < 1 or per_page < 1:
+            abort(404)
+        page_ids, total = snapshot.page(category, difficulty, (page - 1) * per_page, per_page)
+        if not page_ids and page != 1:
+            abort(404)
+        fields, include = get_field_params()
+        return jsonify({
+            'items': _mark_favorites([snapshot.get(recipe_id).to_dict(fields, include) for recipe_id in page_ids]),
+            'total': total,
+            'pages': ceil(total / per_page),
+            'page': page
+        })
+    
+    query = model.query
     
     if category:
-        query = query.filter(Recipe.category == category)
+        query = query.filter(model.category == category)
     if difficulty:
-        query = query.filter(Recipe.difficulty == difficulty)
+        query = query.filter(model.difficulty == difficulty)
     
-    pagination = query.order_by(Recipe.created_at.desc()).paginate(page=page, per_page=per_page)
+    # 与快照相同的(created_at desc, id desc)顺序，创建时间相同的菜谱在分页之间不会重复或遗漏
+    key = model.recipe_id if model is RecipeSummary else model.id
+    pagination = query.order_by(model.created_at.desc(), key.desc()).paginate(page=page, per_page=per_page)
     recipes = pagination.items
     
+    if model is RecipeSummary:
+        items = [summary.to_dict() for summary in recipes]
+    else:
+        fields, include = get_field_params()
+        items = [recipe.to_dict(fields, include) for recipe in recipes]
+    
     return jsonify({
-        'items': [recipe.to_dict() for recipe in recipes],
+        'items': _mark_favorites(items),
         'total': pagination.total,
         'pages': pagination.pages,
         'page': page
@@ -32,8 +77,31 @@ def get_recipes():
 @api_bp.route('/recipes/<int:id>', methods=['GET'])
 def get_recipe(id):
     """获取单个菜谱详情"""
-    recipe = Recipe.query.get_or_404(id)
-    return jsonify(recipe.to_dict())
+    snapshot = catalog_store.current()
+    recipe = snapshot.get(id) if snapshot is not None else None
+    if recipe is None:
+        # 快照未启用或尚未包含该菜谱（其他进程刚创建）时读取数据库
+        recipe = Recipe.query.get_or_404(id)
+    fields, include = get_field_params()
+    
+    # 浏览事件只写入内存缓冲区，由后台线程批量落库
+    event_pipeline.record('view', recipe.id, request.args.get('user_id', type=int))
+    return jsonify(recipe.to_dict(fields, include))
+
+@api_bp.route('/recipes/<int:id>/similar', methods=['GET'])
+def get_similar_recipes(id):
+    """获取相似菜谱（读取离线计算的近邻表）"""
+    if db.session.query(Recipe.id).filter_by(id=id).first() is None:
+        return jsonify({'error': 'Recipe not found'}), 404
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    
+    items = []
+    for score, summary in SimilarRecipeService.get_similar(id, limit):
+        item = summary.to_dict()
+        item['similarity'] = round(score, 4)
+        items.append(item)
+    
+    return jsonify({'items': _mark_favorites(items)})
 
 @api_bp.route('/recipes', methods=['POST'])
 def create_recipe():
@@ -170,6 +238,8 @@ def update_recipe(id):
                 )
                 db.session.add(recipe_ingredient)
     
+    # 只修改步骤或食材时菜谱行本身不变，不会触发onupdate；显式更新时间供相似菜谱增量计算识别
+    recipe.updated_at = datetime.utcnow()
     db.session.commit()
     return jsonify(recipe.to_dict())
 
@@ -205,9 +275,10 @@ def search_recipes():
     ).paginate(page=page, per_page=per_page)
     
     recipes = pagination.items
+    fields, include = get_field_params()
     
     return jsonify({
-        'items': [recipe.to_dict() for recipe in recipes],
+        'items': _mark_favorites([recipe.to_dict(fields, include) for recipe in recipes]),
         'total': pagination.total,
         'pages': pagination.pages,
         'page': page
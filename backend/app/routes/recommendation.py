@@ -0,0 +1,30 @@
+from flask import jsonify, request
+from app.models.user import User
+from app.services.recommendation_service import recommender
+from app.services.pantry_service import pantry_suggester, MAX_CACHED_SUGGESTIONS
+from app.routes import api_bp
+
+@api_bp.route('/users/<int:user_id>/recommendations', methods=['GET'])
+def get_recommendations(user_id):
+    """根据用户收藏和偏好推荐菜谱"""
+    User.query.get_or_404(user_id)  # 确认用户存在
+    limit = min(max(request.args.get('limit', 10, type=int), 1), 50)
+    
+    # 请求中的过敏原与用户存储的过敏偏好合并
+    allergies = [value.strip() for value in request.args.get('allergies', '').split(',') if value.strip()]
+    
+    items = []
+    for score, summary in recommender.recommend(user_id, limit, allergies):
+        item = summary.to_dict()
+        item['score'] = round(score, 4)
+        items.append(item)
+    
+    return jsonify({'items': items})
+
+@api_bp.route('/users/<int:user_id>/pantry-suggestions', methods=['GET'])
+def get_pantry_suggestions(user_id):
+    """根据库存推荐菜谱，优先消耗临期食材"""
+    User.query.get_or_404(user_id)  # 确认用户存在
+    limit = min(max(request.args.get('limit', 10, type=int), 1), MAX_CACHED_SUGGESTIONS)
+    
+    return jsonify({'items': pantry_suggester.suggest(user_id, limit)})
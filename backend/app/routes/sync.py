@@ -0,0 +1,19 @@
+from flask import jsonify, request
+from app.models.user import User
+from app.services.change_feed import get_changes, MAX_CHANGES_PER_PAGE
+from app.routes import api_bp
+
+@api_bp.route('/users/<int:user_id>/changes', methods=['GET'])
+def get_user_changes(user_id):
+    """增量同步：返回序号大于since的收藏、库存、购物清单和偏好变更"""
+    user = User.query.get_or_404(user_id)
+    since = request.args.get('since', 0, type=int)
+    limit = min(max(request.args.get('limit', MAX_CHANGES_PER_PAGE, type=int), 1), MAX_CHANGES_PER_PAGE)
+    
+    # 客户端序号超过服务端（如数据库已恢复）时需要全量重新同步
+    if since < 0 or since > (user.change_seq or 0):
+        return jsonify({'changes': [], 'next_since': user.change_seq or 0, 'has_more': False, 'reset_required': True})
+    
+    result = get_changes(user_id, since, limit)
+    result['reset_required'] = False
+    return jsonify(result)
@@ -1,9 +1,14 @@
-from flask import jsonify, request, current_app
+from math import ceil
+from flask import jsonify, request, current_app, abort
 from app import db
 from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
 from app.models.ingredient import Ingredient
 from app.routes import api_bp
-from datetime import datetime
+from app.routes.utils import get_field_params
+from app.services.recommendation_service import recommender
+from app.services.pantry_service import PantryService, pantry_suggester, MAX_SYNC_ITEMS
+from app.services.shopping_list_service import ShoppingListService, MAX_BATCH_CHANGES
+from datetime import datetime, timezone
 
 # 用户相关路由
 @api_bp.route('/users', methods=['POST'])
@@ -101,8 +106,53 @@ def add_user_ingredient(user_id):
         db.session.add(user_ingredient)
     
     db.session.commit()
+    pantry_suggester.invalidate(user_id)
     return jsonify(user_ingredient.to_dict()), 201
 
+def _parse_pantry_items(data):
+    """校验并规范化批量同步的库存条目，返回(条目, 错误响应)"""
+    items = data.get('items')
+    if not isinstance(items, list):
+        return None, (jsonify({'error': 'items must be a list'}), 400)
+    if len(items) > MAX_SYNC_ITEMS:
+        return None, (jsonify({'error': f'At most {MAX_SYNC_ITEMS} items per request'}), 400)
+    
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict) or ('ingredient_id' not in item and 'ingredient_name' not in item):
+            return None, (jsonify({'error': f'Item {index}: either ingredient_id or ingredient_name is required'}), 400)
+        if 'ingredient_id' in item and (not isinstance(item['ingredient_id'], int) or isinstance(item['ingredient_id'], bool)):
+            return None, (jsonify({'error': f'Item {index}: ingredient_id must be an integer'}), 400)
+        if 'ingredient_name' in item and not isinstance(item['ingredient_name'], str):
+            return None, (jsonify({'error': f'Item {index}: ingredient_name must be a string'}), 400)
+        entry = {key: item[key] for key in ('ingredient_id', 'ingredient_name', 'unit', 'category') if key in item}
+        if 'amount' in item:
+            if item['amount'] is not None and not isinstance(item['amount'], (int, float)):
+                return None, (jsonify({'error': f'Item {index}: amount must be a number'}), 400)
+            entry['amount'] = item['amount']
+        if 'expiry_date' in item:
+            try:
+                entry['expiry_date'] = datetime.fromisoformat(item['expiry_date']).date() if item['expiry_date'] else None
+            except (TypeError, ValueError):
+                return None, (jsonify({'error': f'Item {index}: invalid expiry_date'}), 400)
+        parsed.append(entry)
+    return parsed, None
+
+@api_bp.route('/users/<int:user_id>/ingredients', methods=['PUT'])
+def sync_user_ingredients(user_id):
+    """批量同步用户食材库存（replace为true时删除未提交的库存）"""
+    User.query.get_or_404(user_id)  # 确认用户存在
+    data = request.get_json() or {}
+    items, error = _parse_pantry_items(data)
+    if error:
+        return error
+    
+    result = PantryService.sync(user_id, items, replace=bool(data.get('replace')))
+    db.session.commit()
+    pantry_suggester.invalidate(user_id)
+    
+    return jsonify(result)
+
 @api_bp.route('/users/<int:user_id>/ingredients/<int:ingredient_id>', methods=['DELETE'])
 def delete_user_ingredient(user_id, ingredient_id):
     """删除用户食材库存"""
@@ -112,16 +162,30 @@ def delete_user_ingredient(user_id, ingredient_id):
     
     db.session.delete(user_ingredient)
     db.session.commit()
+    pantry_suggester.invalidate(user_id)
     return '', 204
 
 # 购物清单相关路由
 @api_bp.route('/users/<int:user_id>/shopping-lists', methods=['GET'])
 def get_user_shopping_lists(user_id):
-    """获取用户的购物清单"""
+    """获取用户的购物清单摘要（分页，不含项目明细）"""
     User.query.get_or_404(user_id)  # 确认用户存在
     
-    shopping_lists = ShoppingList.query.filter_by(user_id=user_id).all()
-    return jsonify([sl.to_dict() for sl in shopping_lists])
+    page = request.args.get('page', 1, type=int)
+    per_page = min(request.args.get('per_page', 20, type=int), 50)
+    if page < 1 or per_page < 1:
+        abort(404)
+    
+    items, total = ShoppingListService.get_summaries(user_id, page, per_page)
+    if page > 1 and not items:
+        abort(404)
+    
+    return jsonify({
+        'items': items,
+        'total': total,
+        'pages': ceil(total / per_page) if total else 0,
+        'page': page
+    })
 
 @api_bp.route('/users/<int:user_id>/shopping-lists', methods=['POST'])
 def create_shopping_list(user_id):
@@ -175,7 +239,8 @@ def create_shopping_list(user_id):
 def get_shopping_list(id):
     """获取购物清单详情"""
     shopping_list = ShoppingList.query.get_or_404(id)
-    return jsonify(shopping_list.to_dict())
+    fields, include = get_field_params()
+    return jsonify(shopping_list.to_dict(fields, include))
 
 @api_bp.route('/shopping-lists/<int:id>/items', methods=['POST'])
 def add_shopping_list_item(id):
@@ -233,6 +298,53 @@ def add_shopping_list_item(id):
     db.session.commit()
     return jsonify(item.to_dict()), 201
 
+def _parse_item_changes(data, offline):
+    """校验批量更新的项目变更，返回(变更, 错误响应)"""
+    changes = data.get('changes')
+    if not isinstance(changes, list):
+        return None, (jsonify({'error': 'changes must be a list'}), 400)
+    if len(changes) > MAX_BATCH_CHANGES:
+        return None, (jsonify({'error': f'At most {MAX_BATCH_CHANGES} changes per request'}), 400)
+    
+    parsed = []
+    for index, change in enumerate(changes):
+        if not isinstance(change, dict) or not isinstance(change.get('id'), int):
+            return None, (jsonify({'error': f'Change {index}: id must be an integer'}), 400)
+        entry = {'id': change['id']}
+        if 'amount' in change:
+            if change['amount'] is not None and not isinstance(change['amount'], (int, float)):
+                return None, (jsonify({'error': f'Change {index}: amount must be a number'}), 400)
+            entry['amount'] = change['amount']
+        if 'is_purchased' in change:
+            if not isinstance(change['is_purchased'], bool):
+                return None, (jsonify({'error': f'Change {index}: is_purchased must be a boolean'}), 400)
+            entry['is_purchased'] = change['is_purchased']
+        if offline:
+            try:
+                changed_at = datetime.fromisoformat(change['changed_at'])
+            except (KeyError, TypeError, ValueError):
+                return None, (jsonify({'error': f'Change {index}: changed_at must be an ISO 8601 timestamp'}), 400)
+            # 统一转换为naive UTC，与数据库中的updated_at比较
+            if changed_at.tzinfo is not None:
+                changed_at = changed_at.astimezone(timezone.utc).replace(tzinfo=None)
+            entry['changed_at'] = changed_at
+        parsed.append(entry)
+    return parsed, None
+
+@api_bp.route('/shopping-lists/<int:id>/items', methods=['PATCH'])
+def batch_update_shopping_list_items(id):
+    """批量更新购物清单项目（offline为true时按changed_at最后写入者胜出）"""
+    shopping_list = ShoppingList.query.get_or_404(id)
+    data = request.get_json() or {}
+    offline = bool(data.get('offline'))
+    changes, error = _parse_item_changes(data, offline)
+    if error:
+        return error
+    
+    result = ShoppingListService.batch_update(shopping_list, changes, offline)
+    db.session.commit()
+    return jsonify(result)
+
 @api_bp.route('/shopping-list-items/<int:id>', methods=['PUT'])
 def update_shopping_list_item(id):
     """更新购物清单项目"""
@@ -294,6 +406,7 @@ def add_user_preference(user_id):
     
     db.session.add(preference)
     db.session.commit()
+    recommender.invalidate(user_id)
     
     return jsonify(preference.to_dict()), 201
 
@@ -303,4 +416,5 @@ def delete_user_preference(id):
     preference = UserPreference.query.get_or_404(id)
     db.session.delete(preference)
     db.session.commit()
+    recommender.invalidate(preference.user_id)
     return '', 204
\ No newline at end of file
@@ -0,0 +1,20 @@
+from flask import request
+
+def _parse_list_arg(name):
+    """解析逗号分隔的查询参数，未提供时返回None"""
+    value = request.args.get(name)
+    if value is None:
+        return None
+    return {item.strip() for item in value.split(',') if item.strip()}
+
+def get_field_params():
+    """
+    获取稀疏字段参数
+
+    ?fields=id,name,image_url 只返回指定字段
+    ?include=steps,ingredients 只加载指定关联
+
+    Returns:
+        tuple: (fields, include)，未提供的参数为None
+    """
+    return _parse_list_arg('fields'), _parse_list_arg('include')
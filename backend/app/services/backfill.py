@@ -0,0 +1,190 @@
+"""
+大表分批回填
+
+迁移版本中新增的列先以可空、无默认值的方式添加（只修改表定义，不重写表），
+再由Backfill按主键区间分批UPDATE写入数据：每批一个短事务、批间暂停，
+线上读写只会在单批的行锁上短暂等待，不会长时间锁表。
+
+迁移版本模块中声明 BACKFILLS = [Backfill(...)]，由MigrationRunner在该版本的DDL执行后运行。
+"""
+
+import math
+import time
+from typing import Callable, Dict, NamedTuple, Optional
+
+from sqlalchemy import inspect, text
+from sqlalchemy.exc import DBAPIError
+
+class BackfillResult(NamedTuple):
+    """回填结果"""
+    rows: int  # 更新的行数
+    batches: int  # 执行的批次数
+    elapsed: float  # 耗时（秒）
+
+class BackfillEstimate(NamedTuple):
+    """回填预估（dry-run）"""
+    rows: int  # 预计更新的行数
+    batches: int  # 预计批次数
+    seconds: float  # 预计耗时（含批间暂停）
+    sampled: bool  # True表示按一批真实UPDATE（回滚）计时，False表示新列尚不存在，按一批读取计时
+
+class Backfill:
+    """
+    按主键区间分批执行UPDATE
+
+    SQL片段以字符串给出（迁移脚本不依赖会随版本变化的模型类），例如：
+        Backfill('recipes', {'nutrition_info': "'{}'"}, where='nutrition_info IS NULL')
+
+    各数据库语法不同的表达式可按方言给出，未列出的方言使用'default'，例如：
+        Backfill('recipe_summaries', {'tags': {'postgresql': "string_agg(...)", 'default': "group_concat(...)"}})
+
+    where应只匹配尚未回填的行，这样中断后重新执行会跳过已完成的部分。
+    原始SQL不会触发模型上的onupdate，updated_at等列保持不变。
+    """
+
+    def __init__(self, table: str, values: Dict[str, str], where: Optional[str] = None,
+                 key: str = 'id', batch_size: int = 1000, pause: float = 0.1):
+        """
+        Args:
+            table: 表名
+            values: 列名 -> SQL表达式（或 方言名 -> SQL表达式）
+            where: 需要回填的行的条件（SQL），None表示全部行
+            key: 单列整数主键，按其区间分批
+            batch_size: 每批覆盖的主键数量
+            pause: 每批提交后暂停的秒数，给线上请求和复制留出余量
+        """
+        self.table = table
+        self.values = values
+        self.where = where
+        self.key = key
+        self.batch_size = batch_size
+        self.pause = pause
+
+    def __repr__(self):
+        return f"Backfill({self.table}: {', '.join(self.values)})"
+
+    def _statements(self, connection, batch_size):
+        quote = connection.dialect.identifier_preparer.quote
+        table, key = quote(self.table), quote(self.key)
+        condition = f' AND ({self.where})' if self.where else ''
+        values = {
+            column: expression.get(connection.dialect.name, expression.get('default'))
+            if isinstance(expression, dict) else expression
+            for column, expression in self.values.items()
+        }
+        assignments = ', '.join(f'{quote(column)} = {expression}' for column, expression in values.items())
+        expressions = ', '.join(values.values())
+        return {
+            # 本批的上界：从lower之后数第batch_size个主键，走主键索引只读取一批的键
+            'upper': text(f'SELECT {key} FROM {table} WHERE {key} > :lower ORDER BY {key} '
+                          f'LIMIT 1 OFFSET {batch_size - 1}'),
+            'last': text(f'SELECT max({key}) FROM {table} WHERE {key} > :lower'),
+            'update': text(f'UPDATE {table} SET {assignments} '
+                           f'WHERE {key} > :lower AND {key} <= :upper{condition}'),
+            'select': text(f'SELECT {expressions} FROM {table} WHERE {key} > :lower AND {key} <= :upper'),
+            'keys': text(f'SELECT {key} FROM {table} WHERE {key} > :lower AND {key} <= :upper'),
+            'total': text(f'SELECT count(*) FROM {table}'),
+            'pending': text(f'SELECT count(*) FROM {table}{" WHERE " + self.where if self.where else ""}'),
+            'first': text(f'SELECT min({key}) - 1 FROM {table}'),
+        }
+
+    @staticmethod
+    def _upper(connection, statements, lower):
+        """返回下一批的主键上界，没有剩余行时返回None"""
+        upper = connection.execute(statements['upper'], {'lower': lower}).scalar()
+        if upper is None:
+            upper = connection.execute(statements['last'], {'lower': lower}).scalar()
+        return upper
+
+    def run(self, engine, progress: Optional[Callable[[str], None]] = print,
+            batch_size: Optional[int] = None, pause: Optional[float] = None) -> BackfillResult:
+        """
+        执行回填，每批单独提交
+
+        Args:
+            engine: 数据库引擎
+            progress: 进度输出函数，None表示不输出
+            batch_size: 覆盖声明中的批大小
+            pause: 覆盖声明中的批间暂停秒数
+
+        Returns:
+            BackfillResult: 更新行数、批次数和耗时
+        """
+        batch_size = batch_size or self.batch_size
+        pause = self.pause if pause is None else pause
+
+        start = time.perf_counter()
+        with engine.connect() as connection:
+            statements = self._statements(connection, batch_size)
+            total = connection.execute(statements['total']).scalar()
+            lower = connection.execute(statements['first']).scalar()
+            connection.rollback()
+
+            rows = batches = scanned = 0
+            while lower is not None:
+                with connection.begin():
+                    upper = self._upper(connection, statements, lower)
+                    if upper is None:
+                        break
+                    rows += connection.execute(statements['update'], {'lower': lower, 'upper': upper}).rowcount
+                batches += 1
+                scanned = min(scanned + batch_size, total)
+                lower = upper
+
+                if progress:
+                    elapsed = time.perf_counter() - start
+                    remaining = elapsed / scanned * (total - scanned) if scanned else 0
+                    progress(f'   {self.table}: {scanned}/{total} ({scanned / max(total, 1):.0%}), '
+                             f'已更新 {rows} 行, {scanned / elapsed:.0f} 行/秒, 预计剩余 {remaining:.0f}s')
+                if pause:
+                    time.sleep(pause)
+
+        return BackfillResult(rows, batches, time.perf_counter() - start)
+
+    def estimate(self, engine, batch_size: Optional[int] = None,
+                 pause: Optional[float] = None) -> Optional[BackfillEstimate]:
+        """
+        预估回填规模和耗时，不修改数据
+
+        行数按where条件计数（条件引用的新列尚未创建时按全表计数）；
+        耗时按第一批UPDATE在回滚事务中的实际执行时间外推，新列尚未创建时改为对第一批执行SELECT计时
+        （表达式引用的新表也不存在时只读取主键），不含写入开销，结果偏乐观。回填的表尚未创建（由同一版本新建）时返回None。
+        """
+        batch_size = batch_size or self.batch_size
+        pause = self.pause if pause is None else pause
+        with engine.connect() as connection:
+            if not inspect(connection).has_table(self.table):
+                return None
+            statements = self._statements(connection, batch_size)
+            total = connection.execute(statements['total']).scalar()
+            try:
+                with connection.begin_nested():
+                    rows = connection.execute(statements['pending']).scalar()
+            except DBAPIError:
+                rows = total
+
+            lower = connection.execute(statements['first']).scalar()
+            upper = self._upper(connection, statements, lower) if lower is not None else None
+            sampled = True
+            seconds = 0.0
+            if upper is not None:
+                parameters = {'lower': lower, 'upper': upper}
+                try:
+                    with connection.begin_nested() as savepoint:
+                        started = time.perf_counter()
+                        connection.execute(statements['update'], parameters)
+                        seconds = time.perf_counter() - started
+                        savepoint.rollback()
+                except DBAPIError:
+                    sampled = False
+                    started = time.perf_counter()
+                    try:
+                        with connection.begin_nested():
+                            connection.execute(statements['select'], parameters).all()
+                    except DBAPIError:
+                        connection.execute(statements['keys'], parameters).all()
+                    seconds = time.perf_counter() - started
+            connection.rollback()
+
+        batches = math.ceil(total / batch_size)
+        return BackfillEstimate(rows, batches, batches * (seconds + pause), sampled)
@@ -0,0 +1,158 @@
+from typing import Dict, List, Sequence, Set, Tuple
+from sqlalchemy import Integer, and_, bindparam, func, or_, select, text
+from sqlalchemy.exc import IntegrityError
+from app import db
+
+# 单条SELECT中按唯一键查询的最大行数
+KEY_CHUNK_SIZE = 500
+
+def _dialect_insert(model):
+    """
+    获取当前数据库方言的INSERT构造，用于ON CONFLICT语句
+
+    Args:
+        model: 模型类
+
+    Returns:
+        Insert: 支持on_conflict_do_nothing/on_conflict_do_update的INSERT语句；
+            方言不支持ON CONFLICT时返回None，调用方改用_existing_keys + 普通INSERT
+    """
+    dialect = db.session.get_bind().dialect.name
+    if dialect == 'postgresql':
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        return None
+    return insert(model.__table__)
+
+def _key(row: Dict, index_elements: Sequence[str]) -> Tuple:
+    return tuple(row[column] for column in index_elements)
+
+def _existing_keys(model, rows: List[Dict], index_elements: Sequence[str]) -> Set[Tuple]:
+    """查询rows中唯一键已存在的行（分块，每块一条SELECT）"""
+    table = model.__table__
+    columns = [table.c[column] for column in index_elements]
+    keys = list({_key(row, index_elements) for row in rows})
+    existing = set()
+    for start in range(0, len(keys), KEY_CHUNK_SIZE):
+        condition = or_(*(
+            and_(*(column == value for column, value in zip(columns, key)))
+            for key in keys[start:start + KEY_CHUNK_SIZE]
+        ))
+        existing.update(tuple(row) for row in db.session.execute(select(*columns).where(condition)))
+    return existing
+
+def _insert_missing(model, rows: List[Dict], index_elements: Sequence[str]) -> Set[Tuple]:
+    """
+    不支持ON CONFLICT的数据库：先查出已存在的键，再普通INSERT其余的行
+
+    查询与插入之间被并发插入的行触发唯一约束时，逐行在保存点中重试并跳过冲突的行。
+
+    Returns:
+        Set[Tuple]: 实际插入的行的唯一键
+    """
+    existing = _existing_keys(model, rows, index_elements)
+    pending, seen = [], set(existing)
+    for row in rows:
+        key = _key(row, index_elements)
+        if key not in seen:
+            seen.add(key)
+            pending.append(row)
+    if not pending:
+        return set()
+
+    insert = model.__table__.insert()
+    try:
+        with db.session.begin_nested():
+            db.session.execute(insert, pending)
+        return {_key(row, index_elements) for row in pending}
+    except IntegrityError:
+        inserted = set()
+        for row in pending:
+            try:
+                with db.session.begin_nested():
+                    db.session.execute(insert, row)
+                inserted.add(_key(row, index_elements))
+            except IntegrityError:
+                continue
+        return inserted
+
+def insert_ignore(model, rows: List[Dict], index_elements: Sequence[str]) -> Set[Tuple]:
+    """
+    批量插入，遇到唯一约束冲突的行直接跳过（INSERT … ON CONFLICT DO NOTHING … RETURNING）
+
+    Args:
+        model: 模型类
+        rows: 待插入的行
+        index_elements: 冲突判断使用的唯一约束列
+
+    Returns:
+        Set[Tuple]: 实际插入的行的唯一键（按index_elements的顺序），被跳过的行不在其中
+    """
+    if not rows:
+        return set()
+    stmt = _dialect_insert(model)
+    if stmt is None:
+        return _insert_missing(model, rows, index_elements)
+    table = model.__table__
+    stmt = stmt.on_conflict_do_nothing(index_elements=list(index_elements)).returning(
+        *(table.c[column] for column in index_elements)
+    )
+    return {tuple(row) for row in db.session.execute(stmt, rows)}
+
+def upsert(model, rows: List[Dict], index_elements: Sequence[str], update_columns: Sequence[str]) -> None:
+    """
+    批量插入或更新（INSERT … ON CONFLICT DO UPDATE）
+
+    Args:
+        model: 模型类
+        rows: 待写入的行，所有行的键必须一致
+        index_elements: 冲突判断使用的唯一约束列
+        update_columns: 冲突时用新值覆盖的列
+    """
+    if not rows:
+        return
+    stmt = _dialect_insert(model)
+    if stmt is None:
+        # 插入不存在的行，其余（包括并发插入而冲突的行）按唯一键更新
+        inserted = _insert_missing(model, rows, index_elements)
+        table = model.__table__
+        update = table.update().where(and_(
+            *(table.c[column] == bindparam(f'key_{column}') for column in index_elements)
+        )).values({column: bindparam(f'value_{column}') for column in update_columns})
+        updates = [
+            {**{f'key_{column}': row[column] for column in index_elements},
+             **{f'value_{column}': row[column] for column in update_columns}}
+            for row in rows if _key(row, index_elements) not in inserted
+        ]
+        if updates:
+            db.session.execute(update, updates)
+        return
+    stmt = stmt.on_conflict_do_update(
+        index_elements=list(index_elements),
+        set_={column: stmt.excluded[column] for column in update_columns}
+    )
+    db.session.execute(stmt, rows)
+
+def reset_sequences(connection, table) -> None:
+    """
+    显式写入主键后，将PostgreSQL的自增序列推进到当前最大值（其他数据库不需要）
+
+    非自增列的序列名为NULL，setval不生效。
+
+    Args:
+        connection: 执行插入的连接
+        table: Table对象
+    """
+    if connection.dialect.name != 'postgresql':
+        return
+    for column in table.primary_key.columns:
+        if not isinstance(column.type, Integer):
+            continue
+        maximum = connection.execute(select(func.max(column))).scalar()
+        if maximum is not None:
+            connection.execute(
+                text('SELECT setval(pg_get_serial_sequence(:table, :column), :value)'),
+                {'table': table.name, 'column': column.name, 'value': maximum}
+            )
@@ -0,0 +1,667 @@
+import hashlib
+import logging
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.recipe import Recipe, Step, CatalogVersion, _encode_recipe, _encode_step
+from app.models.ingredient import Ingredient, RecipeIngredient, _encode_recipe_ingredient
+
+try:
+    import fcntl
+except ImportError:  # 非POSIX平台只能使用进程内快照
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def _intern(value):
+    """取值有限的字符串（分类、难度、备注）在快照内共享同一对象"""
+    return sys.intern(value) if value else value
+
+class IngredientRecord(NamedTuple):
+    """食材（只读）"""
+    id: int
+    name: str
+    unit: Optional[str]
+    category: Optional[str]
+
+class StepRecord(NamedTuple):
+    """菜谱步骤（只读）"""
+    id: int
+    recipe_id: int
+    step_number: int
+    description: str
+    image_url: Optional[str]
+
+    def to_dict(self):
+        return _encode_step(self)
+
+class RecipeIngredientRecord(NamedTuple):
+    """菜谱食材关联（只读），ingredient与快照中的IngredientRecord共享"""
+    recipe_id: int
+    ingredient_id: int
+    amount: float
+    note: Optional[str]
+    ingredient: Optional[IngredientRecord]
+
+    def to_dict(self):
+        data = _encode_recipe_ingredient(self)
+        data['ingredient_name'] = self.ingredient.name if self.ingredient else None
+        data['unit'] = self.ingredient.unit if self.ingredient else None
+        return data
+
+class RecipeRecord(NamedTuple):
+    """
+    菜谱（只读），属性与Recipe模型一致，可直接用于RecipeQueryService的过滤和格式化
+
+    steps按step_number排序，recipe_ingredients按食材ID排序（与按主键读取关联表的顺序一致）。
+    """
+    id: int
+    name: str
+    description: Optional[str]
+    difficulty: Optional[str]
+    cooking_time: Optional[int]
+    servings: Optional[int]
+    image_url: Optional[str]
+    category: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
+    steps: Tuple[StepRecord, ...]
+    recipe_ingredients: Tuple[RecipeIngredientRecord, ...]
+
+    def to_dict(self, fields=None, include=None):
+        """与Recipe.to_dict输出一致，但不访问数据库"""
+        if include is None:
+            include = () if fields else Recipe.RELATIONS
+
+        data = _encode_recipe(self)
+        if fields:
+            data = {key: value for key, value in data.items() if key == 'id' or key in fields}
+
+        if 'steps' in include:
+            data['steps'] = [step.to_dict() for step in self.steps]
+        if 'ingredients' in include:
+            data['ingredients'] = [ri.to_dict() for ri in self.recipe_ingredients]
+
+        return data
+
+def load_recipe_records(recipe_ids: Optional[Iterable[int]] = None) -> Dict[int, RecipeRecord]:
+    """
+    用四条查询读取菜谱、步骤、食材关联和食材，不构造ORM对象
+
+    Args:
+        recipe_ids: 只读取这些菜谱，None表示全部
+
+    Returns:
+        Dict[int, RecipeRecord]: 菜谱ID -> 记录，不存在的ID被跳过
+    """
+    recipe_ids = None if recipe_ids is None else list(recipe_ids)
+
+    def restrict(statement, column):
+        return statement if recipe_ids is None else statement.where(column.in_(recipe_ids))
+
+    steps = defaultdict(list)
+    for row in db.session.execute(restrict(db.select(
+        Step.id, Step.recipe_id, Step.step_number, Step.description, Step.image_url
+    ), Step.recipe_id).order_by(Step.recipe_id, Step.step_number, Step.id)):
+        steps[row.recipe_id].append(StepRecord(*row))
+
+    ri_rows = db.session.execute(restrict(db.select(
+        RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount, RecipeIngredient.note
+    ), RecipeIngredient.recipe_id).order_by(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)).all()
+
+    ingredient_query = db.select(Ingredient.id, Ingredient.name, Ingredient.unit, Ingredient.category)
+    if recipe_ids is not None:
+        ingredient_query = ingredient_query.where(Ingredient.id.in_({row.ingredient_id for row in ri_rows}))
+    ingredients = {
+        row.id: IngredientRecord(row.id, row.name, row.unit, row.category)
+        for row in db.session.execute(ingredient_query)
+    }
+
+    recipe_ingredients = defaultdict(list)
+    for row in ri_rows:
+        recipe_ingredients[row.recipe_id].append(RecipeIngredientRecord(
+            row.recipe_id, row.ingredient_id, row.amount, _intern(row.note), ingredients.get(row.ingredient_id)
+        ))
+
+    recipes = {}
+    for row in db.session.execute(restrict(db.select(
+        Recipe.id, Recipe.name, Recipe.description, Recipe.difficulty, Recipe.cooking_time, Recipe.servings,
+        Recipe.image_url, Recipe.category, Recipe.created_at, Recipe.updated_at
+    ), Recipe.id)):
+        recipes[row.id] = RecipeRecord(
+            row.id, row.name, row.description, _intern(row.difficulty), row.cooking_time, row.servings,
+            row.image_url, _intern(row.category), row.created_at, row.updated_at,
+            tuple(steps.get(row.id, ())), tuple(recipe_ingredients.get(row.id, ()))
+        )
+    return recipes
+
+class CatalogSnapshot:
+    """
+    某个目录版本的只读菜谱快照
+
+    记录均为不可变的NamedTuple，快照构建完成后不再修改，多线程可无锁读取；
+    目录变化时由CatalogStore整体替换为新快照。
+    """
+    __slots__ = ('version', 'loaded_at', 'recipes', 'ordered_ids', 'ids_by_category')
+
+    def __init__(self, version: int, recipes: Dict[int, RecipeRecord]):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.recipes = recipes
+
+        # 与列表接口的排序一致：创建时间倒序
+        ordered = sorted(recipes.values(), key=lambda r: (r.created_at or datetime.min, r.id), reverse=True)
+        self.ordered_ids = tuple(recipe.id for recipe in ordered)
+        ids_by_category = defaultdict(list)
+        for recipe in ordered:
+            ids_by_category[recipe.category].append(recipe.id)
+        self.ids_by_category = {category: tuple(ids) for category, ids in ids_by_category.items()}
+
+    @classmethod
+    def load(cls, version: int) -> 'CatalogSnapshot':
+        return cls(version, load_recipe_records())
+
+    def get(self, recipe_id: int) -> Optional[RecipeRecord]:
+        return self.recipes.get(recipe_id)
+
+    def __len__(self):
+        return len(self.recipes)
+
+    def list_ids(self, category: Optional[str] = None, difficulty: Optional[str] = None) -> List[int]:
+        """按创建时间倒序返回满足条件的菜谱ID"""
+        ids = self.ids_by_category.get(category, ()) if category else self.ordered_ids
+        if difficulty:
+            return [recipe_id for recipe_id in ids if self.recipes[recipe_id].difficulty == difficulty]
+        return list(ids)
+
+    def page(self, category: Optional[str] = None, difficulty: Optional[str] = None,
+             offset: int = 0, limit: int = 10) -> Tuple[List[int], int]:
+        """返回(一页菜谱ID, 满足条件的总数)"""
+        ids = self.list_ids(category, difficulty)
+        return ids[offset:offset + limit], len(ids)
+
+# 共享快照文件格式：文件头 + 定长列数组 + 去重后的UTF-8字符串区，所有整数为小端int64
+_MAGIC = b'ECCAT\x00\x01\x00'
+_HEADER = struct.Struct('<8sqqq')  # 魔数、目录版本、版本更新时间（微秒）、列数
+_SECTION = struct.Struct('<qq')  # 列的起始偏移、字节数
+_NULL = -(1 << 63)  # 整数列中的NULL
+_NONE = -1  # 字符串列中的NULL
+_ANY = -2  # 分组索引中表示不按该条件过滤
+_EPOCH = datetime(1970, 1, 1)
+
+_COLUMNS = (
+    ('recipe_id', 'q'), ('recipe_name', 'q'), ('recipe_description', 'q'), ('recipe_difficulty', 'q'),
+    ('recipe_cooking_time', 'q'), ('recipe_servings', 'q'), ('recipe_image_url', 'q'), ('recipe_category', 'q'),
+    ('recipe_created_at', 'q'), ('recipe_updated_at', 'q'), ('recipe_step_start', 'q'), ('recipe_ri_start', 'q'),
+    ('step_id', 'q'), ('step_number', 'q'), ('step_description', 'q'), ('step_image_url', 'q'),
+    ('ri_ingredient_id', 'q'), ('ri_amount', 'd'), ('ri_note', 'q'),
+    ('ingredient_id', 'q'), ('ingredient_name', 'q'), ('ingredient_unit', 'q'), ('ingredient_category', 'q'),
+    ('group_category', 'q'), ('group_difficulty', 'q'), ('group_start', 'q'), ('group_positions', 'q'),
+    ('string_offset', 'q'), ('string_blob', 'B')
+)
+
+def _to_micros(value: Optional[datetime]) -> int:
+    return _NULL if value is None else (value - _EPOCH) // timedelta(microseconds=1)
+
+def _from_micros(value: int) -> Optional[datetime]:
+    return None if value == _NULL else _EPOCH + timedelta(microseconds=value)
+
+class _StringTable:
+    """写入共享快照时收集字符串，相同字符串只保存一份"""
+
+    def __init__(self):
+        self.ids = {}
+        self.offsets = array('q', [0])
+        self.blob = bytearray()
+
+    def add(self, value: Optional[str]) -> int:
+        if value is None:
+            return _NONE
+        string_id = self.ids.get(value)
+        if string_id is None:
+            string_id = self.ids[value] = len(self.offsets) - 1
+            self.blob += value.encode('utf-8')
+            self.offsets.append(len(self.blob))
+        return string_id
+
+def _grouped_starts(rows, recipe_ids, append) -> array:
+    """rows按recipe_id排序，逐行交给append，返回每个菜谱在子表中的起始下标（长度为菜谱数+1）"""
+    starts = array('q', [0])
+    position, count = 0, 0
+    for row in rows:
+        while position < len(recipe_ids) and recipe_ids[position] < row.recipe_id:
+            starts.append(count)
+            position += 1
+        if position < len(recipe_ids) and recipe_ids[position] == row.recipe_id:
+            append(row)
+            count += 1
+    starts.extend([count] * (len(recipe_ids) - position))
+    return starts
+
+class MappedCatalogSnapshot:
+    """
+    映射到内存的只读目录快照，与CatalogSnapshot接口一致
+
+    数据以列数组保存在文件中，各WSGI工作进程以只读方式mmap同一文件，
+    物理内存由操作系统页缓存共享，不随进程数增加；记录在读取时按需解码。
+    文件由一个进程写入临时文件后原子重命名替换，已映射旧文件的进程不受影响。
+    """
+    __slots__ = ('version', 'loaded_at', '_columns', '_groups')
+
+    def __init__(self, path: str):
+        with open(path, 'rb') as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, updated_us, count = _HEADER.unpack_from(buffer, 0)
+        if magic != _MAGIC or count != len(_COLUMNS):
+            raise ValueError(f'Invalid catalog snapshot file: {path}')
+        self.version = (version, updated_us)
+        self.loaded_at = time.monotonic()
+
+        view = memoryview(buffer)
+        self._columns = {}
+        for index, (name, typecode) in enumerate(_COLUMNS):
+            offset, size = _SECTION.unpack_from(buffer, _HEADER.size + index * _SECTION.size)
+            self._columns[name] = view[offset:offset + size].cast(typecode)
+
+        # 分组索引很小，打开时解码为字典
+        columns = self._columns
+        self._groups = {}
+        for index in range(len(columns['group_category'])):
+            key = tuple(
+                None if code == _ANY else self._string(code)
+                for code in (columns['group_category'][index], columns['group_difficulty'][index])
+            )
+            self._groups[key] = (columns['group_start'][index], columns['group_start'][index + 1])
+
+    @staticmethod
+    def write(path: str, version: Tuple[int, int]) -> None:
+        """从数据库构建快照文件：写入同目录下的临时文件，fsync后原子重命名"""
+        strings = _StringTable()
+        columns = {name: array(typecode) for name, typecode in _COLUMNS}
+
+        for row in db.session.execute(db.select(
+            Ingredient.id, Ingredient.name, Ingredient.unit, Ingredient.category
+        ).order_by(Ingredient.id)):
+            columns['ingredient_id'].append(row.id)
+            columns['ingredient_name'].append(strings.add(row.name))
+            columns['ingredient_unit'].append(strings.add(row.unit))
+            columns['ingredient_category'].append(strings.add(row.category))
+
+        for row in db.session.execute(db.select(
+            Recipe.id, Recipe.name, Recipe.description, Recipe.difficulty, Recipe.cooking_time, Recipe.servings,
+            Recipe.image_url, Recipe.category, Recipe.created_at, Recipe.updated_at
+        ).order_by(Recipe.id).execution_options(yield_per=10000)):
+            columns['recipe_id'].append(row.id)
+            columns['recipe_name'].append(strings.add(row.name))
+            columns['recipe_description'].append(strings.add(row.description))
+            columns['recipe_difficulty'].append(strings.add(row.difficulty))
+            columns['recipe_cooking_time'].append(_NULL if row.cooking_time is None else row.cooking_time)
+            columns['recipe_servings'].append(_NULL if row.servings is None else row.servings)
+            columns['recipe_image_url'].append(strings.add(row.image_url))
+            columns['recipe_category'].append(strings.add(row.category))
+            columns['recipe_created_at'].append(_to_micros(row.created_at))
+            columns['recipe_updated_at'].append(_to_micros(row.updated_at))
+        recipe_ids = columns['recipe_id']
+
+        def append_step(row):
+            columns['step_id'].append(row.id)
+            columns['step_number'].append(row.step_number)
+            columns['step_description'].append(strings.add(row.description))
+            columns['step_image_url'].append(strings.add(row.image_url))
+        columns['recipe_step_start'] = _grouped_starts(db.session.execute(db.select(
+            Step.id, Step.recipe_id, Step.step_number, Step.description, Step.image_url
+        ).order_by(Step.recipe_id, Step.step_number, Step.id).execution_options(yield_per=10000)),
+            recipe_ids, append_step)
+
+        def append_recipe_ingredient(row):
+            columns['ri_ingredient_id'].append(row.ingredient_id)
+            columns['ri_amount'].append(float('nan') if row.amount is None else row.amount)
+            columns['ri_note'].append(strings.add(row.note))
+        columns['recipe_ri_start'] = _grouped_starts(db.session.execute(db.select(
+            RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount, RecipeIngredient.note
+        ).order_by(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id).execution_options(yield_per=10000)),
+            recipe_ids, append_recipe_ingredient)
+
+        # 列表接口的分页索引：按(分类, 难度)及其通配组合分组，组内按创建时间倒序
+        created = columns['recipe_created_at']
+        order = sorted(range(len(recipe_ids)), key=lambda p: (created[p], recipe_ids[p]), reverse=True)
+        groups = defaultdict(lambda: array('q'))
+        for position in order:
+            category, difficulty = columns['recipe_category'][position], columns['recipe_difficulty'][position]
+            groups[(_ANY, _ANY)].append(position)
+            if category != _NONE:
+                groups[(category, _ANY)].append(position)
+            if difficulty != _NONE:
+                groups[(_ANY, difficulty)].append(position)
+            if category != _NONE and difficulty != _NONE:
+                groups[(category, difficulty)].append(position)
+        columns['group_start'].append(0)
+        for (category, difficulty), positions in groups.items():
+            columns['group_category'].append(category)
+            columns['group_difficulty'].append(difficulty)
+            columns['group_positions'].extend(positions)
+            columns['group_start'].append(len(columns['group_positions']))
+
+        columns['string_offset'] = strings.offsets
+        sections = [
+            strings.blob if name == 'string_blob' else columns[name].tobytes() for name, _ in _COLUMNS
+        ]
+
+        header_size = _HEADER.size + _SECTION.size * len(sections)
+        offset = header_size + (-header_size) % 8
+        layout = []
+        for data in sections:
+            layout.append((offset, len(data)))
+            offset += len(data) + (-len(data)) % 8
+
+        temp_path = f'{path}.{os.getpid()}.tmp'
+        with open(temp_path, 'wb') as f:
+            f.write(_HEADER.pack(_MAGIC, version[0], version[1], len(sections)))
+            for section in layout:
+                f.write(_SECTION.pack(*section))
+            for (offset, _), data in zip(layout, sections):
+                f.write(b'\x00' * (offset - f.tell()))
+                f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+
+    def _string(self, string_id: int) -> Optional[str]:
+        if string_id < 0:
+            return None
+        offsets = self._columns['string_offset']
+        return str(self._columns['string_blob'][offsets[string_id]:offsets[string_id + 1]], 'utf-8')
+
+    def _ingredient(self, ingredient_id: int) -> Optional[IngredientRecord]:
+        columns = self._columns
+        ids = columns['ingredient_id']
+        position = bisect_left(ids, ingredient_id)
+        if position == len(ids) or ids[position] != ingredient_id:
+            return None
+        return IngredientRecord(
+            ingredient_id,
+            self._string(columns['ingredient_name'][position]),
+            self._string(columns['ingredient_unit'][position]),
+            self._string(columns['ingredient_category'][position])
+        )
+
+    def _record(self, position: int) -> RecipeRecord:
+        columns = self._columns
+        recipe_id = columns['recipe_id'][position]
+        steps = tuple(
+            StepRecord(
+                columns['step_id'][index], recipe_id, columns['step_number'][index],
+                self._string(columns['step_description'][index]), self._string(columns['step_image_url'][index])
+            )
+            for index in range(columns['recipe_step_start'][position], columns['recipe_step_start'][position + 1])
+        )
+        recipe_ingredients = []
+        for index in range(columns['recipe_ri_start'][position], columns['recipe_ri_start'][position + 1]):
+            ingredient_id = columns['ri_ingredient_id'][index]
+            amount = columns['ri_amount'][index]
+            recipe_ingredients.append(RecipeIngredientRecord(
+                recipe_id, ingredient_id, None if amount != amount else amount,
+                self._string(columns['ri_note'][index]), self._ingredient(ingredient_id)
+            ))
+
+        cooking_time, servings = columns['recipe_cooking_time'][position], columns['recipe_servings'][position]
+        return RecipeRecord(
+            recipe_id,
+            self._string(columns['recipe_name'][position]),
+            self._string(columns['recipe_description'][position]),
+            self._string(columns['recipe_difficulty'][position]),
+            None if cooking_time == _NULL else cooking_time,
+            None if servings == _NULL else servings,
+            self._string(columns['recipe_image_url'][position]),
+            self._string(columns['recipe_category'][position]),
+            _from_micros(columns['recipe_created_at'][position]),
+            _from_micros(columns['recipe_updated_at'][position]),
+            steps,
+            tuple(recipe_ingredients)
+        )
+
+    def __len__(self):
+        return len(self._columns['recipe_id'])
+
+    def get(self, recipe_id: int) -> Optional[RecipeRecord]:
+        ids = self._columns['recipe_id']
+        position = bisect_left(ids, recipe_id)
+        if position == len(ids) or ids[position] != recipe_id:
+            return None
+        return self._record(position)
+
+    def page(self, category: Optional[str] = None, difficulty: Optional[str] = None,
+             offset: int = 0, limit: int = 10) -> Tuple[List[int], int]:
+        """返回(一页菜谱ID, 满足条件的总数)"""
+        start, end = self._groups.get((category or None, difficulty or None), (0, 0))
+        positions = self._columns['group_positions'][start + offset:min(start + offset + limit, end)]
+        ids = self._columns['recipe_id']
+        return [ids[position] for position in positions], end - start
+
+    def list_ids(self, category: Optional[str] = None, difficulty: Optional[str] = None) -> List[int]:
+        """按创建时间倒序返回满足条件的菜谱ID"""
+        start, end = self._groups.get((category or None, difficulty or None), (0, 0))
+        return self.page(category, difficulty, 0, end - start)[0]
+
+class CatalogStore:
+    """
+    目录快照管理
+
+    - 首次使用时加载快照，之后最多每poll_interval秒读取一次catalog_version判断是否变化
+    - 版本变化时由一个请求构建新快照并原子替换引用，其他请求继续读旧快照
+    - 本进程内的目录写入（ORM写入由after_flush事件自动触发）通过bump()递增版本，事务提交后的下一次读取立即重新加载
+    - 启用共享快照时，快照写入按数据库区分的文件并由所有工作进程mmap，
+      同一时刻只有一个进程（持有文件锁）负责重建，其他进程继续使用旧映射或回退到数据库
+    """
+
+    def __init__(self, enabled=True, poll_interval=2.0):
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self.path = None  # 共享快照文件，None表示使用进程内快照
+        self.reloads = 0
+        self._snapshot = None
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取参数"""
+        self.enabled = app.config.get('CATALOG_SNAPSHOT_ENABLED', self.enabled)
+        self.poll_interval = app.config.get('CATALOG_VERSION_POLL_INTERVAL', self.poll_interval)
+
+        # 内存数据库无法跨进程共享，只能使用进程内快照
+        uri = app.config.get('SQLALCHEMY_DATABASE_URI') or ''
+        in_memory = uri in ('sqlite://', 'sqlite:///:memory:')
+        if app.config.get('CATALOG_SNAPSHOT_SHARED', True) and fcntl is not None and not in_memory:
+            directory = app.config.get('CATALOG_SNAPSHOT_DIR') or tempfile.gettempdir()
+            digest = hashlib.sha1(uri.encode('utf-8')).hexdigest()[:12]
+            try:
+                os.makedirs(directory, exist_ok=True)
+                self.path = os.path.join(directory, f'easycook-catalog-{digest}.bin')
+            except OSError as e:
+                logger.warning(f"共享快照目录不可用，改用进程内快照: {str(e)}")
+                self.path = None
+        else:
+            self.path = None
+        app.extensions['catalog_store'] = self
+
+    @staticmethod
+    def read_version() -> Tuple[int, int]:
+        """
+        目录版本标识
+
+        Returns:
+            tuple: (版本号, 版本更新时间的微秒数)，重建数据库后版本号可能重复，更新时间用于区分
+        """
+        row = db.session.query(CatalogVersion.version, CatalogVersion.updated_at).filter(
+            CatalogVersion.id == 1
+        ).first()
+        return (row.version, _to_micros(row.updated_at)) if row is not None else (0, 0)
+
+    @staticmethod
+    def bump(session: Optional[Session] = None) -> None:
+        """
+        递增目录版本（不提交事务），每个事务只递增一次
+
+        菜谱、步骤、食材关联和食材的ORM写入由会话的after_flush事件自动调用；
+        只有绕过ORM的批量写入（Core插入、Query.update/delete）需要在同一事务中显式调用。
+
+        Args:
+            session: 写入所在的会话，默认为db.session
+        """
+        session = session or db.session
+        if session.info.get('catalog_changed'):
+            return
+        connection = session.connection()
+        table = CatalogVersion.__table__
+        result = connection.execute(table.update().where(table.c.id == 1).values(
+            version=table.c.version + 1, updated_at=datetime.utcnow()
+        ))
+        if result.rowcount == 0:
+            connection.execute(table.insert().values(id=1, version=1, updated_at=datetime.utcnow()))
+        session.info['catalog_changed'] = True
+
+    def _open_shared(self, version) -> Optional[MappedCatalogSnapshot]:
+        """映射共享快照文件，文件不存在或版本不一致时返回None"""
+        try:
+            snapshot = MappedCatalogSnapshot(self.path)
+        except (OSError, ValueError):
+            return None
+        return snapshot if snapshot.version == version else None
+
+    def _load_shared(self, version) -> Optional[MappedCatalogSnapshot]:
+        """
+        映射指定版本的共享快照，文件过期时尝试获取文件锁并重建
+
+        Returns:
+            MappedCatalogSnapshot: 其他进程正在重建时返回None
+        """
+        snapshot = self._open_shared(version)
+        if snapshot is not None:
+            return snapshot
+
+        with open(f'{self.path}.lock', 'a') as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                return None
+            # 等待锁期间其他进程可能已经完成重建；关闭文件即释放锁
+            snapshot = self._open_shared(version)
+            if snapshot is None:
+                MappedCatalogSnapshot.write(self.path, version)
+                snapshot = self._open_shared(version)
+            return snapshot
+
+    def current(self):
+        """
+        当前快照，未启用时返回None
+
+        Returns:
+            CatalogSnapshot或MappedCatalogSnapshot: 调用方在一次请求内应只取一次，保证读取同一版本；
+                共享快照首次构建期间其他进程返回None，调用方回退到数据库
+        """
+        if not self.enabled:
+            return None
+        snapshot = self._snapshot
+        now = time.monotonic()
+        if snapshot is not None and now - self._checked_at < self.poll_interval:
+            return snapshot
+
+        if not self._lock.acquire(blocking=snapshot is None):
+            return snapshot
+        try:
+            snapshot = self._snapshot
+            version = self.read_version()
+            self._checked_at = time.monotonic()
+            if snapshot is None or snapshot.version != version:
+                if self.path is None:
+                    loaded = CatalogSnapshot.load(version)
+                else:
+                    try:
+                        loaded = self._load_shared(version)
+                    except OSError as e:
+                        # 快照文件无法读写时继续使用旧快照（没有时为None），调用方回退到数据库
+                        logger.warning(f"共享快照加载失败: {str(e)}")
+                        loaded = None
+                if loaded is not None:
+                    snapshot = self._snapshot = loaded
+                    self.reloads += 1
+            return snapshot
+        finally:
+            self._lock.release()
+
+    def get_recipes(self, recipe_ids: Iterable[int]) -> List:
+        """
+        按ID顺序读取菜谱，快照中缺少的（如其他进程刚创建的）从数据库批量读取
+
+        Returns:
+            List[RecipeRecord]: 不存在的ID被跳过
+        """
+        recipe_ids = list(recipe_ids)
+        snapshot = self.current()
+        found = {}
+        if snapshot is not None:
+            found = {recipe_id: snapshot.get(recipe_id) for recipe_id in recipe_ids}
+            found = {recipe_id: record for recipe_id, record in found.items() if record is not None}
+        missing = [recipe_id for recipe_id in recipe_ids if recipe_id not in found]
+        if missing:
+            found.update(load_recipe_records(missing))
+        return [found[recipe_id] for recipe_id in recipe_ids if recipe_id in found]
+
+    def invalidate(self) -> None:
+        """丢弃当前快照，下一次读取重新加载"""
+        self._snapshot = None
+
+catalog_store = CatalogStore()
+
+# 快照不包含的菜谱列（热度计数），只修改这些列时目录不变
+_NON_CATALOG_COLUMNS = frozenset({
+    'favorite_count', 'view_count', 'plan_count', 'recent_activity', 'popularity_score', 'popularity_updated_at'
+})
+
+def _catalog_changed(session) -> bool:
+    """本次flush是否修改了快照中的内容"""
+    for obj in session.new:
+        # 新建的食材在被菜谱引用（新增RecipeIngredient）之前不影响目录
+        if isinstance(obj, (Recipe, Step, RecipeIngredient)):
+            return True
+    for obj in session.deleted:
+        if isinstance(obj, (Recipe, Step, RecipeIngredient, Ingredient)):
+            return True
+    for obj in session.dirty:
+        if isinstance(obj, Recipe):
+            state = inspect(obj)
+            if any(prop.key not in _NON_CATALOG_COLUMNS and state.attrs[prop.key].history.has_changes()
+                   for prop in state.mapper.column_attrs):
+                return True
+        elif isinstance(obj, (Step, RecipeIngredient, Ingredient)) and \
+                session.is_modified(obj, include_collections=False):
+            return True
+    return False
+
+@event.listens_for(Session, 'after_flush')
+def _bump_on_flush(session, flush_context):
+    """ORM写入菜谱、步骤、食材关联或食材时在同一事务内递增目录版本，不依赖调用方记得调用bump()"""
+    if not session.info.get('catalog_changed') and _catalog_changed(session):
+        CatalogStore.bump(session)
+
+@event.listens_for(Session, 'after_commit')
+def _recheck_after_commit(session):
+    """提交了目录变化的事务后跳过轮询间隔，本进程随后的读取即可看到新版本"""
+    if session.info.pop('catalog_changed', False):
+        catalog_store._checked_at = 0.0
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('catalog_changed', None)
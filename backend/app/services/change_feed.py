@@ -0,0 +1,181 @@
+from datetime import datetime
+from itertools import chain
+from typing import Dict, Iterable, List
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+from app import db
+from app.models.change import UserChange
+from app.models.favorite import FavoriteRecipe
+from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
+
+# 每次请求返回的最大变更数
+MAX_CHANGES_PER_PAGE = 500
+
+def record_changes(user_id: int, entity: str, entity_ids: Iterable[int], op: str = 'upsert', connection=None) -> None:
+    """
+    记录用户数据变更（不提交事务）
+
+    序号通过递增users.change_seq分配，该行的行锁持有到事务提交，
+    因此同一用户的变更按提交顺序获得递增序号，客户端按序号拉取不会漏掉并发事务的变更。
+    ORM写入由会话事件自动记录，只有绕过ORM的批量写入需要显式调用。
+
+    Args:
+        user_id: 用户ID
+        entity: 实体类型（favorite、pantry、shopping_list、shopping_list_item、preference）
+        entity_ids: 实体主键
+        op: upsert或delete
+        connection: 数据库连接，默认使用当前会话的连接
+    """
+    entity_ids = list(dict.fromkeys(entity_ids))
+    if not entity_ids:
+        return
+    connection = connection or db.session.connection()
+
+    users = User.__table__
+    last_seq = connection.execute(
+        users.update().where(users.c.id == user_id).values(
+            change_seq=users.c.change_seq + len(entity_ids)
+        ).returning(users.c.change_seq)
+    ).scalar()
+    if last_seq is None:
+        return
+
+    first_seq = last_seq - len(entity_ids) + 1
+    now = datetime.utcnow()
+    connection.execute(UserChange.__table__.insert(), [{
+        'user_id': user_id,
+        'seq': first_seq + offset,
+        'entity': entity,
+        'entity_id': entity_id,
+        'op': op,
+        'created_at': now
+    } for offset, entity_id in enumerate(entity_ids)])
+
+def _describe(obj):
+    """返回(user_id, 实体类型, 实体主键)，不需要记录的对象返回None；购物清单项目的user_id为None，由调用方补全"""
+    if isinstance(obj, FavoriteRecipe):
+        return obj.user_id, 'favorite', obj.recipe_id
+    if isinstance(obj, UserIngredient):
+        return obj.user_id, 'pantry', obj.ingredient_id
+    if isinstance(obj, UserPreference):
+        return obj.user_id, 'preference', obj.id
+    if isinstance(obj, ShoppingList):
+        return obj.user_id, 'shopping_list', obj.id
+    if isinstance(obj, ShoppingListItem):
+        return None, 'shopping_list_item', obj.id
+    return None
+
+@event.listens_for(Session, 'after_flush')
+def _record_flushed_changes(session, flush_context):
+    """ORM写入（新增、修改、删除）在同一事务内自动记录变更"""
+    pending: Dict[tuple, List[int]] = {}
+    items = []
+    for obj, op in chain(
+        ((obj, 'upsert') for obj in session.new),
+        ((obj, 'upsert') for obj in session.dirty if session.is_modified(obj, include_collections=False)),
+        ((obj, 'delete') for obj in session.deleted)
+    ):
+        described = _describe(obj)
+        if described is None:
+            continue
+        user_id, entity, entity_id = described
+        if entity == 'shopping_list_item':
+            items.append((obj.shopping_list_id, entity_id, op))
+        elif user_id is not None:
+            pending.setdefault((user_id, entity, op), []).append(entity_id)
+
+    connection = session.connection()
+    if items:
+        owners = dict(connection.execute(
+            db.select(ShoppingList.id, ShoppingList.user_id).where(
+                ShoppingList.id.in_({list_id for list_id, _, _ in items})
+            )
+        ).all())
+        for list_id, item_id, op in items:
+            if list_id in owners:
+                pending.setdefault((owners[list_id], 'shopping_list_item', op), []).append(item_id)
+
+    for (user_id, entity, op), entity_ids in pending.items():
+        record_changes(user_id, entity, entity_ids, op, connection=connection)
+
+def _load_favorites(user_id, ids):
+    rows = db.session.query(FavoriteRecipe.id, FavoriteRecipe.recipe_id, FavoriteRecipe.created_at).filter(
+        FavoriteRecipe.user_id == user_id, FavoriteRecipe.recipe_id.in_(ids)
+    ).all()
+    return {recipe_id: {'id': favorite_id, 'recipe_id': recipe_id, 'created_at': created_at}
+            for favorite_id, recipe_id, created_at in rows}
+
+def _load_pantry(user_id, ids):
+    rows = UserIngredient.query.options(db.joinedload(UserIngredient.ingredient)).filter(
+        UserIngredient.user_id == user_id, UserIngredient.ingredient_id.in_(ids)
+    ).all()
+    return {row.ingredient_id: row.to_dict() for row in rows}
+
+def _load_preferences(user_id, ids):
+    rows = UserPreference.query.filter(UserPreference.user_id == user_id, UserPreference.id.in_(ids)).all()
+    return {row.id: row.to_dict() for row in rows}
+
+def _load_shopping_lists(user_id, ids):
+    rows = ShoppingList.query.filter(ShoppingList.user_id == user_id, ShoppingList.id.in_(ids)).all()
+    return {row.id: row.to_dict(include=()) for row in rows}
+
+def _load_shopping_list_items(user_id, ids):
+    rows = ShoppingListItem.query.join(ShoppingList).options(
+        db.joinedload(ShoppingListItem.ingredient)
+    ).filter(ShoppingList.user_id == user_id, ShoppingListItem.id.in_(ids)).all()
+    return {row.id: row.to_dict() for row in rows}
+
+# 各实体类型按主键批量读取当前状态
+_LOADERS = {
+    'favorite': _load_favorites,
+    'pantry': _load_pantry,
+    'preference': _load_preferences,
+    'shopping_list': _load_shopping_lists,
+    'shopping_list_item': _load_shopping_list_items
+}
+
+def get_changes(user_id: int, since: int, limit: int = MAX_CHANGES_PER_PAGE) -> Dict:
+    """
+    读取序号大于since的变更
+
+    同一实体的多次变更合并为最后一次，upsert附带实体的当前状态（每种实体一次查询），
+    已不存在的实体按delete返回。删除购物清单时不单独记录其中项目的删除，客户端应一并移除。
+
+    Returns:
+        dict: changes为[{seq, entity, id, op, data}, ...]，next_since为下次请求的since，
+            has_more表示还有未返回的变更
+    """
+    rows = db.session.query(UserChange.seq, UserChange.entity, UserChange.entity_id, UserChange.op).filter(
+        UserChange.user_id == user_id,
+        UserChange.seq > since
+    ).order_by(UserChange.seq).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    latest = {}
+    for seq, entity, entity_id, op in rows:
+        latest.pop((entity, entity_id), None)
+        latest[(entity, entity_id)] = (seq, op)
+
+    upserts: Dict[str, List[int]] = {}
+    for (entity, entity_id), (_, op) in latest.items():
+        if op == 'upsert' and entity in _LOADERS:
+            upserts.setdefault(entity, []).append(entity_id)
+    current = {entity: _LOADERS[entity](user_id, ids) for entity, ids in upserts.items()}
+
+    changes = []
+    for (entity, entity_id), (seq, op) in latest.items():
+        data = current.get(entity, {}).get(entity_id) if op == 'upsert' else None
+        changes.append({
+            'seq': seq,
+            'entity': entity,
+            'id': entity_id,
+            'op': 'upsert' if data is not None else 'delete',
+            'data': data
+        })
+
+    return {
+        'changes': changes,
+        'next_since': rows[-1][0] if rows else since,
+        'has_more': has_more
+    }
@@ -2,6 +2,7 @@ import requests
 import json
 from flask import current_app
 from typing import Dict, List, Optional
+from app.services.metrics import metrics
 from app.services.recipe_query_service import RecipeQueryService
 
 class DeepSeekService:
@@ -44,7 +45,8 @@ class DeepSeekService:
             )
             
             # 调用DeepSeek API
-            response = DeepSeekService._call_deepseek_api(prompt)
+            with metrics.upstream('deepseek'):
+                response = DeepSeekService._call_deepseek_api(prompt)
             
             if response and 'choices' in response:
                 content = response['choices'][0]['message']['content']
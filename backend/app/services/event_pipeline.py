@@ -0,0 +1,149 @@
+import atexit
+import logging
+import os
+import threading
+from collections import deque
+from datetime import datetime
+from typing import Dict, Optional
+from app import db
+from app.models.event import RecipeEvent
+from app.services.popularity_service import PopularityService, EVENT_COUNTERS
+
+logger = logging.getLogger(__name__)
+
+class EventPipeline:
+    """
+    菜谱事件采集管道
+
+    - record()只把事件追加到内存中的有界环形缓冲区，不做任何IO
+    - 后台线程在缓冲区达到批量大小或超过刷新间隔时批量写入recipe_events表，
+      并把聚合后的计数交给PopularityService
+    - 缓冲区满时丢弃最旧的事件并计数，进程退出时自动排空缓冲区
+    """
+
+    def __init__(self, capacity=10000, batch_size=500, flush_interval=2.0):
+        self.capacity = capacity
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.enabled = True
+        self.dropped = 0
+        self.flushed = 0
+        self._app = None
+        self._buffer = deque(maxlen=capacity)
+        self._wakeup = threading.Event()
+        self._stopping = False
+        self._thread = None
+        self._pid = None
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._atexit = False
+
+    def init_app(self, app):
+        """从应用配置读取参数，并在进程退出时排空缓冲区"""
+        self._app = app
+        self.enabled = app.config.get('EVENT_PIPELINE_ENABLED', self.enabled)
+        self.batch_size = app.config.get('EVENT_FLUSH_BATCH_SIZE', self.batch_size)
+        self.flush_interval = app.config.get('EVENT_FLUSH_INTERVAL', self.flush_interval)
+        capacity = app.config.get('EVENT_BUFFER_CAPACITY', self.capacity)
+        if capacity != self.capacity:
+            self.capacity = capacity
+            self._buffer = deque(self._buffer, maxlen=capacity)
+        app.extensions['event_pipeline'] = self
+        # 单例可能被多次create_app()初始化（脚本、基准），退出钩子只注册一次
+        if not self._atexit:
+            atexit.register(self.shutdown)
+            self._atexit = True
+
+    def record(self, event_type: str, recipe_id: int, user_id: Optional[int] = None) -> None:
+        """
+        记录一个事件（只写内存，几乎无延迟）
+
+        Args:
+            event_type: 事件类型（view、plan）
+            recipe_id: 菜谱ID
+            user_id: 用户ID（可选）
+        """
+        if not self.enabled or self._app is None:
+            return
+
+        if len(self._buffer) == self.capacity:
+            self.dropped += 1
+        self._buffer.append((event_type, recipe_id, user_id, datetime.utcnow()))
+
+        self._ensure_worker()
+        if len(self._buffer) >= self.batch_size:
+            self._wakeup.set()
+
+    def _ensure_worker(self):
+        # fork之后子进程没有父进程的线程，需要按pid重新启动
+        if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+            return
+        with self._lock:
+            if self._thread is not None and self._pid == os.getpid() and self._thread.is_alive():
+                return
+            self._stopping = False
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='event-pipeline', daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping:
+            self._wakeup.wait(self.flush_interval)
+            self._wakeup.clear()
+            self.flush()
+
+    def flush(self) -> int:
+        """
+        把缓冲区中的事件批量写入数据库
+
+        Returns:
+            int: 写入的事件数量
+        """
+        with self._flush_lock:
+            total = 0
+            while self._buffer:
+                batch = []
+                while self._buffer and len(batch) < self.batch_size:
+                    batch.append(self._buffer.popleft())
+                total += self._write(batch)
+            return total
+
+    def _write(self, batch) -> int:
+        rows = []
+        counts: Dict[str, Dict[int, int]] = {}
+        for event_type, recipe_id, user_id, created_at in batch:
+            rows.append({
+                'event_type': event_type,
+                'recipe_id': recipe_id,
+                'user_id': user_id,
+                'created_at': created_at
+            })
+            if event_type in EVENT_COUNTERS:
+                per_recipe = counts.setdefault(event_type, {})
+                per_recipe[recipe_id] = per_recipe.get(recipe_id, 0) + 1
+
+        with self._app.app_context():
+            try:
+                db.session.execute(RecipeEvent.__table__.insert(), rows)
+                for event_type, per_recipe in counts.items():
+                    PopularityService.record(event_type, per_recipe)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                self.dropped += len(rows)
+                logger.error(f"事件批量写入失败，丢弃 {len(rows)} 个事件: {str(e)}")
+                return 0
+
+        self.flushed += len(rows)
+        return len(rows)
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """停止后台线程并排空缓冲区"""
+        self._stopping = True
+        self._wakeup.set()
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            self._thread.join(timeout)
+        if self._app is not None and self._buffer:
+            self.flush()
+
+event_pipeline = EventPipeline()
@@ -0,0 +1,155 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set, Tuple
+from app import db
+from app.models.favorite import FavoriteRecipe
+
+class _UserFavorites:
+    """单个用户的收藏缓存：按收藏时间倒序的列表 + ID集合"""
+    __slots__ = ('items', 'ids', 'loaded_at')
+
+    def __init__(self, items):
+        self.items = items  # [(recipe_id, favorite_id, created_at), ...]，最新的在前
+        self.ids = {item[0] for item in items}
+        self.loaded_at = time.monotonic()
+
+class FavoriteCache:
+    """
+    用户收藏菜谱ID的进程内缓存
+
+    - 每个用户的收藏列表首次访问时加载一次，之后成员判断为内存O(1)
+    - add/remove在事务提交后写穿更新，批量写入时直接失效
+    - 加载期间发生的写入会使本次加载结果作废（按用户的写入版本号判断），不会用旧数据覆盖
+    - 按用户LRU淘汰，同时限制缓存的收藏总条数以约束内存
+    - 多个worker进程之间不共享，依靠TTL限制其他进程写入造成的过期时间
+    """
+
+    def __init__(self, max_users=1000, max_entries=200000, ttl=60):
+        self.max_users = max_users
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._users = OrderedDict()
+        self._entry_count = 0
+        self._loading = {}  # user_id -> [进行中的加载数, 写入版本号]，只记录正在加载的用户
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.max_users = app.config.get('FAVORITE_CACHE_MAX_USERS', self.max_users)
+        self.max_entries = app.config.get('FAVORITE_CACHE_MAX_ENTRIES', self.max_entries)
+        self.ttl = app.config.get('FAVORITE_CACHE_TTL', self.ttl)
+        app.extensions['favorite_cache'] = self
+
+    def _load(self, user_id) -> _UserFavorites:
+        rows = db.session.query(
+            FavoriteRecipe.recipe_id, FavoriteRecipe.id, FavoriteRecipe.created_at
+        ).filter(FavoriteRecipe.user_id == user_id).order_by(
+            FavoriteRecipe.created_at.desc(), FavoriteRecipe.id.desc()
+        ).all()
+        return _UserFavorites([tuple(row) for row in rows])
+
+    def _evict(self):
+        while self._users and (len(self._users) > self.max_users or self._entry_count > self.max_entries):
+            _, entry = self._users.popitem(last=False)
+            self._entry_count -= len(entry.items)
+
+    def _get(self, user_id) -> _UserFavorites:
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and time.monotonic() - entry.loaded_at < self.ttl:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+                return entry
+            if entry is not None:
+                self._entry_count -= len(self._users.pop(user_id).items)
+            self.misses += 1
+            loading = self._loading.setdefault(user_id, [0, 0])
+            loading[0] += 1
+            version = loading[1]
+
+        try:
+            entry = self._load(user_id)
+        finally:
+            with self._lock:
+                loading[0] -= 1
+                if not loading[0]:
+                    del self._loading[user_id]
+
+        # 加载期间有写入时结果可能已过期，只返回给本次调用，不放入缓存；
+        # 收藏数量超过整体上限的用户不缓存，避免挤掉其他所有用户
+        with self._lock:
+            if loading[1] == version and len(entry.items) <= self.max_entries:
+                previous = self._users.pop(user_id, None)
+                if previous is not None:
+                    self._entry_count -= len(previous.items)
+                self._users[user_id] = entry
+                self._entry_count += len(entry.items)
+                self._evict()
+        return entry
+
+    def _bump_version(self, user_id=None) -> None:
+        """记录一次写入，使正在进行的加载结果作废（调用方持有锁）"""
+        if user_id is None:
+            states = self._loading.values()
+        else:
+            states = [self._loading[user_id]] if user_id in self._loading else []
+        for loading in states:
+            loading[1] += 1
+
+    def get_favorite_ids(self, user_id, recipe_ids: Iterable[int]) -> Set[int]:
+        """返回recipe_ids中已被该用户收藏的ID"""
+        ids = self._get(user_id).ids
+        return {recipe_id for recipe_id in recipe_ids if recipe_id in ids}
+
+    def page(self, user_id, page: int, per_page: int) -> Tuple[List[tuple], int]:
+        """
+        按收藏时间倒序分页
+
+        Returns:
+            tuple: ([(recipe_id, favorite_id, created_at), ...], 总数)
+        """
+        items = self._get(user_id).items
+        start = (page - 1) * per_page
+        return items[start:start + per_page], len(items)
+
+    def add(self, user_id, favorite: FavoriteRecipe) -> None:
+        """写穿：收藏提交后插入到已缓存列表的最前面"""
+        with self._lock:
+            self._bump_version(user_id)
+            entry = self._users.get(user_id)
+            if entry is None or favorite.recipe_id in entry.ids:
+                return
+            entry.items.insert(0, (favorite.recipe_id, favorite.id, favorite.created_at))
+            entry.ids.add(favorite.recipe_id)
+            self._entry_count += 1
+            self._evict()
+
+    def remove(self, user_id, recipe_ids: Iterable[int]) -> None:
+        """写穿：取消收藏提交后从已缓存列表中移除"""
+        recipe_ids = set(recipe_ids)
+        with self._lock:
+            self._bump_version(user_id)
+            entry = self._users.get(user_id)
+            if entry is None:
+                return
+            before = len(entry.items)
+            entry.items = [item for item in entry.items if item[0] not in recipe_ids]
+            entry.ids -= recipe_ids
+            self._entry_count -= before - len(entry.items)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """失效指定用户的缓存，不传user_id时清空全部"""
+        with self._lock:
+            self._bump_version(user_id)
+            if user_id is None:
+                self._users.clear()
+                self._entry_count = 0
+            else:
+                entry = self._users.pop(user_id, None)
+                if entry is not None:
+                    self._entry_count -= len(entry.items)
+
+favorite_cache = FavoriteCache()
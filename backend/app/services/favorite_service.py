@@ -0,0 +1,97 @@
+from typing import Iterable, List, Set
+from app import db
+from app.models.recipe import Recipe
+from app.models.favorite import FavoriteRecipe
+from app.services.bulk_sql import insert_ignore
+from app.services.favorite_cache import favorite_cache
+from app.services.recipe_summary_service import RecipeSummaryService
+from app.services.popularity_service import PopularityService
+from app.services.change_feed import record_changes
+
+# 单次批量操作允许的最大菜谱数量
+MAX_BATCH_SIZE = 200
+
+class FavoriteService:
+    """收藏批量操作服务"""
+
+    @staticmethod
+    def get_favorite_ids(user_id: int, recipe_ids: Iterable[int]) -> Set[int]:
+        """
+        判断多个菜谱是否已收藏（读取用户收藏缓存，未命中时一次查询加载）
+
+        Args:
+            user_id: 用户ID
+            recipe_ids: 待检查的菜谱ID
+
+        Returns:
+            Set[int]: 其中已收藏的菜谱ID
+        """
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return set()
+        return favorite_cache.get_favorite_ids(user_id, recipe_ids)
+
+    @staticmethod
+    def add_many(user_id: int, recipe_ids: Iterable[int]) -> dict:
+        """
+        批量收藏菜谱（不提交事务）
+
+        Args:
+            user_id: 用户ID
+            recipe_ids: 菜谱ID
+
+        Returns:
+            dict: added为新收藏的菜谱ID，existing为已收藏的，not_found为不存在的菜谱
+        """
+        recipe_ids = set(recipe_ids)
+        valid_ids = {row[0] for row in db.session.query(Recipe.id).filter(Recipe.id.in_(recipe_ids)).all()}
+
+        # 是否已收藏以数据库为准（缓存可能落后于其他进程的写入），
+        # 只有本次实际插入的记录计入收藏数、热度和变更记录
+        inserted = insert_ignore(
+            FavoriteRecipe,
+            [{'user_id': user_id, 'recipe_id': recipe_id} for recipe_id in sorted(valid_ids)],
+            index_elements=['user_id', 'recipe_id']
+        )
+        added_ids = sorted(recipe_id for _, recipe_id in inserted)
+        existing_ids = valid_ids - set(added_ids)
+        RecipeSummaryService.refresh_favorite_counts(added_ids)
+        PopularityService.record('favorite', {recipe_id: 1 for recipe_id in added_ids})
+        record_changes(user_id, 'favorite', added_ids)
+
+        return {
+            'added': added_ids,
+            'existing': sorted(existing_ids),
+            'not_found': sorted(recipe_ids - valid_ids)
+        }
+
+    @staticmethod
+    def remove_many(user_id: int, recipe_ids: Iterable[int]) -> List[int]:
+        """
+        批量取消收藏（不提交事务）
+
+        Args:
+            user_id: 用户ID
+            recipe_ids: 菜谱ID
+
+        Returns:
+            List[int]: 实际被取消收藏的菜谱ID
+        """
+        recipe_ids = set(recipe_ids)
+        if not recipe_ids:
+            return []
+
+        # 删除以数据库为准，不依赖可能过期的缓存
+        removed_ids = sorted(row[0] for row in db.session.query(FavoriteRecipe.recipe_id).filter(
+            FavoriteRecipe.user_id == user_id,
+            FavoriteRecipe.recipe_id.in_(recipe_ids)
+        ).all())
+        if removed_ids:
+            FavoriteRecipe.query.filter(
+                FavoriteRecipe.user_id == user_id,
+                FavoriteRecipe.recipe_id.in_(removed_ids)
+            ).delete(synchronize_session=False)
+            RecipeSummaryService.refresh_favorite_counts(removed_ids)
+            PopularityService.record('favorite', {recipe_id: -1 for recipe_id in removed_ids})
+            record_changes(user_id, 'favorite', removed_ids, 'delete')
+        return removed_ids
@@ -0,0 +1,237 @@
+import atexit
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Tuple
+from flask import Response, g, request
+from app.json_provider import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+# 延迟（秒）和响应大小（字节）直方图的桶上界，与Prometheus客户端的默认桶一致
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+UPSTREAM_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+# 指标名 -> (类型, 说明, 直方图桶)
+METRICS = {
+    'easycook_http_requests_total': ('counter', '请求数', None),
+    'easycook_http_request_duration_seconds': ('histogram', '请求处理耗时', LATENCY_BUCKETS),
+    'easycook_http_response_size_bytes': ('histogram', '响应体大小', SIZE_BUCKETS),
+    'easycook_db_duration_seconds': ('histogram', '每个请求的数据库耗时', LATENCY_BUCKETS),
+    'easycook_db_queries_total': ('counter', 'SQL语句数', None),
+    'easycook_upstream_duration_seconds': ('histogram', '上游API调用耗时', UPSTREAM_BUCKETS),
+    'easycook_upstream_errors_total': ('counter', '上游API调用失败次数', None),
+    'easycook_cache_hits_total': ('counter', '进程内缓存命中次数', None),
+    'easycook_cache_misses_total': ('counter', '进程内缓存未命中次数', None),
+    'easycook_cache_hit_ratio': ('gauge', '进程内缓存命中率（所有进程合计）', None),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+def _format_labels(labels: Labels) -> str:
+    if not labels:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(labels, escaped)) + '}'
+
+class Metrics:
+    """
+    Prometheus文本格式的应用指标
+
+    - 每个进程在内存中累加计数器和直方图，定期（以及/metrics请求时、进程退出时）整体写入
+      METRICS_DIR下以进程号命名的文件，多个工作进程共享同一目录
+    - /metrics读取目录中所有进程的文件求和后输出，不依赖prometheus_client或外部服务
+    - 只有单调递增的计数器和直方图，已退出进程的文件继续计入总数；部署时应清空该目录
+    - 进程内缓存的命中/未命中次数由register_cache()登记的对象在写入文件时读取
+    """
+
+    def __init__(self, directory=None, flush_interval=1.0):
+        self.enabled = True
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self._values: Dict[Tuple[str, str, Labels], float] = {}
+        self._caches: Dict[str, object] = {}
+        self._pid = os.getpid()
+        self._flushed_at = 0.0
+        self._lock = threading.Lock()
+        self._atexit = False
+
+    def init_app(self, app):
+        """从应用配置读取参数，注册请求钩子和/metrics"""
+        self.enabled = app.config.get('METRICS_ENABLED', self.enabled)
+        self.directory = app.config.get('METRICS_DIR') or self.directory or \
+            os.path.join(tempfile.gettempdir(), 'easycook-metrics')
+        self.flush_interval = app.config.get('METRICS_FLUSH_INTERVAL', self.flush_interval)
+        app.extensions['metrics'] = self
+        if not self.enabled:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        # after_request按注册的相反顺序执行，本钩子在请求级SQL统计（query_stats）清理之前读取其结果
+        app.before_request(self._start)
+        app.after_request(self._finish)
+        app.add_url_rule('/metrics', 'metrics', self.export)
+        if not self._atexit:
+            atexit.register(self.flush)
+            self._atexit = True
+
+    def register_cache(self, name: str, cache) -> None:
+        """登记带hits/misses计数的进程内缓存"""
+        self._caches[name] = cache
+
+    def _add(self, name: str, suffix: str, labels: Labels, value: float) -> None:
+        key = (name, suffix, labels)
+        self._values[key] = self._values.get(key, 0.0) + value
+
+    def _check_pid(self) -> None:
+        """fork出的子进程不继承父进程已累加的值"""
+        if os.getpid() != self._pid:
+            self._pid = os.getpid()
+            self._values = {}
+            self._flushed_at = 0.0
+
+    def inc(self, name: str, labels: Labels = (), value: float = 1.0) -> None:
+        """计数器加value"""
+        if not self.enabled:
+            return
+        with self._lock:
+            self._check_pid()
+            self._add(name, '', labels, value)
+
+    def observe(self, name: str, value: float, labels: Labels = ()) -> None:
+        """直方图记录一次观测值"""
+        if not self.enabled:
+            return
+        buckets = METRICS[name][2]
+        with self._lock:
+            self._check_pid()
+            for bound in buckets:
+                # 未落入的桶也写入0，保证每个序列都输出全部桶
+                self._add(name, '_bucket', labels + (('le', _format_value(bound)),), 1 if value <= bound else 0)
+            self._add(name, '_bucket', labels + (('le', '+Inf'),), 1)
+            self._add(name, '_sum', labels, value)
+            self._add(name, '_count', labels, 1)
+
+    @contextmanager
+    def upstream(self, service: str) -> Iterator[None]:
+        """记录上游API调用的耗时，抛出异常时计为失败"""
+        labels = (('service', service),)
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.inc('easycook_upstream_errors_total', labels)
+            raise
+        finally:
+            self.observe('easycook_upstream_duration_seconds', time.perf_counter() - start, labels)
+
+    @staticmethod
+    def _start():
+        g.metrics_started = time.perf_counter()
+
+    def _finish(self, response):
+        started = g.pop('metrics_started', None)
+        if started is None:
+            return response
+        from app.services.query_stats import QueryInstrumentation
+
+        route = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+        labels = (('blueprint', request.blueprint or ''), ('route', route), ('method', request.method))
+        self.inc('easycook_http_requests_total', labels + (('status', str(response.status_code)),))
+        self.observe('easycook_http_request_duration_seconds', time.perf_counter() - started, labels)
+        if response.content_length is not None:  # 流式响应大小未知
+            self.observe('easycook_http_response_size_bytes', response.content_length, labels)
+        stats = QueryInstrumentation.current()
+        if stats is not None:
+            self.observe('easycook_db_duration_seconds', stats.duration, labels)
+            self.inc('easycook_db_queries_total', labels, stats.count)
+
+        if time.monotonic() - self._flushed_at >= self.flush_interval:
+            self.flush()
+        return response
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def flush(self) -> None:
+        """把本进程的当前值整体写入文件（先写临时文件再替换，读取方不会看到写了一半的文件）"""
+        if not self.enabled or not self.directory:
+            return
+        with self._lock:
+            self._check_pid()
+            for cache_name, cache in self._caches.items():
+                labels = (('cache', cache_name),)
+                self._values[('easycook_cache_hits_total', '', labels)] = float(cache.hits)
+                self._values[('easycook_cache_misses_total', '', labels)] = float(cache.misses)
+            samples = [[name, suffix, list(labels), value] for (name, suffix, labels), value in self._values.items()]
+            self._flushed_at = time.monotonic()
+        path = self._path(self._pid)
+        try:
+            with open(f'{path}.tmp', 'wb') as f:
+                f.write(dumps(samples))
+            os.replace(f'{path}.tmp', path)
+        except OSError as e:
+            logger.warning(f"指标写入失败: {str(e)}")
+
+    def collect(self) -> Dict[Tuple[str, str, Labels], float]:
+        """读取目录中所有进程的文件并求和"""
+        totals = {}
+        for filename in os.listdir(self.directory):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.directory, filename), 'rb') as f:
+                    samples = loads(f.read())
+            except (OSError, ValueError):
+                continue  # 文件在读取前被删除
+            for name, suffix, labels, value in samples:
+                key = (name, suffix, tuple(tuple(pair) for pair in labels))
+                totals[key] = totals.get(key, 0.0) + value
+        return totals
+
+    @staticmethod
+    def render(totals: Dict[Tuple[str, str, Labels], float]) -> str:
+        """输出Prometheus文本格式"""
+        families: Dict[str, List[Tuple[str, Labels, float]]] = {}
+        for (name, suffix, labels), value in totals.items():
+            families.setdefault(name, []).append((suffix, labels, value))
+
+        # 命中率由合计后的命中和未命中次数计算
+        hits = {labels: value for _, labels, value in families.get('easycook_cache_hits_total', [])}
+        misses = {labels: value for _, labels, value in families.get('easycook_cache_misses_total', [])}
+        families['easycook_cache_hit_ratio'] = [
+            ('', labels, hits[labels] / (hits[labels] + misses.get(labels, 0.0)))
+            for labels in hits if hits[labels] + misses.get(labels, 0.0)
+        ]
+
+        def sort_key(sample):
+            suffix, labels, _ = sample
+            series = tuple(pair for pair in labels if pair[0] != 'le')
+            bound = next((float(value) for name, value in labels if name == 'le'), 0.0)
+            return series, suffix, bound
+
+        lines = []
+        for name, (kind, description, _) in METRICS.items():
+            samples = families.get(name)
+            if not samples:
+                continue
+            lines.append(f'# HELP {name} {description}')
+            lines.append(f'# TYPE {name} {kind}')
+            for suffix, labels, value in sorted(samples, key=sort_key):
+                lines.append(f'{name}{suffix}{_format_labels(labels)} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+    def export(self):
+        """/metrics"""
+        self.flush()
+        return Response(self.render(self.collect()), mimetype='text/plain; version=0.0.4')
+
+metrics = Metrics()
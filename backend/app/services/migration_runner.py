@@ -0,0 +1,198 @@
+"""
+版本化迁移执行器
+
+基于Flask-Migrate（Alembic）按顺序逐个升级待执行的迁移版本：
+  1. 执行该版本的upgrade()（DDL，由Alembic记录版本号）
+  2. 运行该版本模块中声明的BACKFILLS，分批提交并输出进度
+
+后续版本可能依赖前一版本回填的数据（例如回填完成后再加NOT NULL约束），因此回填在进入下一个版本前完成。
+dry-run只输出每个版本将执行的SQL和回填的行数、耗时预估，不修改数据库。
+
+引入迁移之前用db.create_all()建立的数据库没有版本号，按表和列判断对应的版本后先标记再升级。
+"""
+
+from typing import Callable, Dict, List, Optional, Set
+
+from alembic.runtime.migration import MigrationContext
+from alembic.script import Script, ScriptDirectory
+from flask import current_app
+from flask_migrate import stamp, upgrade
+
+from app import db
+
+# 基线版本（migrations/versions/0e94ecbc14e5_baseline_schema.py）及其表结构：表名 -> 列名
+BASELINE_REVISION = '0e94ecbc14e5'
+BASELINE_SCHEMA = {
+    'ingredients': {'id', 'name', 'unit', 'category', 'image_url'},
+    'recipes': {'id', 'name', 'description', 'difficulty', 'cooking_time', 'servings', 'image_url',
+                'category', 'created_at', 'updated_at'},
+    'steps': {'id', 'recipe_id', 'step_number', 'description', 'image_url'},
+    'recipe_ingredients': {'recipe_id', 'ingredient_id', 'amount', 'note'},
+    'users': {'id', 'username', 'email', 'password_hash', 'created_at', 'google_id'},
+    'favorite_recipes': {'id', 'user_id', 'recipe_id', 'created_at'},
+    'user_ingredients': {'user_id', 'ingredient_id', 'amount', 'expiry_date'},
+    'shopping_lists': {'id', 'user_id', 'name', 'created_at'},
+    'shopping_list_items': {'id', 'shopping_list_id', 'ingredient_id', 'amount', 'is_purchased'},
+    'user_preferences': {'id', 'user_id', 'preference_type', 'value'},
+}
+
+# 表和列与当前模型一致的版本；之后的版本只增删索引（IF [NOT] EXISTS，可重复执行）。
+# 新增修改表结构的版本时需同步更新
+MODELS_REVISION = '7c2d5e8a41b3'
+
+class MigrationRunner:
+    """版本化迁移执行器（需在应用上下文中使用）"""
+
+    def __init__(self, batch_size: Optional[int] = None, pause: Optional[float] = None,
+                 progress: Callable[[str], None] = print):
+        """
+        Args:
+            batch_size: 覆盖各回填声明的批大小
+            pause: 覆盖各回填声明的批间暂停秒数
+            progress: 进度输出函数
+        """
+        self.batch_size = batch_size
+        self.pause = pause
+        self.progress = progress
+
+    @staticmethod
+    def _script_directory() -> ScriptDirectory:
+        config = current_app.extensions['migrate'].migrate.get_config()
+        return ScriptDirectory.from_config(config)
+
+    @staticmethod
+    def current_revision() -> Optional[str]:
+        """数据库当前的迁移版本，未纳入迁移管理时返回None"""
+        with db.engine.connect() as connection:
+            return MigrationContext.configure(connection).get_current_revision()
+
+    @staticmethod
+    def _schema() -> Dict[str, Set[str]]:
+        """数据库中的表名 -> 列名（不含alembic_version）"""
+        inspector = db.inspect(db.engine)
+        return {
+            table: {column['name'] for column in inspector.get_columns(table)}
+            for table in inspector.get_table_names() if table != 'alembic_version'
+        }
+
+    @staticmethod
+    def _describe_difference(schema: Dict[str, Set[str]], expected: Dict[str, Set[str]], limit: int = 10) -> str:
+        missing = [table for table in expected if table not in schema]
+        missing += [f'{table}.{column}' for table in expected if table in schema
+                    for column in sorted(expected[table] - schema[table])]
+        extra = [table for table in schema if table not in expected]
+        extra += [f'{table}.{column}' for table in schema if table in expected
+                  for column in sorted(schema[table] - expected[table])]
+        parts = []
+        if missing:
+            parts.append('缺少 ' + ', '.join(missing[:limit]) + (' ...' if len(missing) > limit else ''))
+        if extra:
+            parts.append('多出 ' + ', '.join(extra[:limit]) + (' ...' if len(extra) > limit else ''))
+        return '；'.join(parts)
+
+    @classmethod
+    def detect_revision(cls) -> Optional[str]:
+        """
+        按表和列判断未纳入迁移管理的数据库对应的版本
+
+        Returns:
+            str: 与基线一致时为基线版本，与当前模型一致时为MODELS_REVISION；空库返回None
+
+        Raises:
+            RuntimeError: 表结构与两者都不一致（例如在旧库上执行过create_all，只补建了新表），无法确定版本
+        """
+        schema = cls._schema()
+        if not schema:
+            return None
+        if schema == BASELINE_SCHEMA:
+            return BASELINE_REVISION
+        models = {table.name: set(table.columns.keys()) for table in db.metadata.sorted_tables}
+        if schema == models:
+            return MODELS_REVISION
+        raise RuntimeError(
+            '数据库未纳入迁移管理，表结构与基线版本和当前模型都不一致，无法确定迁移版本。'
+            f'与基线相比：{cls._describe_difference(schema, BASELINE_SCHEMA)}。'
+            f'与当前模型相比：{cls._describe_difference(schema, models)}'
+        )
+
+    def stamp_existing(self, dry_run: bool = False) -> Optional[str]:
+        """
+        未纳入迁移管理的已有数据库：判断对应的版本并标记（dry-run时只判断）
+
+        Returns:
+            str: 标记的版本；数据库已有版本号或为空库时返回None
+        """
+        if self.current_revision() is not None:
+            return None
+        revision = self.detect_revision()
+        if revision is not None:
+            self.progress(f'ℹ️  数据库未纳入迁移管理，表结构对应版本 {revision}，先标记为该版本')
+            if not dry_run:
+                stamp(revision=revision)
+        return revision
+
+    def pending(self, target: str = 'head', start: Optional[str] = None) -> List[Script]:
+        """按执行顺序返回start（默认为当前版本）到target之间待执行的版本"""
+        script = self._script_directory()
+        current = start or self.current_revision() or 'base'
+        return list(reversed(list(script.iterate_revisions(target, current))))
+
+    def backfills(self, revision: str) -> list:
+        """返回指定版本声明的回填"""
+        return list(getattr(self._script_directory().get_revision(revision).module, 'BACKFILLS', ()))
+
+    def run_backfills(self, revision: str) -> int:
+        """
+        运行指定版本声明的回填（可用于中断后单独重跑）
+
+        Returns:
+            int: 更新的总行数
+        """
+        total = 0
+        for backfill in self.backfills(revision):
+            self.progress(f'🔄 回填 {backfill!r}')
+            result = backfill.run(db.engine, self.progress, self.batch_size, self.pause)
+            self.progress(f'✅ {backfill.table}: 更新 {result.rows} 行，{result.batches} 批，'
+                          f'{result.elapsed:.1f}s')
+            total += result.rows
+        return total
+
+    def run(self, target: str = 'head', dry_run: bool = False, start: Optional[str] = None) -> List[str]:
+        """
+        升级到target
+
+        Args:
+            target: 目标版本
+            dry_run: 只输出SQL和回填预估
+            start: 视为数据库当前所在的版本（dry-run时用于尚未标记版本的数据库）
+
+        Returns:
+            List[str]: 已执行（或dry-run时将执行）的版本号
+        """
+        previous = start or self.current_revision()
+        revisions = self.pending(target, previous)
+        if not revisions:
+            self.progress(f'ℹ️  已是最新版本 {previous}')
+            return []
+
+        for revision in revisions:
+            self.progress(f"\n📦 {revision.revision}: {revision.doc}")
+            if dry_run:
+                self._explain(revision, previous)
+            else:
+                upgrade(revision=revision.revision)
+                self.run_backfills(revision.revision)
+            previous = revision.revision
+        return [revision.revision for revision in revisions]
+
+    def _explain(self, revision: Script, previous: Optional[str]) -> None:
+        """输出版本的SQL（Alembic离线模式）和回填预估"""
+        upgrade(revision=f'{previous}:{revision.revision}' if previous else revision.revision, sql=True)
+        for backfill in self.backfills(revision.revision):
+            estimate = backfill.estimate(db.engine, self.batch_size, self.pause)
+            if estimate is None:
+                self.progress(f'📊 回填 {backfill!r}: 表由本版本创建，无法预估')
+                continue
+            note = '' if estimate.sampled else '（新列或新表尚未创建，按读取计时，未含写入开销）'
+            self.progress(f'📊 回填 {backfill!r}: 约 {estimate.rows} 行，{estimate.batches} 批，'
+                          f'预计 {estimate.seconds:.1f}s{note}')
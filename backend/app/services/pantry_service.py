@@ -0,0 +1,277 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import date
+from typing import Dict, List, Optional
+from sqlalchemy import or_
+from app import db
+from app.models.recipe import RecipeSummary
+from app.models.ingredient import Ingredient
+from app.models.user import UserIngredient
+from app.services.bulk_sql import upsert
+from app.services.change_feed import record_changes
+from app.services.recommendation_service import recommender
+from app.services.similarity_service import np
+
+# 库存中未临期（或没有过期日期）的食材权重，远小于临期食材
+PANTRY_BASE_WEIGHT = 0.1
+
+# 每个用户缓存的建议数量，请求的limit不超过该值时直接切片
+MAX_CACHED_SUGGESTIONS = 50
+
+# 单次同步允许的最大库存条目数
+MAX_SYNC_ITEMS = 500
+
+class PantryService:
+    """用户食材库存批量同步服务"""
+
+    @staticmethod
+    def _resolve_ingredients(items: List[Dict]) -> Dict[int, int]:
+        """
+        一次查询解析条目引用的食材，按名称找不到的食材直接创建（与单条添加接口一致）
+
+        Returns:
+            Dict[int, int]: {条目下标: 食材ID}，无法解析的条目不在结果中
+        """
+        ids = {item['ingredient_id'] for item in items if item.get('ingredient_id') is not None}
+        names = {item['ingredient_name'] for item in items if item.get('ingredient_name')}
+        conditions = []
+        if ids:
+            conditions.append(Ingredient.id.in_(ids))
+        if names:
+            conditions.append(Ingredient.name.in_(names))
+        found = db.session.query(Ingredient.id, Ingredient.name).filter(
+            or_(*conditions)
+        ).order_by(Ingredient.id).all() if conditions else []
+
+        found_ids = {ingredient_id for ingredient_id, _ in found}
+        id_by_name = {}
+        for ingredient_id, name in found:
+            id_by_name.setdefault(name, ingredient_id)
+
+        created = {}
+        for item in items:
+            name = item.get('ingredient_name')
+            if item.get('ingredient_id') in found_ids or not name or name in id_by_name or name in created:
+                continue
+            created[name] = Ingredient(name=name, unit=item.get('unit'), category=item.get('category'))
+        if created:
+            db.session.add_all(created.values())
+            db.session.flush()  # 获取新食材的ID
+            id_by_name.update((name, ingredient.id) for name, ingredient in created.items())
+
+        resolved = {}
+        for index, item in enumerate(items):
+            if item.get('ingredient_id') in found_ids:
+                resolved[index] = item['ingredient_id']
+            elif item.get('ingredient_name') in id_by_name:
+                resolved[index] = id_by_name[item['ingredient_name']]
+        return resolved
+
+    @staticmethod
+    def sync(user_id: int, items: List[Dict], replace: bool = False) -> Dict:
+        """
+        批量同步用户库存（不提交事务）
+
+        Args:
+            user_id: 用户ID
+            items: 库存条目，包含ingredient_id或ingredient_name，可选amount、expiry_date（date或None），
+                未提供的字段保留原值
+            replace: 为True时删除不在items中的库存
+
+        Returns:
+            dict: 按食材ID列出added、updated、unchanged、removed，以及无法解析的not_found条目下标
+        """
+        resolved = PantryService._resolve_ingredients(items)
+        existing = {
+            ingredient_id: (amount, expiry_date)
+            for ingredient_id, amount, expiry_date in db.session.query(
+                UserIngredient.ingredient_id, UserIngredient.amount, UserIngredient.expiry_date
+            ).filter(UserIngredient.user_id == user_id).all()
+        }
+
+        # 同一食材出现多次时后面的条目覆盖前面的
+        desired = {}
+        for index, item in enumerate(items):
+            ingredient_id = resolved.get(index)
+            if ingredient_id is None:
+                continue
+            amount, expiry_date = desired.get(ingredient_id) or existing.get(ingredient_id) or (None, None)
+            desired[ingredient_id] = (
+                item['amount'] if 'amount' in item else amount,
+                item['expiry_date'] if 'expiry_date' in item else expiry_date
+            )
+
+        added, updated, unchanged, rows = [], [], [], []
+        for ingredient_id, (amount, expiry_date) in desired.items():
+            if ingredient_id not in existing:
+                added.append(ingredient_id)
+            elif existing[ingredient_id] != (amount, expiry_date):
+                updated.append(ingredient_id)
+            else:
+                unchanged.append(ingredient_id)
+                continue
+            rows.append({
+                'user_id': user_id, 'ingredient_id': ingredient_id,
+                'amount': amount, 'expiry_date': expiry_date
+            })
+        upsert(UserIngredient, rows, ['user_id', 'ingredient_id'], ['amount', 'expiry_date'])
+        record_changes(user_id, 'pantry', [row['ingredient_id'] for row in rows])
+
+        removed = sorted(set(existing) - set(desired)) if replace else []
+        if removed:
+            UserIngredient.query.filter(
+                UserIngredient.user_id == user_id,
+                UserIngredient.ingredient_id.in_(removed)
+            ).delete(synchronize_session=False)
+            record_changes(user_id, 'pantry', removed, 'delete')
+
+        return {
+            'added': sorted(added),
+            'updated': sorted(updated),
+            'unchanged': sorted(unchanged),
+            'removed': removed,
+            'not_found': [index for index in range(len(items)) if index not in resolved]
+        }
+
+class _PantrySuggestions:
+    """单个用户的库存建议缓存"""
+    __slots__ = ('day', 'catalog_version', 'loaded_at', 'items')
+
+    def __init__(self, day, catalog_version, items):
+        self.day = day
+        self.catalog_version = catalog_version
+        self.loaded_at = time.monotonic()
+        self.items = items  # [(recipe_id, 得分, [临期食材名称], 缺少的食材数), ...]
+
+class PantrySuggester:
+    """
+    按库存临期程度推荐菜谱
+
+    - 一次查询读取用户库存，按剩余天数为食材计算权重（当天过期为1，越晚越小，已过期的不计）
+    - 菜谱得分为共享菜谱矩阵快照中0/1食材矩阵与权重向量的乘积
+    - 结果按用户缓存到库存变化、日期变化或矩阵快照重新加载为止
+    """
+
+    def __init__(self, horizon_days=3, max_users=1000, ttl=300):
+        self.horizon_days = horizon_days
+        self.max_users = max_users
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._users = OrderedDict()
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        """从应用配置读取参数"""
+        self.horizon_days = app.config.get('PANTRY_EXPIRY_HORIZON_DAYS', self.horizon_days)
+        self.max_users = app.config.get('PANTRY_CACHE_MAX_USERS', self.max_users)
+        self.ttl = app.config.get('PANTRY_CACHE_TTL', self.ttl)
+        app.extensions['pantry_suggester'] = self
+
+    def _compute(self, user_id, catalog, today) -> List[tuple]:
+        pantry = db.session.query(UserIngredient.ingredient_id, UserIngredient.expiry_date).filter(
+            UserIngredient.user_id == user_id
+        ).all()
+        cols, ingredient_ids = catalog.matrix.columns_for(ingredient_id for ingredient_id, _ in pantry)
+        if not len(cols):
+            return []
+
+        expiry_by_id = dict(pantry)
+        weights = np.zeros(len(catalog.matrix.ingredient_ids), dtype=np.float32)
+        in_pantry = np.zeros(len(catalog.matrix.ingredient_ids), dtype=np.float32)
+        expiring = np.zeros(len(catalog.matrix.ingredient_ids), dtype=bool)
+        for col, ingredient_id in zip(cols, ingredient_ids):
+            expiry_date = expiry_by_id[int(ingredient_id)]
+            days_left = (expiry_date - today).days if expiry_date else None
+            if days_left is not None and days_left < 0:
+                continue
+            in_pantry[col] = 1
+            if days_left is not None and days_left <= self.horizon_days:
+                weights[col] = 1 / (1 + days_left)
+                expiring[col] = True
+            else:
+                weights[col] = PANTRY_BASE_WEIGHT
+
+        binary = catalog.matrix.binary
+        scores = binary @ weights
+        candidates = np.flatnonzero(scores > 0)
+        if not len(candidates):
+            return []
+
+        count = min(MAX_CACHED_SUGGESTIONS, len(candidates))
+        top = candidates[np.argpartition(-scores[candidates], count - 1)[:count]]
+        missing = binary[top].getnnz(axis=1) - (binary[top] @ in_pantry).astype(np.int64)
+        # 得分相同时优先缺少食材更少的菜谱
+        top_order = np.lexsort((missing, -scores[top]))
+
+        items = []
+        for index in top_order:
+            row = top[index]
+            row_cols = binary.indices[binary.indptr[row]:binary.indptr[row + 1]]
+            items.append((
+                int(catalog.matrix.recipe_ids[row]),
+                float(scores[row]),
+                [catalog.ingredient_names[col] for col in row_cols if expiring[col]],
+                int(missing[index])
+            ))
+        return items
+
+    def suggest(self, user_id: int, limit: int = 10) -> List[Dict]:
+        """
+        按库存临期程度推荐菜谱
+
+        Args:
+            user_id: 用户ID
+            limit: 返回数量（不超过MAX_CACHED_SUGGESTIONS）
+
+        Returns:
+            List[Dict]: 菜谱摘要，附带score、expiring_ingredients和missing_count
+        """
+        catalog = recommender.get_catalog()
+        today = date.today()
+        with self._lock:
+            entry = self._users.get(user_id)
+            if entry is not None and (entry.day != today or entry.catalog_version != catalog.version
+                                      or time.monotonic() - entry.loaded_at >= self.ttl):
+                entry = None
+            if entry is not None:
+                self._users.move_to_end(user_id)
+                self.hits += 1
+            else:
+                self.misses += 1
+
+        if entry is None:
+            entry = _PantrySuggestions(today, catalog.version, self._compute(user_id, catalog, today))
+            with self._lock:
+                self._users[user_id] = entry
+                self._users.move_to_end(user_id)
+                while len(self._users) > self.max_users:
+                    self._users.popitem(last=False)
+
+        items = entry.items[:limit]
+        summaries = {summary.recipe_id: summary for summary in RecipeSummary.query.filter(
+            RecipeSummary.recipe_id.in_([item[0] for item in items])
+        ).all()} if items else {}
+
+        results = []
+        for recipe_id, score, expiring_names, missing_count in items:
+            summary = summaries.get(recipe_id)
+            if summary is None:
+                continue
+            data = summary.to_dict()
+            data['score'] = round(score, 4)
+            data['expiring_ingredients'] = expiring_names
+            data['missing_count'] = missing_count
+            results.append(data)
+        return results
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """库存变化后失效指定用户的建议，不传user_id时清空全部"""
+        with self._lock:
+            if user_id is None:
+                self._users.clear()
+            else:
+                self._users.pop(user_id, None)
+
+pantry_suggester = PantrySuggester()
@@ -0,0 +1,139 @@
+from datetime import datetime
+from typing import Dict, List, Optional
+from sqlalchemy import bindparam, case, func
+from app import db
+from app.models.recipe import Recipe
+from app.models.favorite import FavoriteRecipe
+
+# 各类事件对热度的权重
+EVENT_WEIGHTS = {
+    'favorite': 5.0,
+    'plan': 3.0,
+    'view': 1.0
+}
+
+# 事件类型对应的累计计数列
+EVENT_COUNTERS = {
+    'favorite': 'favorite_count',
+    'plan': 'plan_count',
+    'view': 'view_count'
+}
+
+# 热度半衰期（天）
+HALF_LIFE_DAYS = 7.0
+
+# 衰减后低于该值的热度分直接归零，避免长尾记录反复被更新
+MIN_SCORE = 1e-3
+
+class PopularityService:
+    """
+    菜谱热度服务
+
+    - 写入时增量更新累计计数和recent_activity（加权的新增活跃度）
+    - 定期批量计算：popularity_score = popularity_score * 衰减系数 + recent_activity
+    - 热门查询只需按带索引的popularity_score排序
+    """
+
+    @staticmethod
+    def record(event_type: str, recipe_counts: Dict[int, int]) -> None:
+        """
+        增量记录事件（不提交事务）
+
+        Args:
+            event_type: 事件类型（favorite、plan、view）
+            recipe_counts: {菜谱ID: 事件数}，取消收藏等撤销操作传负数，只减少累计计数
+        """
+        counter = EVENT_COUNTERS[event_type]
+        weight = EVENT_WEIGHTS[event_type]
+        params = [
+            {'recipe_id': recipe_id, 'delta': count, 'activity': weight * max(count, 0)}
+            for recipe_id, count in recipe_counts.items() if count
+        ]
+        if not params:
+            return
+
+        table = Recipe.__table__
+        stmt = table.update().where(table.c.id == bindparam('recipe_id')).values({
+            counter: table.c[counter] + bindparam('delta'),
+            'recent_activity': table.c.recent_activity + bindparam('activity'),
+            # 计数变化不属于菜谱内容修改，保持updated_at不变
+            'updated_at': table.c.updated_at
+        })
+        db.session.execute(stmt, params)
+
+    @staticmethod
+    def recompute_scores(now: Optional[datetime] = None, half_life_days: float = HALF_LIFE_DAYS) -> int:
+        """
+        批量计算时间衰减后的热度分，由定时任务调用
+
+        所有参与计算的记录共享同一个计算时间，因此衰减系数只需按上次计算时间算一次，
+        整个计算是一条UPDATE语句。
+
+        Args:
+            now: 计算时间，默认当前UTC时间
+            half_life_days: 半衰期（天）
+
+        Returns:
+            int: 更新的菜谱数量
+        """
+        now = now or datetime.utcnow()
+        last_run = db.session.query(func.max(Recipe.popularity_updated_at)).scalar()
+        if last_run is None:
+            factor = 1.0
+        else:
+            elapsed_days = max((now - last_run).total_seconds(), 0) / 86400
+            factor = 0.5 ** (elapsed_days / half_life_days)
+
+        new_score = Recipe.popularity_score * factor + Recipe.recent_activity
+        result = Recipe.query.filter(
+            (Recipe.popularity_score > 0) | (Recipe.recent_activity != 0)
+        ).update({
+            Recipe.popularity_score: case((new_score < MIN_SCORE, 0.0), else_=new_score),
+            Recipe.recent_activity: 0,
+            Recipe.popularity_updated_at: now,
+            Recipe.updated_at: Recipe.updated_at
+        }, synchronize_session=False)
+        db.session.commit()
+        return result
+
+    @staticmethod
+    def rebuild_counters() -> None:
+        """
+        按收藏表重建累计收藏数，并以收藏数作为初始热度（用于初始化或修复数据）
+        """
+        favorite_count = db.select(func.count(FavoriteRecipe.id)).where(
+            FavoriteRecipe.recipe_id == Recipe.id
+        ).scalar_subquery()
+        Recipe.query.update({
+            Recipe.favorite_count: favorite_count,
+            Recipe.updated_at: Recipe.updated_at
+        }, synchronize_session=False)
+        Recipe.query.update({
+            Recipe.popularity_score: Recipe.favorite_count * EVENT_WEIGHTS['favorite'],
+            Recipe.recent_activity: 0,
+            Recipe.popularity_updated_at: datetime.utcnow(),
+            Recipe.updated_at: Recipe.updated_at
+        }, synchronize_session=False)
+        db.session.commit()
+
+    @staticmethod
+    def extract_plan_recipe_ids(meal_plan_data: Dict) -> List[int]:
+        """
+        从菜谱规划结果中提取引用的菜谱ID
+
+        Args:
+            meal_plan_data: generate_meal_plan返回的data字段
+
+        Returns:
+            List[int]: 菜谱ID（可重复，每次出现计一次）
+        """
+        recipe_ids = []
+        if not isinstance(meal_plan_data, dict):
+            return recipe_ids
+        for day in meal_plan_data.get('meal_plan') or []:
+            if not isinstance(day, dict):
+                continue
+            for meal in day.get('meals') or []:
+                if isinstance(meal, dict) and isinstance(meal.get('recipe_id'), int):
+                    recipe_ids.append(meal['recipe_id'])
+        return recipe_ids
@@ -0,0 +1,161 @@
+import logging
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+logger = logging.getLogger(__name__)
+
+_IN_LIST = re.compile(r'\((?:\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*,)+\s*(?:\?|%\(\w+\)s|%s|:\w+)\s*\)')
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_SPACE = re.compile(r'\s+')
+_COLUMNS = re.compile(r'^SELECT (?:DISTINCT )?.+? FROM ', re.DOTALL)
+
+def statement_shape(statement: str) -> str:
+    """语句形状：IN列表合并为单个占位符，字面量替换为?，用于识别只有参数不同的重复语句"""
+    shape = _IN_LIST.sub('(?)', statement)
+    shape = _LITERAL.sub('?', shape)
+    return _SPACE.sub(' ', shape).strip()
+
+def abbreviate(shape: str, width: int = 200) -> str:
+    """日志中显示的语句：省略SELECT的列清单，保留表和条件"""
+    shape = _COLUMNS.sub('SELECT ... FROM ', shape, count=1)
+    return shape if len(shape) <= width else shape[:width - 3] + '...'
+
+class QueryStats:
+    """单个请求执行的SQL统计"""
+    __slots__ = ('count', 'duration', 'statements', 'started_at')
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0  # 秒
+        self.statements = Counter()  # 编译后的SQL -> 执行次数（同一语句的编译结果被缓存，计数开销很小）
+        self.started_at = time.perf_counter()
+
+    @property
+    def elapsed(self) -> float:
+        """请求开始至今的秒数"""
+        return time.perf_counter() - self.started_at
+
+    def repeated(self, threshold: int) -> List[Tuple[str, int]]:
+        """
+        执行次数达到threshold的语句形状（疑似N+1），按次数降序
+
+        Args:
+            threshold: 同一形状的最少执行次数
+        """
+        shapes = Counter()
+        for statement, count in self.statements.items():
+            shapes[statement_shape(statement)] += count
+        return [(shape, count) for shape, count in shapes.most_common() if count >= threshold]
+
+class QueryInstrumentation:
+    """
+    请求级SQL统计
+
+    - 通过Engine的cursor事件统计每个请求执行的语句数和数据库耗时，请求之外（后台线程、命令行）的语句不计入
+    - 调试模式（或QUERY_STATS_HEADERS=true）下在响应中加入Server-Timing和X-Query-Count头
+    - 语句数、数据库耗时或同一语句形状的重复次数超过阈值时记录警告日志
+    - record()收集期间完成的所有请求的统计，供测试检查查询预算
+    """
+
+    def __init__(self, max_queries=30, max_db_ms=500.0, repeat_threshold=5):
+        self.enabled = True
+        self.headers = None
+        self.max_queries = max_queries
+        self.max_db_ms = max_db_ms
+        self.repeat_threshold = repeat_threshold
+        self._recorders = []
+        self._lock = threading.Lock()
+
+    def init_app(self, app):
+        """从应用配置读取阈值并注册请求钩子"""
+        self.enabled = app.config.get('QUERY_STATS_ENABLED', self.enabled)
+        headers = app.config.get('QUERY_STATS_HEADERS')
+        if isinstance(headers, str):
+            headers = headers.lower() == 'true'
+        self.headers = headers  # None表示跟随app.debug（app.run(debug=True)在创建应用之后才设置）
+        self.max_queries = app.config.get('QUERY_LOG_MAX_QUERIES', self.max_queries)
+        self.max_db_ms = app.config.get('QUERY_LOG_MAX_DB_MS', self.max_db_ms)
+        self.repeat_threshold = app.config.get('QUERY_LOG_REPEAT_THRESHOLD', self.repeat_threshold)
+        app.extensions['query_instrumentation'] = self
+        if self.enabled:
+            app.before_request(self._start)
+            app.after_request(self._finish)
+
+    @staticmethod
+    def current() -> Optional[QueryStats]:
+        """当前请求的统计，不在请求中或未启用时返回None"""
+        return g.get('query_stats') if has_request_context() else None
+
+    @staticmethod
+    def _start():
+        g.query_stats = QueryStats()
+
+    def _finish(self, response):
+        stats = g.pop('query_stats', None)
+        if stats is None:
+            return response
+        elapsed = stats.elapsed
+        repeated = stats.repeated(self.repeat_threshold)
+
+        if current_app.debug if self.headers is None else self.headers:
+            response.headers['X-Query-Count'] = str(stats.count)
+            response.headers.add('Server-Timing', f'db;dur={stats.duration * 1000:.2f};desc="{stats.count} queries"')
+            response.headers.add('Server-Timing', f'app;dur={elapsed * 1000:.2f}')
+
+        if stats.count > self.max_queries or stats.duration * 1000 > self.max_db_ms or repeated:
+            message = (f'{request.method} {request.path} ({request.endpoint}): {stats.count} 条查询，'
+                       f'数据库耗时 {stats.duration * 1000:.1f}ms，总耗时 {elapsed * 1000:.1f}ms')
+            for shape, count in repeated[:3]:
+                message += f'\n  重复 {count} 次（疑似N+1）: {abbreviate(shape)}'
+            logger.warning(message)
+
+        if self._recorders:
+            with self._lock:
+                for records in self._recorders:
+                    records.append((request.method, request.path, request.endpoint, stats))
+        return response
+
+    @contextmanager
+    def record(self) -> Iterator[List[Tuple[str, str, Optional[str], QueryStats]]]:
+        """
+        收集期间完成的请求的统计
+
+        Yields:
+            List: [(方法, 路径, endpoint, QueryStats)]，请求完成时追加
+        """
+        records = []
+        with self._lock:
+            self._recorders.append(records)
+        try:
+            yield records
+        finally:
+            with self._lock:
+                self._recorders.remove(records)
+
+query_instrumentation = QueryInstrumentation()
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('query_started', []).append(time.perf_counter())
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info['query_started'].pop()
+    stats = QueryInstrumentation.current()
+    if stats is not None:
+        stats.count += 1
+        stats.duration += time.perf_counter() - started
+        stats.statements[statement] += 1
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(context):
+    """执行失败时after_cursor_execute不会触发，弹出对应的开始时间"""
+    if context.connection is not None and context.connection.info.get('query_started'):
+        context.connection.info['query_started'].pop()
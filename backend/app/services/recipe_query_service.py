@@ -1,12 +1,39 @@
 from typing import Dict, List, Optional
 from app import db
-from app.models.recipe import Recipe, Step
+from app.models.recipe import Recipe
 from app.models.ingredient import Ingredient, RecipeIngredient
+from app.services.catalog_snapshot import catalog_store
 from sqlalchemy import or_, and_
 
+# 过敏原对应的关键词（匹配菜谱名称、描述和食材名称）
+ALLERGY_KEYWORDS = {
+    'nuts': ['花生', '核桃', '杏仁', '腰果', '榛子', '坚果'],
+    'dairy': ['牛奶', '奶酪', '黄油', '酸奶', '奶油'],
+    'eggs': ['鸡蛋', '蛋', '蛋白', '蛋黄'],
+    'seafood': ['鱼', '虾', '蟹', '贝', '海鲜'],
+    'shellfish': ['虾', '蟹', '贝类', '扇贝', '生蚝'],
+    'soy': ['豆腐', '豆浆', '酱油', '豆瓣酱', '大豆'],
+    'wheat': ['面粉', '面条', '面包', '小麦'],
+    'sesame': ['芝麻', '香油', '芝麻酱']
+}
+
 class RecipeQueryService:
     """菜谱查询服务，为AI提供结构化的菜谱数据"""
     
+    @staticmethod
+    def _load_recipes(query) -> List:
+        """
+        查询只取菜谱ID，菜谱内容从目录快照读取（快照缺少时回退到数据库）
+        
+        Args:
+            query: 已设置过滤、排序和数量限制的Recipe查询
+            
+        Returns:
+            List: 按查询顺序排列的菜谱（RecipeRecord）
+        """
+        recipe_ids = [row[0] for row in query.with_entities(Recipe.id).all()]
+        return catalog_store.get_recipes(recipe_ids)
+    
     @staticmethod
     def search_recipes_by_criteria(
         dietary_preferences: List[str] = None,
@@ -57,7 +84,7 @@ class RecipeQueryService:
             query = query.filter(Recipe.category == category)
         
         # 获取菜谱
-        recipes = query.limit(limit).all()
+        recipes = RecipeQueryService._load_recipes(query.limit(limit))
         
         # 过滤过敏原
         if allergies:
@@ -93,7 +120,7 @@ class RecipeQueryService:
             RecipeIngredient.ingredient_id.in_(ingredient_ids)
         ).distinct().subquery()
         
-        recipes = Recipe.query.filter(Recipe.id.in_(recipe_ids)).limit(limit).all()
+        recipes = RecipeQueryService._load_recipes(Recipe.query.filter(Recipe.id.in_(recipe_ids)).limit(limit))
         
         return [RecipeQueryService._format_recipe_for_ai(recipe) for recipe in recipes]
     
@@ -114,8 +141,10 @@ class RecipeQueryService:
         if category:
             query = query.filter(Recipe.category == category)
         
-        # 按创建时间排序（可以后续改为按收藏数或评分排序）
-        recipes = query.order_by(Recipe.created_at.desc()).limit(limit).all()
+        # 按时间衰减后的热度分排序（由PopularityService维护，带索引）
+        recipes = RecipeQueryService._load_recipes(
+            query.order_by(Recipe.popularity_score.desc(), Recipe.id.desc()).limit(limit)
+        )
         
         return [RecipeQueryService._format_recipe_for_ai(recipe) for recipe in recipes]
     
@@ -173,7 +202,7 @@ class RecipeQueryService:
         if conditions:
             query = query.filter(or_(*conditions))
         
-        recipes = query.limit(limit).all()
+        recipes = RecipeQueryService._load_recipes(query.limit(limit))
         
         return [RecipeQueryService._format_recipe_for_ai(recipe) for recipe in recipes]
     
@@ -183,7 +212,7 @@ class RecipeQueryService:
         将菜谱格式化为AI友好的格式
         
         Args:
-            recipe: 菜谱对象
+            recipe: 菜谱对象（Recipe或目录快照中的RecipeRecord）
             
         Returns:
             Dict: 格式化后的菜谱数据
@@ -201,7 +230,7 @@ class RecipeQueryService:
         
         # 获取步骤信息
         steps = []
-        for step in recipe.steps.order_by(Step.step_number):
+        for step in sorted(recipe.steps, key=lambda step: step.step_number):
             steps.append({
                 'step_number': step.step_number,
                 'description': step.description
@@ -256,17 +285,6 @@ class RecipeQueryService:
         Returns:
             List[Recipe]: 过滤后的菜谱列表
         """
-        allergy_keywords = {
-            'nuts': ['花生', '核桃', '杏仁', '腰果', '榛子', '坚果'],
-            'dairy': ['牛奶', '奶酪', '黄油', '酸奶', '奶油'],
-            'eggs': ['鸡蛋', '蛋', '蛋白', '蛋黄'],
-            'seafood': ['鱼', '虾', '蟹', '贝', '海鲜'],
-            'shellfish': ['虾', '蟹', '贝类', '扇贝', '生蚝'],
-            'soy': ['豆腐', '豆浆', '酱油', '豆瓣酱', '大豆'],
-            'wheat': ['面粉', '面条', '面包', '小麦'],
-            'sesame': ['芝麻', '香油', '芝麻酱']
-        }
-        
         filtered_recipes = []
         
         for recipe in recipes:
@@ -274,7 +292,7 @@ class RecipeQueryService:
             
             # 检查菜谱名称和描述
             for allergy in allergies:
-                keywords = allergy_keywords.get(allergy, [allergy])
+                keywords = ALLERGY_KEYWORDS.get(allergy, [allergy])
                 for keyword in keywords:
                     if keyword in recipe.name or keyword in (recipe.description or ''):
                         has_allergen = True
@@ -287,7 +305,7 @@ class RecipeQueryService:
                 for ri in recipe.recipe_ingredients:
                     ingredient_name = ri.ingredient.name if ri.ingredient else ''
                     for allergy in allergies:
-                        keywords = allergy_keywords.get(allergy, [allergy])
+                        keywords = ALLERGY_KEYWORDS.get(allergy, [allergy])
                         for keyword in keywords:
                             if keyword in ingredient_name:
                                 has_allergen = True
@@ -0,0 +1,203 @@
+from typing import Dict, Iterable, List
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+from app import db
+from app.models.recipe import Recipe, Step, RecipeSummary
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.favorite import FavoriteRecipe
+
+# 摘要中复制的菜谱列；updated_at由修改菜谱接口显式设置，表示步骤或食材发生了变化
+_SUMMARY_COLUMNS = ('name', 'difficulty', 'cooking_time', 'image_url', 'category', 'created_at', 'updated_at')
+
+class RecipeSummaryService:
+    """
+    菜谱摘要投影维护服务，列表视图直接读取recipe_summaries表
+
+    菜谱、步骤、食材关联和食材分类的ORM写入由会话事件在提交前自动刷新摘要；
+    绕过ORM的批量写入需要显式调用refresh()或rebuild_all()。
+    """
+
+    @staticmethod
+    def refresh(recipe_ids: Iterable[int]) -> List[RecipeSummary]:
+        """
+        重新计算指定菜谱的摘要（不提交事务，由调用方统一commit）
+
+        Args:
+            recipe_ids: 需要刷新的菜谱ID
+
+        Returns:
+            List[RecipeSummary]: 刷新后的摘要对象
+        """
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return []
+
+        recipes = Recipe.query.filter(Recipe.id.in_(recipe_ids)).all()
+
+        # 每种统计一次分组查询，而不是逐个菜谱遍历关系
+        step_counts = dict(
+            db.session.query(Step.recipe_id, func.count(Step.id))
+            .filter(Step.recipe_id.in_(recipe_ids))
+            .group_by(Step.recipe_id)
+            .all()
+        )
+        favorite_counts = dict(
+            db.session.query(FavoriteRecipe.recipe_id, func.count(FavoriteRecipe.id))
+            .filter(FavoriteRecipe.recipe_id.in_(recipe_ids))
+            .group_by(FavoriteRecipe.recipe_id)
+            .all()
+        )
+        ingredient_counts: Dict[int, int] = {}
+        ingredient_categories: Dict[int, List[str]] = {}
+        rows = db.session.query(RecipeIngredient.recipe_id, Ingredient.category).join(
+            Ingredient, RecipeIngredient.ingredient_id == Ingredient.id
+        ).filter(RecipeIngredient.recipe_id.in_(recipe_ids)).all()
+        for recipe_id, ingredient_category in rows:
+            ingredient_counts[recipe_id] = ingredient_counts.get(recipe_id, 0) + 1
+            categories = ingredient_categories.setdefault(recipe_id, [])
+            if ingredient_category and ingredient_category not in categories:
+                categories.append(ingredient_category)
+
+        existing = {
+            summary.recipe_id: summary
+            for summary in RecipeSummary.query.filter(RecipeSummary.recipe_id.in_(recipe_ids)).all()
+        }
+
+        summaries = []
+        for recipe in recipes:
+            summary = existing.get(recipe.id)
+            if summary is None:
+                summary = RecipeSummary(recipe_id=recipe.id)
+                db.session.add(summary)
+
+            tags = [recipe.category] if recipe.category else []
+            tags.extend(c for c in ingredient_categories.get(recipe.id, []) if c not in tags)
+
+            summary.name = recipe.name
+            summary.difficulty = recipe.difficulty
+            summary.cooking_time = recipe.cooking_time
+            summary.image_url = recipe.image_url
+            summary.category = recipe.category
+            summary.created_at = recipe.created_at
+            summary.ingredient_count = ingredient_counts.get(recipe.id, 0)
+            summary.step_count = step_counts.get(recipe.id, 0)
+            summary.favorite_count = favorite_counts.get(recipe.id, 0)
+            summary.tags = ','.join(tags)[:255]
+            summaries.append(summary)
+
+        return summaries
+
+    @staticmethod
+    def rebuild_all(batch_size: int = 500) -> int:
+        """
+        全量重建摘要表，按批提交
+
+        Args:
+            batch_size: 每批处理的菜谱数量
+
+        Returns:
+            int: 处理的菜谱数量
+        """
+        # 先清除已删除菜谱遗留的摘要
+        RecipeSummary.query.filter(
+            ~RecipeSummary.recipe_id.in_(db.select(Recipe.id))
+        ).delete(synchronize_session=False)
+        db.session.commit()
+
+        total = 0
+        last_id = 0
+        while True:
+            ids = [row[0] for row in db.session.query(Recipe.id).filter(
+                Recipe.id > last_id
+            ).order_by(Recipe.id).limit(batch_size).all()]
+            if not ids:
+                break
+
+            RecipeSummaryService.refresh(ids)
+            db.session.commit()
+
+            total += len(ids)
+            last_id = ids[-1]
+
+        return total
+
+    @staticmethod
+    def adjust_favorite_count(recipe_id: int, delta: int) -> None:
+        """
+        增量更新摘要中的收藏数（不提交事务）
+
+        Args:
+            recipe_id: 菜谱ID
+            delta: 变化量，收藏为+1，取消收藏为-1
+        """
+        RecipeSummary.query.filter_by(recipe_id=recipe_id).update(
+            {RecipeSummary.favorite_count: RecipeSummary.favorite_count + delta},
+            synchronize_session=False
+        )
+
+    @staticmethod
+    def refresh_favorite_counts(recipe_ids: Iterable[int]) -> None:
+        """
+        按收藏表重新统计指定菜谱的收藏数，批量写入后使用（不提交事务）
+
+        Args:
+            recipe_ids: 菜谱ID
+        """
+        recipe_ids = list(set(recipe_ids))
+        if not recipe_ids:
+            return
+
+        favorite_count = db.select(func.count(FavoriteRecipe.id)).where(
+            FavoriteRecipe.recipe_id == RecipeSummary.recipe_id
+        ).scalar_subquery()
+        RecipeSummary.query.filter(RecipeSummary.recipe_id.in_(recipe_ids)).update(
+            {RecipeSummary.favorite_count: favorite_count},
+            synchronize_session=False
+        )
+
+def _changed(obj, keys) -> bool:
+    state = inspect(obj)
+    return any(state.attrs[key].history.has_changes() for key in keys)
+
+@event.listens_for(Session, 'after_flush')
+def _collect_summary_changes(session, flush_context):
+    """记录本次flush影响摘要的菜谱（食材分类变化时记录食材，提交前再查询使用它的菜谱）"""
+    recipe_ids = session.info.setdefault('summary_recipe_ids', set())
+    ingredient_ids = session.info.setdefault('summary_ingredient_ids', set())
+    for obj in session.new:
+        if isinstance(obj, Recipe):
+            recipe_ids.add(obj.id)
+        elif isinstance(obj, (Step, RecipeIngredient)):
+            recipe_ids.add(obj.recipe_id)
+    for obj in session.deleted:
+        # 删除的菜谱由summary关系级联删除摘要，这里只处理单独删除的步骤和食材关联
+        if isinstance(obj, (Step, RecipeIngredient)):
+            recipe_ids.add(obj.recipe_id)
+    for obj in session.dirty:
+        if isinstance(obj, Recipe) and _changed(obj, _SUMMARY_COLUMNS):
+            recipe_ids.add(obj.id)
+        elif isinstance(obj, RecipeIngredient) and _changed(obj, ('recipe_id', 'ingredient_id')):
+            # 关联移动到另一个菜谱时新旧菜谱都需要刷新
+            recipe_ids.add(obj.recipe_id)
+            recipe_ids.update(inspect(obj).attrs.recipe_id.history.deleted)
+        elif isinstance(obj, Ingredient) and _changed(obj, ('category',)):
+            ingredient_ids.add(obj.id)
+
+@event.listens_for(Session, 'before_commit')
+def _refresh_before_commit(session):
+    """提交前刷新受影响的摘要，摘要与源数据在同一事务中写入"""
+    session.flush()
+    recipe_ids = session.info.pop('summary_recipe_ids', set())
+    ingredient_ids = session.info.pop('summary_ingredient_ids', set())
+    if ingredient_ids:
+        recipe_ids.update(row[0] for row in session.query(RecipeIngredient.recipe_id).filter(
+            RecipeIngredient.ingredient_id.in_(ingredient_ids)
+        ).distinct())
+    recipe_ids.discard(None)
+    if recipe_ids:
+        RecipeSummaryService.refresh(recipe_ids)
+
+@event.listens_for(Session, 'after_rollback')
+def _discard_after_rollback(session):
+    session.info.pop('summary_recipe_ids', None)
+    session.info.pop('summary_ingredient_ids', None)
@@ -0,0 +1,260 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Tuple
+from app import db
+from app.models.recipe import Recipe, RecipeSummary
+from app.models.ingredient import Ingredient
+from app.models.favorite import FavoriteRecipe
+from app.models.user import UserPreference
+from app.services.recipe_query_service import ALLERGY_KEYWORDS
+from app.services.similarity_service import RecipeMatrix, np
+
+# 参与推荐的偏好类型
+ALLERGY_PREFERENCE = 'allergy'  # 值为ALLERGY_KEYWORDS中的过敏原或任意关键词，硬过滤
+DISLIKED_PREFERENCE = 'disliked_ingredient'  # 值为食材名称，降低包含该食材的菜谱得分
+CATEGORY_PREFERENCE = 'preferred_category'  # 值为菜谱分类，提高该分类菜谱的得分
+
+# 打分权重（画像向量已归一化，食材匹配得分在0~1之间）
+DISLIKE_WEIGHT = 0.5
+CATEGORY_BOOST = 0.15
+POPULARITY_WEIGHT = 0.1  # 热度先验，保证没有收藏的新用户也能得到推荐
+
+# 每个菜谱矩阵快照缓存的过敏原过滤掩码数量
+MAX_ALLERGEN_MASKS = 64
+
+class _Catalog:
+    """推荐用的菜谱矩阵快照，行与RecipeMatrix一致，附带分类、热度和名称"""
+
+    def __init__(self, version):
+        self.version = version
+        self.loaded_at = time.monotonic()
+        self.matrix = matrix = RecipeMatrix.load()
+        n_recipes = len(matrix.recipe_ids)
+
+        rows = db.session.query(Recipe.id, Recipe.name, Recipe.category, Recipe.popularity_score).all()
+        ids = np.fromiter((row[0] for row in rows), dtype=np.int64, count=len(rows))
+        positions = np.searchsorted(matrix.recipe_ids, ids)
+        found = (positions < n_recipes) & (matrix.recipe_ids[np.minimum(positions, max(n_recipes - 1, 0))] == ids) \
+            if n_recipes else np.zeros(len(ids), dtype=bool)
+
+        self.names = [''] * n_recipes
+        self.category_codes = {}
+        self.categories = np.full(n_recipes, -1, dtype=np.int32)
+        popularity = np.zeros(n_recipes, dtype=np.float32)
+        for (_, name, category, score), position, ok in zip(rows, positions, found):
+            if not ok:
+                continue
+            self.names[position] = name or ''
+            if category:
+                self.categories[position] = self.category_codes.setdefault(category, len(self.category_codes))
+            popularity[position] = score or 0
+        popularity = np.log1p(np.maximum(popularity, 0))
+        self.popularity = popularity / popularity.max() if n_recipes and popularity.max() > 0 else popularity
+
+        ingredients = db.session.query(Ingredient.id, Ingredient.name).all()
+        cols, ingredient_ids = matrix.columns_for(ingredient_id for ingredient_id, _ in ingredients)
+        names_by_id = dict(ingredients)
+        self.ingredient_names = [''] * len(matrix.ingredient_ids)
+        for col, ingredient_id in zip(cols, ingredient_ids):
+            self.ingredient_names[col] = names_by_id[int(ingredient_id)] or ''
+        self.ingredient_cols = {name: col for col, name in enumerate(self.ingredient_names) if name}
+
+        self._allergen_masks = {}
+
+    def allergen_mask(self, allergies: Iterable[str]):
+        """菜谱名称或食材名称命中任一过敏原关键词的菜谱掩码"""
+        key = frozenset(allergies)
+        mask = self._allergen_masks.get(key)
+        if mask is not None:
+            return mask
+
+        keywords = {keyword for allergy in key for keyword in ALLERGY_KEYWORDS.get(allergy, [allergy])}
+        mask = np.zeros(len(self.names), dtype=bool)
+        cols = [col for col, name in enumerate(self.ingredient_names) if any(k in name for k in keywords)]
+        if cols:
+            mask |= self.matrix.binary[:, cols].getnnz(axis=1) > 0
+        named = [row for row, name in enumerate(self.names) if any(k in name for k in keywords)]
+        mask[named] = True
+
+        if len(self._allergen_masks) >= MAX_ALLERGEN_MASKS:
+            self._allergen_masks.clear()
+        self._allergen_masks[key] = mask
+        return mask
+
+class _UserProfile:
+    """用户画像：收藏菜谱的TF-IDF向量之和及存储的偏好"""
+    __slots__ = ('version', 'loaded_at', 'favorite_ids', 'favorite_sum', 'disliked_cols', 'categories', 'allergies')
+
+    def __init__(self, catalog: _Catalog, favorite_ids, preferences):
+        self.version = catalog.version
+        self.loaded_at = time.monotonic()
+        self.favorite_ids = set(favorite_ids)
+        rows = catalog.matrix.rows_for(self.favorite_ids)
+        self.favorite_sum = np.asarray(catalog.matrix.tfidf[rows].sum(axis=0), dtype=np.float32).ravel()
+
+        self.disliked_cols = []
+        self.categories = []
+        self.allergies = []
+        for preference_type, value in preferences:
+            if preference_type == DISLIKED_PREFERENCE and value in catalog.ingredient_cols:
+                self.disliked_cols.append(catalog.ingredient_cols[value])
+            elif preference_type == CATEGORY_PREFERENCE and value in catalog.category_codes:
+                self.categories.append(catalog.category_codes[value])
+            elif preference_type == ALLERGY_PREFERENCE:
+                self.allergies.append(value)
+
+    def vector(self):
+        """归一化的画像向量，不喜欢的食材取负权重"""
+        norm = np.linalg.norm(self.favorite_sum)
+        vector = self.favorite_sum / norm if norm > 0 else self.favorite_sum.copy()
+        vector[self.disliked_cols] -= DISLIKE_WEIGHT
+        return vector
+
+class Recommender:
+    """
+    个性化菜谱推荐
+
+    - 菜谱矩阵（与相似菜谱相同的TF-IDF向量）在进程内缓存；TTL过期后由首个发现过期的请求同步重建
+      （该请求承担完整的加载耗时），重建期间其他请求继续使用旧矩阵
+    - 用户画像按LRU缓存，收藏变化时在画像上增量加减对应菜谱向量，偏好变化时失效
+    - 打分为一次稀疏矩阵-向量乘积，加上偏好分类和热度先验，过滤过敏原和已收藏菜谱后取Top-K
+    """
+
+    def __init__(self, max_profiles=2000, profile_ttl=300, catalog_ttl=600):
+        self.max_profiles = max_profiles
+        self.profile_ttl = profile_ttl
+        self.catalog_ttl = catalog_ttl
+        self.hits = 0
+        self.misses = 0
+        self._catalog = None
+        self._version = 0
+        self._catalog_lock = threading.Lock()
+        self._profiles = OrderedDict()
+        self._lock = threading.RLock()
+
+    def init_app(self, app):
+        """从应用配置读取缓存参数"""
+        self.max_profiles = app.config.get('RECOMMENDATION_MAX_PROFILES', self.max_profiles)
+        self.profile_ttl = app.config.get('RECOMMENDATION_PROFILE_TTL', self.profile_ttl)
+        self.catalog_ttl = app.config.get('RECOMMENDATION_CATALOG_TTL', self.catalog_ttl)
+        app.extensions['recommender'] = self
+
+    def get_catalog(self) -> _Catalog:
+        """当前的菜谱矩阵快照（推荐和库存建议共用）"""
+        catalog = self._catalog
+        if catalog is not None and time.monotonic() - catalog.loaded_at < self.catalog_ttl:
+            return catalog
+        # 已有快照时由一个请求负责重新加载，其他请求继续使用旧快照
+        if not self._catalog_lock.acquire(blocking=catalog is None):
+            return catalog
+        try:
+            if self._catalog is catalog:
+                self._version += 1
+                self._catalog = _Catalog(self._version)
+            return self._catalog
+        finally:
+            self._catalog_lock.release()
+
+    def _get_profile(self, user_id, catalog: _Catalog) -> _UserProfile:
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is not None and profile.version == catalog.version \
+                    and time.monotonic() - profile.loaded_at < self.profile_ttl:
+                self._profiles.move_to_end(user_id)
+                self.hits += 1
+                return profile
+            self.misses += 1
+
+        favorite_ids = [row[0] for row in db.session.query(FavoriteRecipe.recipe_id).filter(
+            FavoriteRecipe.user_id == user_id
+        ).all()]
+        preferences = db.session.query(UserPreference.preference_type, UserPreference.value).filter(
+            UserPreference.user_id == user_id
+        ).all()
+        profile = _UserProfile(catalog, favorite_ids, preferences)
+
+        with self._lock:
+            self._profiles[user_id] = profile
+            self._profiles.move_to_end(user_id)
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def recommend(self, user_id: int, limit: int = 10, allergies: Iterable[str] = ()) -> List[Tuple[float, RecipeSummary]]:
+        """
+        为用户推荐菜谱
+
+        Args:
+            user_id: 用户ID
+            limit: 返回数量
+            allergies: 额外的过敏原，与用户存储的过敏偏好合并
+
+        Returns:
+            List: [(得分, RecipeSummary), ...]，按得分从高到低
+        """
+        catalog = self.get_catalog()
+        profile = self._get_profile(user_id, catalog)
+        if not len(catalog.names):
+            return []
+
+        scores = catalog.matrix.tfidf @ profile.vector() + POPULARITY_WEIGHT * catalog.popularity
+        if profile.categories:
+            scores += CATEGORY_BOOST * np.isin(catalog.categories, profile.categories)
+
+        excluded = np.zeros(len(scores), dtype=bool)
+        excluded[catalog.matrix.rows_for(profile.favorite_ids)] = True
+        allergies = set(profile.allergies) | set(allergies)
+        if allergies:
+            excluded |= catalog.allergen_mask(allergies)
+        scores[excluded] = -np.inf
+
+        count = min(limit, int((~excluded).sum()))
+        if count <= 0:
+            return []
+        top = np.argpartition(-scores, count - 1)[:count]
+        top = top[np.argsort(-scores[top], kind='stable')]
+
+        recipe_ids = [int(recipe_id) for recipe_id in catalog.matrix.recipe_ids[top]]
+        summaries = {summary.recipe_id: summary for summary in RecipeSummary.query.filter(
+            RecipeSummary.recipe_id.in_(recipe_ids)
+        ).all()}
+        return [
+            (float(scores[row]), summaries[recipe_id])
+            for row, recipe_id in zip(top, recipe_ids) if recipe_id in summaries
+        ]
+
+    def _update_favorites(self, user_id, recipe_ids, sign):
+        catalog = self._catalog
+        with self._lock:
+            profile = self._profiles.get(user_id)
+            if profile is None or catalog is None or profile.version != catalog.version:
+                return
+            if sign > 0:
+                changed = set(recipe_ids) - profile.favorite_ids
+                profile.favorite_ids |= changed
+            else:
+                changed = set(recipe_ids) & profile.favorite_ids
+                profile.favorite_ids -= changed
+            rows = catalog.matrix.rows_for(changed)
+            if len(rows):
+                delta = np.asarray(catalog.matrix.tfidf[rows].sum(axis=0), dtype=np.float32).ravel()
+                profile.favorite_sum += sign * delta
+
+    def favorites_added(self, user_id: int, recipe_ids: Iterable[int]) -> None:
+        """收藏提交后增量更新已缓存的画像"""
+        self._update_favorites(user_id, recipe_ids, 1)
+
+    def favorites_removed(self, user_id: int, recipe_ids: Iterable[int]) -> None:
+        """取消收藏提交后增量更新已缓存的画像"""
+        self._update_favorites(user_id, recipe_ids, -1)
+
+    def invalidate(self, user_id: Optional[int] = None) -> None:
+        """失效指定用户的画像（偏好变化时调用），不传user_id时清空全部"""
+        with self._lock:
+            if user_id is None:
+                self._profiles.clear()
+            else:
+                self._profiles.pop(user_id, None)
+
+recommender = Recommender()
@@ -0,0 +1,130 @@
+from datetime import datetime
+from typing import Dict, List, Tuple
+from sqlalchemy import case, func
+from app import db
+from app.models.user import ShoppingList, ShoppingListItem
+from app.services.change_feed import record_changes
+
+# 批量更新允许修改的项目字段
+UPDATABLE_FIELDS = ('amount', 'is_purchased')
+
+# 单次批量更新允许的最大变更数
+MAX_BATCH_CHANGES = 500
+
+class ShoppingListService:
+    """购物清单查询服务"""
+
+    @staticmethod
+    def get_summaries(user_id: int, page: int = 1, per_page: int = 20) -> Tuple[List[Dict], int]:
+        """
+        分页获取用户购物清单摘要，项目数和已购买数由一条聚合查询计算
+
+        Args:
+            user_id: 用户ID
+            page: 页码（从1开始）
+            per_page: 每页数量
+
+        Returns:
+            tuple: ([{id, user_id, name, created_at, item_count, purchased_count}, ...], 清单总数)
+        """
+        total = db.session.query(func.count(ShoppingList.id)).filter(
+            ShoppingList.user_id == user_id
+        ).scalar()
+
+        # 先分页再连接项目表聚合，避免对用户全部清单做分组
+        lists = db.session.query(ShoppingList.id).filter(
+            ShoppingList.user_id == user_id
+        ).order_by(
+            ShoppingList.created_at.desc(), ShoppingList.id.desc()
+        ).limit(per_page).offset((page - 1) * per_page).subquery()
+
+        rows = db.session.query(
+            ShoppingList.id,
+            ShoppingList.user_id,
+            ShoppingList.name,
+            ShoppingList.created_at,
+            func.count(ShoppingListItem.id),
+            func.coalesce(func.sum(case((ShoppingListItem.is_purchased == True, 1), else_=0)), 0)
+        ).join(
+            lists, lists.c.id == ShoppingList.id
+        ).outerjoin(
+            ShoppingListItem, ShoppingListItem.shopping_list_id == ShoppingList.id
+        ).group_by(
+            ShoppingList.id, ShoppingList.user_id, ShoppingList.name, ShoppingList.created_at
+        ).order_by(
+            ShoppingList.created_at.desc(), ShoppingList.id.desc()
+        ).all()
+
+        return [{
+            'id': list_id,
+            'user_id': owner_id,
+            'name': name,
+            'created_at': created_at,
+            'item_count': item_count,
+            'purchased_count': int(purchased_count)
+        } for list_id, owner_id, name, created_at, item_count, purchased_count in rows], total
+
+    @staticmethod
+    def batch_update(shopping_list: ShoppingList, changes: List[Dict], offline: bool = False) -> Dict:
+        """
+        批量更新购物清单项目（不提交事务），所有变更合并为一条CASE UPDATE语句
+
+        Args:
+            shopping_list: 购物清单
+            changes: [{id, amount?, is_purchased?, changed_at?}, ...]，changed_at为naive UTC时间
+            offline: 离线变更日志模式，按changed_at做最后写入者胜出：
+                同一项目的多条变更按时间顺序合并，早于服务端updated_at的变更视为过期；
+                晚于服务端当前时间的changed_at截断为当前时间，updated_at不会超过服务端时间
+
+        Returns:
+            dict: updated为实际更新的项目ID，stale为因过期被忽略的，not_found为不属于该清单的
+        """
+        list_id = shopping_list.id
+        ids = {change['id'] for change in changes}
+        current = dict(db.session.query(ShoppingListItem.id, ShoppingListItem.updated_at).filter(
+            ShoppingListItem.shopping_list_id == list_id,
+            ShoppingListItem.id.in_(ids)
+        ).with_for_update().all()) if ids else {}
+
+        now = datetime.utcnow()
+        if offline:
+            # 客户端时钟可能超前：晚于服务端当前时间的changed_at按当前时间处理，
+            # 否则一条未来时间的变更会使该项目之后的所有离线变更都被判为过期
+            changes = sorted(
+                ({**change, 'changed_at': min(change['changed_at'], now)} for change in changes),
+                key=lambda change: change['changed_at']
+            )
+
+        merged, stale = {}, set()
+        for change in changes:
+            item_id = change['id']
+            if item_id not in current:
+                continue
+            changed_at = change['changed_at'] if offline else now
+            server_updated_at = current[item_id]
+            if offline and server_updated_at is not None and changed_at <= server_updated_at:
+                stale.add(item_id)
+                continue
+            values = merged.setdefault(item_id, {})
+            values.update((field, change[field]) for field in UPDATABLE_FIELDS if field in change)
+            values['updated_at'] = changed_at
+
+        if merged:
+            item_ids = sorted(merged)
+            columns = {}
+            for field in UPDATABLE_FIELDS + ('updated_at',):
+                whens = {item_id: values[field] for item_id, values in merged.items() if field in values}
+                if whens:
+                    column = getattr(ShoppingListItem, field)
+                    columns[column] = case(whens, value=ShoppingListItem.id, else_=column)
+            ShoppingListItem.query.filter(
+                ShoppingListItem.shopping_list_id == list_id,
+                ShoppingListItem.id.in_(item_ids)
+            ).update(columns, synchronize_session=False)
+            record_changes(shopping_list.user_id, 'shopping_list_item', item_ids)
+
+        return {
+            'updated': sorted(merged),
+            'stale': sorted(stale - set(merged)),
+            'not_found': sorted(ids - set(current))
+        }
@@ -0,0 +1,246 @@
+from datetime import datetime
+from typing import Iterable, List, Optional, Set
+from sqlalchemy import func
+from app import db
+from app.models.recipe import Recipe, RecipeNeighbor
+from app.models.ingredient import RecipeIngredient
+
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:  # 相似度计算依赖numpy/scipy，未安装时只能读取已计算的结果
+    np = None
+    sparse = None
+
+# 每个菜谱保存的相似菜谱数量
+DEFAULT_TOP_K = 20
+
+# 每批计算的菜谱数量，控制相似度中间结果的内存占用
+DEFAULT_CHUNK_SIZE = 1000
+
+# 出现在超过该比例菜谱中的食材（盐、油等）不参与相似度计算
+DEFAULT_MAX_DF = 0.5
+
+def _require_numpy():
+    if np is None or sparse is None:
+        raise RuntimeError('numpy and scipy are required for recipe similarity computation')
+
+class RecipeMatrix:
+    """
+    菜谱×食材稀疏矩阵
+
+    - binary: 0/1矩阵，表示菜谱是否使用某种食材
+    - tfidf: 按IDF加权并逐行L2归一化的矩阵，两行的点积即余弦相似度
+    """
+
+    def __init__(self, recipe_ids, ingredient_ids, binary, max_df: float = DEFAULT_MAX_DF):
+        _require_numpy()
+        self.recipe_ids = recipe_ids
+        self.ingredient_ids = ingredient_ids
+        self.binary = binary
+
+        n_recipes = binary.shape[0]
+        document_freq = np.bincount(binary.indices, minlength=binary.shape[1])
+        idf = np.log((1 + n_recipes) / (1 + document_freq)) + 1
+        idf[document_freq > max(max_df * n_recipes, 1)] = 0
+
+        tfidf = (binary @ sparse.diags(idf.astype(np.float32))).tocsr()
+        norms = np.sqrt(np.asarray(tfidf.multiply(tfidf).sum(axis=1)).ravel())
+        inverse = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+        tfidf = (sparse.diags(inverse.astype(np.float32)) @ tfidf).tocsr()
+        tfidf.eliminate_zeros()
+        self.tfidf = tfidf
+
+    @classmethod
+    def load(cls, max_df: float = DEFAULT_MAX_DF) -> 'RecipeMatrix':
+        """从数据库加载全部菜谱-食材关联并构建矩阵"""
+        _require_numpy()
+        recipe_ids = np.fromiter(
+            (row[0] for row in db.session.query(Recipe.id).order_by(Recipe.id).yield_per(50000)),
+            dtype=np.int64
+        )
+
+        pairs = db.session.query(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id).yield_per(50000)
+        flat = np.fromiter((value for pair in pairs for value in pair), dtype=np.int64)
+        pair_recipes, pair_ingredients = flat[0::2], flat[1::2]
+
+        # 丢弃指向不存在菜谱的脏数据
+        rows = np.searchsorted(recipe_ids, pair_recipes)
+        valid = (rows < len(recipe_ids)) & (recipe_ids[np.minimum(rows, len(recipe_ids) - 1)] == pair_recipes) \
+            if len(recipe_ids) else np.zeros(len(pair_recipes), dtype=bool)
+        rows, pair_ingredients = rows[valid], pair_ingredients[valid]
+
+        ingredient_ids, cols = np.unique(pair_ingredients, return_inverse=True)
+        binary = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.float32), (rows, cols)),
+            shape=(len(recipe_ids), len(ingredient_ids))
+        )
+        binary.data[:] = 1.0  # 重复的关联只计一次
+        return cls(recipe_ids, ingredient_ids, binary, max_df)
+
+    def rows_for(self, recipe_ids: Iterable[int]):
+        """把菜谱ID转换为矩阵行号，忽略不存在的ID"""
+        ids = np.asarray(sorted(set(recipe_ids)), dtype=np.int64)
+        if not len(ids) or not len(self.recipe_ids):
+            return np.zeros(0, dtype=np.int64)
+        rows = np.searchsorted(self.recipe_ids, ids)
+        rows = rows[rows < len(self.recipe_ids)]
+        return rows[np.isin(self.recipe_ids[rows], ids)]
+
+    def columns_for(self, ingredient_ids: Iterable[int]):
+        """把食材ID转换为矩阵列号，返回(列号, 对应的食材ID)，忽略未被任何菜谱使用的食材"""
+        ids = np.asarray(list(ingredient_ids), dtype=np.int64)
+        if not len(ids) or not len(self.ingredient_ids):
+            return np.zeros(0, dtype=np.int64), ids[:0]
+        cols = np.searchsorted(self.ingredient_ids, ids)
+        cols = np.minimum(cols, len(self.ingredient_ids) - 1)
+        found = self.ingredient_ids[cols] == ids
+        return cols[found], ids[found]
+
+class SimilarRecipeService:
+    """相似菜谱离线计算服务，结果写入recipe_neighbors表供接口直接读取"""
+
+    @staticmethod
+    def _top_k(matrix: RecipeMatrix, transposed, rows, top_k: int):
+        """计算一批菜谱的Top-K余弦近邻，逐行返回(行号, 近邻行号数组, 相似度数组)"""
+        product = (matrix.tfidf[rows] @ transposed).tocsr()
+        for i, row in enumerate(rows):
+            start, end = product.indptr[i], product.indptr[i + 1]
+            cols = product.indices[start:end]
+            scores = product.data[start:end]
+
+            keep = (cols != row) & (scores > 0)
+            cols, scores = cols[keep], scores[keep]
+            if len(scores) > top_k:
+                best = np.argpartition(-scores, top_k - 1)[:top_k]
+                cols, scores = cols[best], scores[best]
+
+            order = np.argsort(-scores, kind='stable')
+            yield row, cols[order], scores[order]
+
+    @staticmethod
+    def build(recipe_ids: Optional[Iterable[int]] = None, top_k: int = DEFAULT_TOP_K,
+              chunk_size: int = DEFAULT_CHUNK_SIZE, matrix: Optional[RecipeMatrix] = None) -> int:
+        """
+        计算并保存相似菜谱
+
+        Args:
+            recipe_ids: 需要计算的菜谱，None表示全部
+            top_k: 每个菜谱保存的近邻数量
+            chunk_size: 每批计算的菜谱数量
+            matrix: 已加载的矩阵，None时从数据库加载
+
+        Returns:
+            int: 计算的菜谱数量
+        """
+        built_at = datetime.utcnow()
+        matrix = matrix or RecipeMatrix.load()
+        if recipe_ids is None:
+            rows = np.arange(len(matrix.recipe_ids))
+            # 清除已删除菜谱的近邻
+            RecipeNeighbor.query.filter(
+                ~RecipeNeighbor.recipe_id.in_(db.select(Recipe.id))
+            ).delete(synchronize_session=False)
+        else:
+            rows = matrix.rows_for(recipe_ids)
+
+        transposed = matrix.tfidf.T.tocsr()
+        for offset in range(0, len(rows), chunk_size):
+            chunk = rows[offset:offset + chunk_size]
+            chunk_ids = [int(recipe_id) for recipe_id in matrix.recipe_ids[chunk]]
+
+            records = []
+            for row, neighbor_rows, scores in SimilarRecipeService._top_k(matrix, transposed, chunk, top_k):
+                recipe_id = int(matrix.recipe_ids[row])
+                for rank, (neighbor_row, score) in enumerate(zip(neighbor_rows, scores), start=1):
+                    records.append({
+                        'recipe_id': recipe_id,
+                        'rank': rank,
+                        'neighbor_id': int(matrix.recipe_ids[neighbor_row]),
+                        'score': float(score),
+                        'built_at': built_at
+                    })
+
+            RecipeNeighbor.query.filter(
+                RecipeNeighbor.recipe_id.in_(chunk_ids)
+            ).delete(synchronize_session=False)
+            if records:
+                db.session.execute(RecipeNeighbor.__table__.insert(), records)
+            db.session.commit()
+
+        db.session.commit()
+        return len(rows)
+
+    @staticmethod
+    def build_incremental(top_k: int = DEFAULT_TOP_K, chunk_size: int = DEFAULT_CHUNK_SIZE) -> int:
+        """
+        只重新计算受变更影响的菜谱
+
+        受影响的菜谱包括：上次计算后新增或修改的菜谱、近邻列表中包含变更或已删除菜谱的菜谱，
+        以及与变更菜谱的相似度超过其当前第K名的菜谱。IDF权重会随目录变化缓慢漂移，
+        建议定期执行一次全量计算。
+
+        Returns:
+            int: 重新计算的菜谱数量
+        """
+        last_built = db.session.query(func.max(RecipeNeighbor.built_at)).scalar()
+        if last_built is None:
+            return SimilarRecipeService.build(top_k=top_k, chunk_size=chunk_size)
+
+        existing_ids = db.select(Recipe.id)
+        deleted_ids = {row[0] for row in db.session.query(RecipeNeighbor.neighbor_id).filter(
+            ~RecipeNeighbor.neighbor_id.in_(existing_ids)
+        ).distinct().all()}
+        RecipeNeighbor.query.filter(
+            ~RecipeNeighbor.recipe_id.in_(existing_ids)
+        ).delete(synchronize_session=False)
+
+        changed_ids = {row[0] for row in db.session.query(Recipe.id).filter(
+            Recipe.updated_at > last_built
+        ).all()}
+        if not changed_ids and not deleted_ids:
+            db.session.commit()
+            return 0
+
+        affected: Set[int] = set(changed_ids)
+        referenced = list(changed_ids | deleted_ids)
+        for offset in range(0, len(referenced), 500):
+            affected.update(row[0] for row in db.session.query(RecipeNeighbor.recipe_id).filter(
+                RecipeNeighbor.neighbor_id.in_(referenced[offset:offset + 500])
+            ).distinct().all())
+
+        matrix = RecipeMatrix.load()
+        changed_rows = matrix.rows_for(changed_ids)
+        if len(changed_rows):
+            # 每个菜谱当前的入选门槛：近邻已满K个时为第K名的相似度，否则为0
+            thresholds = np.zeros(len(matrix.recipe_ids), dtype=np.float32)
+            stats = db.session.query(
+                RecipeNeighbor.recipe_id, func.count(RecipeNeighbor.rank), func.min(RecipeNeighbor.score)
+            ).group_by(RecipeNeighbor.recipe_id).all()
+            full = [(recipe_id, min_score) for recipe_id, count, min_score in stats if count >= top_k]
+            if full:
+                full_rows = np.searchsorted(matrix.recipe_ids, [recipe_id for recipe_id, _ in full])
+                thresholds[full_rows] = [min_score for _, min_score in full]
+
+            transposed = matrix.tfidf.T.tocsr()
+            for offset in range(0, len(changed_rows), chunk_size):
+                product = (matrix.tfidf[changed_rows[offset:offset + chunk_size]] @ transposed).tocoo()
+                candidates = product.col[product.data > thresholds[product.col]]
+                affected.update(int(recipe_id) for recipe_id in matrix.recipe_ids[np.unique(candidates)])
+
+        return SimilarRecipeService.build(affected, top_k=top_k, chunk_size=chunk_size, matrix=matrix)
+
+    @staticmethod
+    def get_similar(recipe_id: int, limit: int = 10) -> List:
+        """
+        读取已计算的相似菜谱
+
+        Returns:
+            List: [(相似度, RecipeSummary), ...]
+        """
+        from app.models.recipe import RecipeSummary
+        return db.session.query(RecipeNeighbor.score, RecipeSummary).join(
+            RecipeSummary, RecipeSummary.recipe_id == RecipeNeighbor.neighbor_id
+        ).filter(
+            RecipeNeighbor.recipe_id == recipe_id
+        ).order_by(RecipeNeighbor.rank).limit(limit).all()
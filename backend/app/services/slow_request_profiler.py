@@ -0,0 +1,178 @@
+import logging
+import os
+import random
+import re
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Optional
+from flask import g, request
+from app.json_provider import dumps
+
+logger = logging.getLogger(__name__)
+
+_UNSAFE = re.compile(r'[^A-Za-z0-9_.-]+')
+
+class _Profile:
+    """一个被采样请求的栈计数"""
+    __slots__ = ('thread_id', 'root', 'stacks', 'samples')
+
+    def __init__(self, thread_id, root):
+        self.thread_id = thread_id
+        self.root = root  # 火焰图的根帧，如"POST /api/meal-plan/generate"
+        self.stacks = Counter()  # 折叠栈 -> 采样次数
+        self.samples = 0
+
+class SlowRequestProfiler:
+    """
+    慢请求采样分析（默认关闭）
+
+    - 只对配置的路由、按sample_rate比例采样；未选中的请求只多一次集合查找
+    - 一个后台线程每隔interval读取被采样请求线程的调用栈（sys._current_frames），没有被采样的请求时线程休眠
+    - 请求耗时超过阈值时写出火焰图工具（flamegraph.pl、speedscope）可直接读取的折叠栈文件，
+      以及同名的.json文件，记录路由、耗时、采样数和请求的SQL统计；未超过阈值的采样结果直接丢弃
+    """
+
+    def __init__(self, routes=('/api/meal-plan/generate', '/api/recipes/search'), threshold_ms=1000.0,
+                 sample_rate=1.0, interval_ms=5.0, output_dir=None, max_files=200):
+        self.enabled = False
+        self.routes = set(routes)
+        self.threshold_ms = threshold_ms
+        self.sample_rate = sample_rate
+        self.interval_ms = interval_ms
+        self.output_dir = output_dir
+        self.max_files = max_files
+        self.written = 0
+        self._active: Dict[int, _Profile] = {}
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self._pid = None
+
+    def init_app(self, app):
+        """从应用配置读取参数并注册请求钩子"""
+        self.enabled = app.config.get('SLOW_REQUEST_PROFILER_ENABLED', self.enabled)
+        routes = app.config.get('SLOW_REQUEST_PROFILER_ROUTES')
+        if routes:
+            self.routes = {route.strip() for route in routes.split(',') if route.strip()}
+        self.threshold_ms = app.config.get('SLOW_REQUEST_PROFILER_THRESHOLD_MS', self.threshold_ms)
+        self.sample_rate = app.config.get('SLOW_REQUEST_PROFILER_SAMPLE_RATE', self.sample_rate)
+        self.interval_ms = app.config.get('SLOW_REQUEST_PROFILER_INTERVAL_MS', self.interval_ms)
+        self.output_dir = app.config.get('SLOW_REQUEST_PROFILER_DIR') or self.output_dir or \
+            os.path.join(tempfile.gettempdir(), 'easycook-profiles')
+        self.max_files = app.config.get('SLOW_REQUEST_PROFILER_MAX_FILES', self.max_files)
+        app.extensions['slow_request_profiler'] = self
+        if self.enabled:
+            # after_request按注册的相反顺序执行，需在query_instrumentation之后注册才能读到SQL统计
+            app.before_request(self._start)
+            app.after_request(self._finish)
+            app.teardown_request(self._discard)
+
+    def _ensure_thread(self):
+        """启动采样线程（fork后的子进程重新启动）"""
+        if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive() and self._pid == os.getpid():
+                return
+            self._pid = os.getpid()
+            self._thread = threading.Thread(target=self._run, name='slow-request-profiler', daemon=True)
+            self._thread.start()
+
+    def _start(self):
+        rule = request.url_rule
+        if rule is None or rule.rule not in self.routes or random.random() >= self.sample_rate:
+            return
+        self._ensure_thread()
+        profile = _Profile(threading.get_ident(), f'{request.method} {rule.rule}')
+        with self._lock:
+            self._active[profile.thread_id] = profile
+        g.profile = profile
+        g.profile_started = time.perf_counter()
+        self._wakeup.set()
+
+    def _stop(self) -> Optional[_Profile]:
+        profile = g.pop('profile', None)
+        if profile is not None:
+            with self._lock:
+                self._active.pop(profile.thread_id, None)
+        return profile
+
+    def _finish(self, response):
+        profile = self._stop()
+        if profile is None:
+            return response
+        elapsed_ms = (time.perf_counter() - g.pop('profile_started')) * 1000
+        if elapsed_ms >= self.threshold_ms and profile.samples:
+            self._write(profile, elapsed_ms, response.status_code)
+        return response
+
+    def _discard(self, exc):
+        """请求未正常结束时（after_request未执行）移除采样"""
+        self._stop()
+
+    def _run(self):
+        interval = self.interval_ms / 1000
+        while True:
+            if not self._active:
+                self._wakeup.wait()
+                self._wakeup.clear()
+                continue
+            frames = sys._current_frames()
+            with self._lock:
+                profiles = list(self._active.values())
+            for profile in profiles:
+                frame = frames.get(profile.thread_id)
+                if frame is not None:
+                    profile.stacks[self._collapse(profile.root, frame)] += 1
+                    profile.samples += 1
+            del frames
+            time.sleep(interval)
+
+    @staticmethod
+    def _collapse(root: str, frame) -> str:
+        """折叠栈：从根到叶以分号连接，每帧为 函数名 (文件名:定义所在行)"""
+        names = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+            frame = frame.f_back
+        names.append(root)
+        return ';'.join(reversed(names))
+
+    def _write(self, profile: _Profile, elapsed_ms: float, status: int) -> None:
+        if self.written >= self.max_files:
+            return  # 达到上限后不再写出，避免持续变慢时占满磁盘
+        from app.services.query_stats import QueryInstrumentation
+
+        stats = QueryInstrumentation.current()
+        name = f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}-{_UNSAFE.sub('_', profile.root).strip('_')}-{elapsed_ms:.0f}ms"
+        meta = {
+            'route': profile.root,
+            'path': request.full_path.rstrip('?'),
+            'status': status,
+            'elapsed_ms': round(elapsed_ms, 1),
+            'samples': profile.samples,
+            'interval_ms': self.interval_ms,
+            'queries': stats.count if stats else None,
+            'db_ms': round(stats.duration * 1000, 1) if stats else None,
+            'repeated_statements': [{'statement': shape, 'count': count} for shape, count in stats.repeated(2)[:10]]
+            if stats else []
+        }
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, name)
+            with open(f'{path}.collapsed', 'w', encoding='utf-8') as f:
+                for stack, count in profile.stacks.most_common():
+                    f.write(f'{stack} {count}\n')
+            with open(f'{path}.json', 'wb') as f:
+                f.write(dumps(meta, indent=True))
+            self.written += 1
+            logger.warning(f"慢请求 {profile.root} 耗时 {elapsed_ms:.0f}ms，采样栈已写入 {path}.collapsed")
+        except OSError as e:
+            logger.warning(f"采样栈写入失败: {str(e)}")
+
+slow_request_profiler = SlowRequestProfiler()
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+接口基准
+用合成数据（synthetic_data）建库，通过Flask测试客户端反复请求热点接口，统计每个接口的
+延迟分位数（p50/p95/p99）和每次请求执行的SQL语句数：
+  - GET /api/recipes、/api/recipes/<id>、/api/recipes/search、/api/ingredients/search
+  - GET /api/users/<id>/favorites、/api/users/<id>/shopping-lists
+  - POST /api/meal-plan/generate（替换DeepSeek API调用，只测本地的查询和提示词构建，可用--llm-latency模拟上游耗时）
+
+结果写入JSON；指定--baseline时与基线比较：延迟分位数超过基线(1 + threshold)倍且超出min_delta毫秒、
+或查询数、错误数多于基线时视为退化，以非零状态退出（可在CI中运行）。相同参数下数据和请求序列完全相同。
+
+用法: python benchmarks/api_bench.py [--recipes 20000] [--users 2000] [--requests 200]
+      [--output results.json] [--baseline benchmarks/baselines/api_bench.json] [--threshold 0.25] [--min-delta 1.0]
+      [--update-baseline]
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import sqlalchemy
+from sqlalchemy import event
+from config import Config
+from app import create_app, db
+from app.services.deepseek_service import DeepSeekService
+from synthetic_data import BASE_INGREDIENTS, COOKING_METHODS, SyntheticConfig, generate
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(__file__), 'baselines', 'api_bench.json')
+PERCENTILES = (0.5, 0.95, 0.99)
+
+class BenchConfig(Config):
+    EVENT_PIPELINE_ENABLED = False
+    DEEPSEEK_API_KEY = 'benchmark-stub'  # 走真实的提示词构建路径，API调用由stub_llm替换
+    CATALOG_VERSION_POLL_INTERVAL = 3600  # 基准期间目录不变，避免版本轮询使查询数随耗时波动
+    CATALOG_SNAPSHOT_DIR = None  # 运行时指向临时目录
+
+def stub_llm(latency_ms):
+    """替换DeepSeek API调用，返回固定的规划结果"""
+    content = json.dumps({'meal_plan': [
+        {'day': day, 'meals': [{'type': 'lunch', 'recipe_id': day, 'name': f'菜谱{day}'}]} for day in range(1, 4)
+    ]}, ensure_ascii=False)
+
+    def call(prompt):
+        if latency_ms:
+            time.sleep(latency_ms / 1000)
+        return {'choices': [{'message': {'content': content}}]}
+
+    DeepSeekService._call_deepseek_api = staticmethod(call)
+
+def workloads(config, count):
+    """每个接口的请求序列：(名称, 方法, [(URL, JSON请求体)])"""
+    rng = random.Random(config.seed)
+    pages = max(config.recipes // 20, 1)
+    names = [name for _, _, name in BASE_INGREDIENTS]
+
+    def user_id():
+        return rng.randint(1, config.users)
+
+    return [
+        ('recipes_list', 'get', [(f'/api/recipes?page={rng.randint(1, pages)}&per_page=20', None)
+                                 for _ in range(count)]),
+        ('recipe_detail', 'get', [(f'/api/recipes/{rng.randint(1, config.recipes)}', None) for _ in range(count)]),
+        ('recipe_search', 'get', [(f'/api/recipes/search?q={rng.choice(COOKING_METHODS + names)}', None)
+                                  for _ in range(count)]),
+        ('ingredient_search', 'get', [(f'/api/ingredients/search?q={rng.choice(names)}', None)
+                                      for _ in range(count)]),
+        ('favorites', 'get', [(f'/api/users/{user_id()}/favorites', None) for _ in range(count)]),
+        ('shopping_lists', 'get', [(f'/api/users/{user_id()}/shopping-lists', None) for _ in range(count)]),
+        ('meal_plan', 'post', [('/api/meal-plan/generate', {'days': rng.randint(1, 7)})
+                               for _ in range(max(count // 4, 1))]),
+    ]
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def run(client, method, urls, warmup):
+    """依次发送请求，返回延迟（毫秒）、每次的查询数和错误数"""
+    statements = []
+    listener = lambda *args: statements.append(args[2])
+    for url, body in urls[:warmup]:
+        getattr(client, method)(url, json=body)
+
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    timings, queries, errors = [], [], 0
+    try:
+        for url, body in urls:
+            statements.clear()
+            db.session.remove()  # 每个请求使用新的会话，与线上一致
+            start = time.perf_counter()
+            response = getattr(client, method)(url, json=body)
+            timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(statements))
+            # 404（例如用户没有收藏时的分页）也计为错误，合成数据下不应出现
+            errors += response.status_code >= 400
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return timings, queries, errors
+
+def summarize(rounds):
+    """
+    汇总多轮结果：每个分位数取各轮中的最小值，减少机器上其他负载造成的噪声
+
+    Args:
+        rounds: [(延迟列表, 查询数列表, 错误数)]
+    """
+    result = {
+        f'p{int(p * 100)}_ms': round(min(percentile(timings, p) for timings, _, _ in rounds), 3)
+        for p in PERCENTILES
+    }
+    queries = [count for _, counts, _ in rounds for count in counts]
+    result.update({
+        'mean_ms': round(min(sum(timings) / len(timings) for timings, _, _ in rounds), 3),
+        'requests': sum(len(timings) for timings, _, _ in rounds),
+        'errors': sum(errors for _, _, errors in rounds),
+        'queries_mean': round(sum(queries) / len(queries), 2),
+        'queries_max': max(queries)
+    })
+    return result
+
+def compare(results, baseline, threshold, min_delta, metrics):
+    """返回退化项列表：metrics中的延迟需同时超过相对阈值和绝对阈值（毫秒）才算退化"""
+    regressions = []
+    for name, current in results['endpoints'].items():
+        previous = baseline['endpoints'].get(name)
+        if previous is None:
+            continue
+        for key in metrics:
+            if current[key] > previous[key] * (1 + threshold) and current[key] - previous[key] > min_delta:
+                regressions.append(f'{name} {key}: {previous[key]:.2f} -> {current[key]:.2f}')
+        if current['queries_max'] > previous['queries_max']:
+            regressions.append(f"{name} queries_max: {previous['queries_max']} -> {current['queries_max']}")
+        if current['errors'] > previous['errors']:
+            regressions.append(f"{name} errors: {previous['errors']} -> {current['errors']}")
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description='接口基准')
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--requests', type=int, default=200, help='每个接口的请求数（meal_plan为四分之一）')
+    parser.add_argument('--warmup', type=int, default=20, help='计时前的预热请求数')
+    parser.add_argument('--rounds', type=int, default=3, help='每个接口重复的轮数，分位数取各轮最小值')
+    parser.add_argument('--llm-latency', type=float, default=0, help='模拟的DeepSeek API耗时（毫秒）')
+    parser.add_argument('--output', help='结果JSON文件')
+    parser.add_argument('--baseline', help=f'基线JSON文件（例如 {os.path.relpath(DEFAULT_BASELINE)}）')
+    parser.add_argument('--threshold', type=float, default=0.25, help='延迟允许超出基线的比例')
+    parser.add_argument('--min-delta', type=float, default=1.0, help='延迟超出基线不足该毫秒数时不算退化')
+    parser.add_argument('--metrics', default='p50_ms,p95_ms',
+                        help='参与基线比较的延迟指标（p99样本少、波动大，默认只记录不比较）')
+    parser.add_argument('--update-baseline', action='store_true', help='将本次结果写入--baseline（默认基线文件）')
+    args = parser.parse_args()
+
+    config = SyntheticConfig(recipes=args.recipes, users=args.users, seed=args.seed)
+    directory = tempfile.mkdtemp(prefix='api-bench-')
+    BenchConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "bench.db")}'
+    BenchConfig.CATALOG_SNAPSHOT_DIR = directory
+    stub_llm(args.llm_latency)
+
+    try:
+        app = create_app(BenchConfig)
+        client = app.test_client()
+        with app.app_context():
+            db.create_all()
+            start = time.perf_counter()
+            generate(config, progress=None)
+            print(f'生成 {args.recipes} 个菜谱、{args.users} 个用户: {time.perf_counter() - start:.1f}s\n')
+
+            results = {
+                'meta': {
+                    'created_at': datetime.utcnow().isoformat(timespec='seconds'),
+                    'recipes': args.recipes, 'users': args.users, 'seed': args.seed,
+                    'requests': args.requests, 'rounds': args.rounds, 'llm_latency_ms': args.llm_latency,
+                    'python': platform.python_version(), 'sqlalchemy': sqlalchemy.__version__,
+                    'dialect': db.engine.dialect.name, 'machine': platform.machine()
+                },
+                'endpoints': {}
+            }
+            print(f'{"接口":<20}{"p50(ms)":>10}{"p95(ms)":>10}{"p99(ms)":>10}{"查询数":>8}{"错误":>6}')
+            for name, method, urls in workloads(config, args.requests):
+                summary = summarize([run(client, method, urls, args.warmup) for _ in range(args.rounds)])
+                results['endpoints'][name] = summary
+                print(f"{name:<20}{summary['p50_ms']:>10.2f}{summary['p95_ms']:>10.2f}{summary['p99_ms']:>10.2f}"
+                      f"{summary['queries_max']:>8}{summary['errors']:>6}")
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'\n结果已写入 {args.output}')
+
+    baseline_path = args.baseline or (DEFAULT_BASELINE if args.update_baseline else None)
+    if args.update_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(baseline_path)), exist_ok=True)
+        with open(baseline_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print(f'✅ 基线已更新: {baseline_path}')
+        return
+    if not baseline_path:
+        return
+
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    if {key: baseline['meta'].get(key) for key in ('recipes', 'users', 'seed')} != \
+            {key: results['meta'][key] for key in ('recipes', 'users', 'seed')}:
+        print('⚠️  基线使用的数据规模或种子与本次不同，延迟比较仅供参考')
+    regressions = compare(results, baseline, args.threshold, args.min_delta, args.metrics.split(','))
+    if regressions:
+        print(f'\n❌ {len(regressions)} 项相对基线退化（阈值 {args.threshold:.0%}）:')
+        for line in regressions:
+            print(f'   {line}')
+        sys.exit(1)
+    print(f'\n✅ 所有接口均未超过基线（阈值 {args.threshold:.0%}）')
+
+if __name__ == '__main__':
+    main()
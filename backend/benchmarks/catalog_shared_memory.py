@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+共享目录快照内存基准
+启动1、2、4...个工作进程（spawn，模拟gunicorn工作进程），每个进程加载目录快照并读取全部菜谱，
+所有进程同时存活时读取/proc/self/smaps_rollup，对比进程内快照与mmap共享快照的：
+  - Pss：按共享进程数分摊后的内存，所有进程之和即实际占用的物理内存
+  - Private：进程独占的内存
+另外对比两种快照下 GET /api/recipes/<id> 与列表接口的延迟。仅支持Linux。
+
+用法: python benchmarks/catalog_shared_memory.py [--recipes 20000] [--workers 1,2,4]
+"""
+
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import multiprocessing
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.services.catalog_snapshot import catalog_store
+from catalog_snapshot_bench import CATEGORIES, seed, time_requests, percentile
+
+def make_config(directory, shared):
+    class BenchConfig(Config):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "catalog.db")}'
+        EVENT_PIPELINE_ENABLED = False
+        CATALOG_SNAPSHOT_SHARED = shared
+        CATALOG_SNAPSHOT_DIR = directory
+    return BenchConfig
+
+def read_memory():
+    """当前进程的Pss和独占内存（KiB）"""
+    values = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) >= 2 and parts[1].isdigit():
+                values[parts[0].rstrip(':')] = int(parts[1])
+    return values['Pss'], values.get('Private_Clean', 0) + values.get('Private_Dirty', 0)
+
+def worker(directory, shared, barrier, results):
+    app = create_app(make_config(directory, shared))
+    with app.app_context():
+        baseline = read_memory()
+        snapshot = None
+        while snapshot is None:  # 共享快照由其他进程构建期间返回None
+            snapshot = catalog_store.current()
+            if snapshot is None:
+                time.sleep(0.05)
+        for recipe_id in snapshot.list_ids():
+            snapshot.get(recipe_id)
+        barrier.wait()
+        pss, private = read_memory()
+        results.put((pss - baseline[0], private - baseline[1]))
+        barrier.wait()
+
+def measure(directory, shared, workers):
+    """返回所有工作进程的Pss增量之和与平均独占内存增量（MiB）"""
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=worker, args=(directory, shared, barrier, results)) for _ in range(workers)]
+    for process in processes:
+        process.start()
+    samples = [results.get() for _ in range(workers)]
+    for process in processes:
+        process.join()
+    return sum(pss for pss, _ in samples) / 1024, sum(private for _, private in samples) / workers / 1024
+
+def main():
+    parser = argparse.ArgumentParser(description='共享目录快照内存基准')
+    parser.add_argument('--recipes', type=int, default=20000)
+    parser.add_argument('--workers', default='1,2,4')
+    parser.add_argument('--requests', type=int, default=300)
+    args = parser.parse_args()
+
+    directory = tempfile.mkdtemp(prefix='catalog-bench-')
+    try:
+        app = create_app(make_config(directory, True))
+        with app.app_context():
+            db.create_all()
+            seed(args.recipes)
+            start = time.perf_counter()
+            catalog_store.current()
+            print(f'{args.recipes} 个菜谱，构建共享快照 {time.perf_counter() - start:.2f}s，'
+                  f'文件 {os.path.getsize(catalog_store.path) / 1024 / 1024:.1f} MiB')
+
+        print(f'\n{"进程数":<8}{"快照":<10}{"总Pss(MiB)":>12}{"每进程独占(MiB)":>18}')
+        for workers in [int(value) for value in args.workers.split(',')]:
+            for label, shared in (('进程内', False), ('共享mmap', True)):
+                total_pss, private = measure(directory, shared, workers)
+                print(f'{workers:<8}{label:<10}{total_pss:>12.1f}{private:>18.1f}')
+
+        rng = random.Random(7)
+        pages = max(args.recipes // 20, 1)
+        workloads = {
+            'get_recipe': [f'/api/recipes/{rng.randint(1, args.recipes)}' for _ in range(args.requests)],
+            'list': [f'/api/recipes?per_page=20&page={rng.randint(1, pages)}' for _ in range(args.requests)],
+            'list_category': [
+                f'/api/recipes?per_page=20&category={rng.choice(CATEGORIES)}' for _ in range(args.requests)
+            ]
+        }
+        print(f'\n{"接口":<16}{"快照":<10}{"平均(ms)":>10}{"p50(ms)":>10}{"p95(ms)":>10}')
+        for label, shared in (('进程内', False), ('共享mmap', True)):
+            app = create_app(make_config(directory, shared))
+            client = app.test_client()
+            with app.app_context():
+                catalog_store.invalidate()
+                catalog_store.current()
+            for name, urls in workloads.items():
+                time_requests(client, urls[:20])
+                timings = time_requests(client, urls)
+                print(f'{name:<16}{label:<10}{sum(timings) / len(timings):>10.2f}'
+                      f'{percentile(timings, 0.5):>10.2f}{percentile(timings, 0.95):>10.2f}')
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+"""
+菜谱目录快照基准
+  1. 快照内存占用（tracemalloc统计构建快照分配的内存，折算为每1万个菜谱）
+  2. 快照加载耗时
+  3. GET /api/recipes/<id> 与 GET /api/recipes（完整视图）在快照与数据库两种路径下的延迟
+
+用法: python benchmarks/catalog_snapshot_bench.py [--recipes 10000] [--requests 500]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+import tracemalloc
+from datetime import datetime, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.models.recipe import Recipe, Step
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.services.catalog_snapshot import CatalogSnapshot, CatalogStore, catalog_store
+
+CATEGORIES = ['家常菜', '川菜', '粤菜', '早餐', '汤类', '凉菜']
+DIFFICULTIES = ['简单', '中等', '困难']
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVENT_PIPELINE_ENABLED = False
+
+def seed(recipe_count, steps_per_recipe=6, ingredients_per_recipe=8, ingredient_count=500):
+    """用Core批量插入生成测试菜谱"""
+    rng = random.Random(42)
+    now = datetime.utcnow()
+    db.session.execute(Ingredient.__table__.insert(), [
+        {'id': i + 1, 'name': f'食材{i}', 'unit': '克', 'category': '蔬菜'} for i in range(ingredient_count)
+    ])
+    recipes, steps, recipe_ingredients = [], [], []
+    for i in range(1, recipe_count + 1):
+        created_at = now - timedelta(seconds=i)
+        recipes.append({
+            'id': i, 'name': f'测试菜谱{i}', 'description': '家常美味，简单易做' * 3,
+            'difficulty': rng.choice(DIFFICULTIES), 'cooking_time': rng.randint(5, 120), 'servings': 2,
+            'image_url': f'https://example.com/{i}.jpg', 'category': rng.choice(CATEGORIES),
+            'created_at': created_at, 'updated_at': created_at
+        })
+        for n in range(steps_per_recipe):
+            steps.append({'recipe_id': i, 'step_number': n + 1, 'description': f'第{n + 1}步，翻炒均匀'})
+        for ingredient_id in rng.sample(range(1, ingredient_count + 1), ingredients_per_recipe):
+            recipe_ingredients.append({'recipe_id': i, 'ingredient_id': ingredient_id, 'amount': 100, 'note': '切片'})
+    db.session.execute(Recipe.__table__.insert(), recipes)
+    db.session.execute(Step.__table__.insert(), steps)
+    db.session.execute(RecipeIngredient.__table__.insert(), recipe_ingredients)
+    CatalogStore.bump()
+    db.session.commit()
+
+def measure_memory(recipe_count):
+    """构建一次快照并统计其分配的内存"""
+    version = CatalogStore.read_version()
+    start = time.perf_counter()
+    CatalogSnapshot.load(version)
+    elapsed = time.perf_counter() - start
+
+    tracemalloc.start()
+    snapshot = CatalogSnapshot.load(version)
+    # 查询过程中的临时对象已释放，当前占用即快照本身
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f'快照: {len(snapshot.recipes)} 个菜谱, 加载 {elapsed:.2f}s')
+    print(f'  内存 {current / 1024 / 1024:.1f} MiB (峰值 {peak / 1024 / 1024:.1f} MiB), '
+          f'每1万个菜谱 {current / recipe_count * 10000 / 1024 / 1024:.1f} MiB')
+    return snapshot
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+def time_requests(client, urls):
+    timings = []
+    for url in urls:
+        start = time.perf_counter()
+        response = client.get(url)
+        timings.append((time.perf_counter() - start) * 1000)
+        assert response.status_code == 200, (url, response.status_code)
+    return timings
+
+def main():
+    parser = argparse.ArgumentParser(description='菜谱目录快照基准')
+    parser.add_argument('--recipes', type=int, default=10000)
+    parser.add_argument('--requests', type=int, default=500)
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        start = time.perf_counter()
+        seed(args.recipes)
+        print(f'生成 {args.recipes} 个菜谱: {time.perf_counter() - start:.1f}s')
+        measure_memory(args.recipes)
+
+        rng = random.Random(7)
+        pages = max(args.recipes // 20, 1)
+        workloads = {
+            'get_recipe': [f'/api/recipes/{rng.randint(1, args.recipes)}' for _ in range(args.requests)],
+            'list': [f'/api/recipes?per_page=20&page={rng.randint(1, pages)}' for _ in range(args.requests)],
+            'list_category': [
+                f'/api/recipes?per_page=20&category={rng.choice(CATEGORIES)}' for _ in range(args.requests)
+            ]
+        }
+
+        client = app.test_client()
+        catalog_store.current()  # 预热快照
+        print(f'\n{"接口":<16}{"路径":<10}{"平均(ms)":>10}{"p50(ms)":>10}{"p95(ms)":>10}')
+        for name, urls in workloads.items():
+            results = {}
+            for label, enabled in (('snapshot', True), ('database', False)):
+                catalog_store.enabled = enabled
+                time_requests(client, urls[:20])  # 预热
+                timings = time_requests(client, urls)
+                results[label] = sum(timings) / len(timings)
+                print(f'{name:<16}{label:<10}{results[label]:>10.2f}'
+                      f'{percentile(timings, 0.5):>10.2f}{percentile(timings, 0.95):>10.2f}')
+            print(f'{"":<16}{"加速":<10}{results["database"] / results["snapshot"]:>9.1f}x')
+        catalog_store.enabled = True
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+热点查询执行计划检查
+通过迁移脚本（flask db upgrade）建库并写入测试数据，关闭目录快照后请求各读接口、调用菜谱查询服务，
+记录实际执行的SQL，对每条语句执行EXPLAIN；出现全表扫描时以非零状态退出（可在CI中运行）。
+
+- SQLite：EXPLAIN QUERY PLAN中不带索引的"SCAN <表>"视为全表扫描；带LIMIT的语句出现
+  "USE TEMP B-TREE FOR ORDER BY"（需要排序全部匹配行才能取前N行）同样视为失败
+- PostgreSQL（--database-url指向已迁移的数据库）：关闭enable_seqscan后计划中仍出现Seq Scan视为失败，
+  即该查询没有可用的索引
+
+模糊搜索（LIKE '%关键词%'）无法利用B-tree索引，不在检查范围内。
+
+用法: python benchmarks/explain_check.py [--database-url postgresql://...] [--verbose]
+"""
+
+import os
+import re
+import sys
+import shutil
+import argparse
+import tempfile
+from datetime import date, datetime, timedelta
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from flask_migrate import upgrade
+from sqlalchemy import event
+from config import Config
+from app import create_app, db
+from app.models.recipe import RecipeNeighbor
+from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
+from app.models.favorite import FavoriteRecipe
+from app.services.recipe_summary_service import RecipeSummaryService
+from app.services.recipe_query_service import RecipeQueryService
+from catalog_snapshot_bench import seed as seed_recipes
+
+# 允许全表扫描的表：单行的目录版本表
+FULL_SCAN_ALLOWED = {'catalog_version'}
+
+# 需要检查的读接口
+HOT_REQUESTS = [
+    '/api/recipes',
+    '/api/recipes?category=川菜',
+    '/api/recipes?difficulty=简单',
+    '/api/recipes?view=summary',
+    '/api/recipes?view=summary&category=川菜',
+    '/api/recipes/{recipe_id}',
+    '/api/recipes/{recipe_id}/similar',
+    '/api/recipes/categories',
+    '/api/ingredients',
+    '/api/ingredients?category=蔬菜',
+    '/api/ingredients/categories',
+    '/api/users/{user_id}',
+    '/api/users/{user_id}/favorites',
+    '/api/users/{user_id}/favorites/check/{recipe_id}',
+    '/api/users/{user_id}/ingredients',
+    '/api/users/{user_id}/shopping-lists',
+    '/api/shopping-lists/{list_id}',
+    '/api/users/{user_id}/preferences',
+    '/api/users/{user_id}/changes?since=0',
+]
+
+# 需要检查的服务调用
+HOT_CALLS = [
+    lambda: RecipeQueryService.search_recipes_by_criteria(difficulty='简单', cooking_time_max=30, limit=10),
+    lambda: RecipeQueryService.search_recipes_by_criteria(category='川菜', limit=10),
+    lambda: RecipeQueryService.get_popular_recipes(category='川菜', limit=10),
+    lambda: RecipeQueryService.get_popular_recipes(limit=10),
+    lambda: RecipeQueryService.get_recipes_by_ingredients(['食材1', '食材2'], limit=10),
+]
+
+class CheckConfig(Config):
+    EVENT_PIPELINE_ENABLED = False
+    CATALOG_SNAPSHOT_ENABLED = False  # 检查数据库路径上的查询
+
+def seed(background_users=50):
+    """
+    在菜谱数据之外构造一个有收藏、库存、购物清单和偏好的用户
+
+    另有background_users个用户拥有同样规模的数据，使按用户过滤的索引具有真实的选择性
+    （只有一个用户时ANALYZE统计会让查询规划器认为索引无用）。
+    """
+    seed_recipes(2000)
+    RecipeSummaryService.rebuild_all()
+
+    db.session.execute(User.__table__.insert(), [
+        {'username': f'background_{i}', 'email': f'background_{i}@example.com', 'change_seq': 0}
+        for i in range(background_users)
+    ])
+    background = [row[0] for row in db.session.query(User.id).all()]
+    now = datetime.utcnow()
+    db.session.execute(FavoriteRecipe.__table__.insert(), [
+        {'user_id': user_id, 'recipe_id': recipe_id, 'created_at': now}
+        for user_id in background for recipe_id in range(100, 150)
+    ])
+    db.session.execute(UserIngredient.__table__.insert(), [
+        {'user_id': user_id, 'ingredient_id': ingredient_id, 'amount': 1}
+        for user_id in background for ingredient_id in range(1, 21)
+    ])
+    db.session.execute(ShoppingList.__table__.insert(), [
+        {'user_id': user_id, 'name': '清单', 'created_at': now} for user_id in background for _ in range(5)
+    ])
+    db.session.execute(UserPreference.__table__.insert(), [
+        {'user_id': user_id, 'preference_type': 'allergy', 'value': 'dairy'} for user_id in background
+    ])
+
+    user = User(username='explain_check', email='explain_check@example.com')
+    db.session.add(user)
+    db.session.flush()
+    db.session.execute(FavoriteRecipe.__table__.insert(), [
+        {'user_id': user.id, 'recipe_id': recipe_id, 'created_at': now - timedelta(minutes=recipe_id)}
+        for recipe_id in range(1, 51)
+    ])
+    db.session.execute(UserIngredient.__table__.insert(), [
+        {'user_id': user.id, 'ingredient_id': ingredient_id, 'amount': 1,
+         'expiry_date': date.today() + timedelta(days=ingredient_id % 7)}
+        for ingredient_id in range(1, 21)
+    ])
+    db.session.execute(ShoppingList.__table__.insert(), [
+        {'user_id': user.id, 'name': f'清单{i}', 'created_at': now - timedelta(days=i)} for i in range(5)
+    ])
+    list_ids = [row[0] for row in db.session.query(ShoppingList.id).filter(ShoppingList.user_id == user.id).all()]
+    db.session.execute(ShoppingListItem.__table__.insert(), [
+        {'shopping_list_id': list_id, 'ingredient_id': ingredient_id, 'amount': 1, 'is_purchased': False}
+        for list_id in list_ids for ingredient_id in range(1, 11)
+    ])
+    db.session.execute(UserPreference.__table__.insert(), [
+        {'user_id': user.id, 'preference_type': 'allergy', 'value': 'nuts'},
+        {'user_id': user.id, 'preference_type': 'preferred_category', 'value': '川菜'},
+    ])
+    db.session.execute(RecipeNeighbor.__table__.insert(), [
+        {'recipe_id': 1, 'rank': rank, 'neighbor_id': rank + 1, 'score': 1 / rank, 'built_at': now}
+        for rank in range(1, 11)
+    ])
+    db.session.commit()
+    return {'user_id': user.id, 'recipe_id': 1, 'list_id': list_ids[0]}
+
+def full_scans_sqlite(connection, statement, parameters, tables):
+    """返回SQLite执行计划中的问题（全表扫描的表、无法利用索引的排序）"""
+    rows = connection.exec_driver_sql(f'EXPLAIN QUERY PLAN {statement}', parameters).all()
+    limited = re.search(r'\bLIMIT\b[^)]*$', statement) is not None  # 最外层带LIMIT
+    problems = []
+    for row in rows:
+        detail = row[-1]
+        match = re.match(r'SCAN (\w+)', detail)
+        if match and 'USING' not in detail and match.group(1) in tables \
+                and match.group(1) not in FULL_SCAN_ALLOWED:
+            problems.append(detail)
+        elif limited and detail.startswith('USE TEMP B-TREE FOR ORDER BY'):
+            problems.append(detail)
+    return problems, [row[-1] for row in rows]
+
+def full_scans_postgresql(connection, statement, parameters, tables):
+    """返回PostgreSQL执行计划中的顺序扫描节点"""
+    plan = connection.exec_driver_sql(f'EXPLAIN (FORMAT JSON) {statement}', parameters).scalar()
+    problems, nodes = [], []
+
+    def walk(node):
+        relation = node.get('Relation Name')
+        nodes.append(f"{node['Node Type']} {relation or ''}".strip())
+        if node['Node Type'] == 'Seq Scan' and relation not in FULL_SCAN_ALLOWED:
+            problems.append(f'Seq Scan on {relation}')
+        for child in node.get('Plans', []):
+            walk(child)
+
+    walk(plan[0]['Plan'])
+    return problems, nodes
+
+def main():
+    parser = argparse.ArgumentParser(description='热点查询执行计划检查')
+    parser.add_argument('--database-url', help='已执行迁移的数据库，默认新建临时SQLite数据库')
+    parser.add_argument('--verbose', action='store_true', help='输出每条语句的执行计划')
+    args = parser.parse_args()
+
+    directory = None
+    if args.database_url:
+        CheckConfig.SQLALCHEMY_DATABASE_URI = args.database_url
+    else:
+        directory = tempfile.mkdtemp(prefix='explain-check-')
+        CheckConfig.SQLALCHEMY_DATABASE_URI = f'sqlite:///{os.path.join(directory, "explain.db")}'
+
+    try:
+        app = create_app(CheckConfig)
+        client = app.test_client()
+        with app.app_context():
+            if directory:
+                upgrade()  # 用迁移脚本建库，同时验证迁移产生的索引
+                ids = seed()
+                db.session.execute(db.text('ANALYZE'))
+                db.session.commit()
+            else:
+                ids = {
+                    'user_id': db.session.query(db.func.min(User.id)).scalar(),
+                    'recipe_id': db.session.query(db.func.min(RecipeNeighbor.recipe_id)).scalar() or 1,
+                    'list_id': db.session.query(db.func.min(ShoppingList.id)).scalar()
+                }
+
+            captured = {}
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if not executemany and statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+                    captured.setdefault(statement, (parameters, source))
+
+            event.listen(db.engine, 'before_cursor_execute', capture)
+            for template in HOT_REQUESTS:
+                source = template.format(**ids)
+                db.session.remove()
+                response = client.get(source)
+                if response.status_code >= 400:
+                    print(f'⚠️  {source} 返回 {response.status_code}')
+            for index, call in enumerate(HOT_CALLS):
+                source = f'RecipeQueryService调用#{index + 1}'
+                db.session.remove()
+                call()
+            event.remove(db.engine, 'before_cursor_execute', capture)
+
+            tables = set(db.metadata.tables)
+            failures = 0
+            with db.engine.connect() as connection:
+                if connection.dialect.name == 'postgresql':
+                    connection.exec_driver_sql('SET enable_seqscan = off')
+                    explain = full_scans_postgresql
+                else:
+                    explain = full_scans_sqlite
+                for statement, (parameters, source) in captured.items():
+                    problems, plan = explain(connection, statement, parameters, tables)
+                    failures += bool(problems)
+                    if problems or args.verbose:
+                        print(f"{'❌' if problems else '✅'} [{source}] {' '.join(statement.split())[:160]}")
+                        for line in plan:
+                            print(f'     {line}')
+    finally:
+        if directory:
+            shutil.rmtree(directory, ignore_errors=True)
+
+    if failures:
+        print(f'\n❌ {failures}/{len(captured)} 条查询存在全表扫描或无法利用索引的排序')
+        sys.exit(1)
+    print(f'\n✅ {len(captured)} 条查询均使用了索引')
+
+if __name__ == '__main__':
+    main()
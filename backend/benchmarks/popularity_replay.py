@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+热度计算回放基准
+生成一个月的合成事件（浏览、收藏、加入规划，菜谱热度服从Zipf分布），
+按批增量写入计数，每天执行一次衰减计算，统计写入吞吐、批量计算耗时和热门查询耗时。
+
+用法: python benchmarks/popularity_replay.py [--recipes 10000] [--events-per-day 20000] [--days 30]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from collections import Counter
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.models.recipe import Recipe
+from app.services.popularity_service import PopularityService
+from app.services.recipe_query_service import RecipeQueryService
+
+# 事件类型分布
+EVENT_MIX = [('view', 0.85), ('favorite', 0.05), ('plan', 0.10)]
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or 'sqlite://'
+
+def seed_recipes(count, start):
+    """批量插入测试菜谱"""
+    rows = [{
+        'name': f'测试菜谱{i}', 'difficulty': '简单', 'cooking_time': 30, 'servings': 2,
+        'category': ('早餐', '午餐', '晚餐')[i % 3], 'created_at': start, 'updated_at': start
+    } for i in range(count)]
+    for offset in range(0, count, 5000):
+        db.session.execute(Recipe.__table__.insert(), rows[offset:offset + 5000])
+    db.session.commit()
+    return [row[0] for row in db.session.query(Recipe.id).order_by(Recipe.id).all()]
+
+def main():
+    parser = argparse.ArgumentParser(description='热度计算回放基准')
+    parser.add_argument('--recipes', type=int, default=10000, help='菜谱数量')
+    parser.add_argument('--events-per-day', type=int, default=20000, help='每天的事件数')
+    parser.add_argument('--days', type=int, default=30, help='回放天数')
+    parser.add_argument('--batch-size', type=int, default=1000, help='每批写入的事件数')
+    parser.add_argument('--zipf', type=float, default=1.1, help='Zipf分布参数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        start = datetime(2024, 1, 1)
+        recipe_ids = seed_recipes(args.recipes, start)
+
+        # 按Zipf分布为菜谱分配热度，打乱顺序避免热度与ID相关
+        ranked = recipe_ids[:]
+        rng.shuffle(ranked)
+        cum_weights = list(accumulate(1 / (rank + 1) ** args.zipf for rank in range(len(ranked))))
+        event_types = [name for name, _ in EVENT_MIX]
+        event_weights = [weight for _, weight in EVENT_MIX]
+
+        write_time = 0.0
+        recompute_time = 0.0
+        total_events = 0
+        for day in range(args.days):
+            targets = rng.choices(ranked, cum_weights=cum_weights, k=args.events_per_day)
+            types = rng.choices(event_types, weights=event_weights, k=args.events_per_day)
+
+            # 模拟事件管道：按批聚合后增量写入
+            for offset in range(0, args.events_per_day, args.batch_size):
+                batch = Counter(zip(types[offset:offset + args.batch_size], targets[offset:offset + args.batch_size]))
+                per_type = {}
+                for (event_type, recipe_id), count in batch.items():
+                    per_type.setdefault(event_type, {})[recipe_id] = count
+
+                begin = time.perf_counter()
+                for event_type, counts in per_type.items():
+                    PopularityService.record(event_type, counts)
+                db.session.commit()
+                write_time += time.perf_counter() - begin
+            total_events += args.events_per_day
+
+            begin = time.perf_counter()
+            PopularityService.recompute_scores(now=start + timedelta(days=day + 1))
+            recompute_time += time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for _ in range(100):
+            RecipeQueryService.get_popular_recipes(category='午餐', limit=10)
+        popular_time = (time.perf_counter() - begin) / 100
+
+        top = Recipe.query.order_by(Recipe.popularity_score.desc()).limit(5).all()
+
+    print(f"📊 回放 {args.days} 天、{total_events} 个事件，{args.recipes} 个菜谱")
+    print(f"  增量写入: {write_time:.2f}s（{total_events / write_time:.0f} 事件/秒）")
+    print(f"  每日衰减计算: 平均 {recompute_time / args.days * 1000:.1f} ms")
+    print(f"  热门查询（含格式化）: 平均 {popular_time * 1000:.2f} ms")
+    print("  热度前5:")
+    for recipe in top:
+        print(f"    #{recipe.id:<6} 分数 {recipe.popularity_score:10.1f}  浏览 {recipe.view_count}  "
+              f"收藏 {recipe.favorite_count}  规划 {recipe.plan_count}")
+
+if __name__ == '__main__':
+    main()
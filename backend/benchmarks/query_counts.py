@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+查询次数回归检查
+在内存数据库中构造一个拥有50个购物清单、每个清单30个项目、并收藏了20个菜谱（各带步骤和食材）的用户，
+统计各接口执行的SQL语句数，超过预算时以非零状态退出（可在CI中运行）。
+
+用法: python benchmarks/query_counts.py [--lists 50] [--items 30]
+"""
+
+import os
+import sys
+import argparse
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from sqlalchemy import event
+from config import Config
+from app import create_app, db
+from app.models.user import User, ShoppingList, ShoppingListItem
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.recipe import Recipe, Step
+from app.models.favorite import FavoriteRecipe
+
+class CheckConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVENT_PIPELINE_ENABLED = False
+    CATALOG_SNAPSHOT_ENABLED = False  # 检查不依赖进程内快照的数据库读取路径
+
+# (方法, URL模板, 允许的最大查询数)
+BUDGETS = [
+    ('get', '/api/users/{user_id}/shopping-lists', 3),
+    ('get', '/api/users/{user_id}/shopping-lists?page=2&per_page=10', 3),
+    ('get', '/api/shopping-lists/{list_id}', 2),
+    ('get', '/api/shopping-lists/{list_id}?include=', 1),
+    ('get', '/api/users/{user_id}/favorites', 6),
+    ('get', '/api/users/{user_id}/favorites?per_page=50', 6),
+]
+
+FAVORITE_RECIPES = 20
+
+def seed(lists, items):
+    """构造测试用户和购物清单"""
+    user = User(username='query_check', email='query_check@example.com')
+    db.session.add(user)
+    db.session.execute(Ingredient.__table__.insert(), [
+        {'name': f'食材{i}', 'unit': '克'} for i in range(items)
+    ])
+    db.session.flush()
+    ingredient_ids = [row[0] for row in db.session.query(Ingredient.id).all()]
+
+    db.session.execute(ShoppingList.__table__.insert(), [
+        {'user_id': user.id, 'name': f'清单{i}'} for i in range(lists)
+    ])
+    list_ids = [row[0] for row in db.session.query(ShoppingList.id).all()]
+    db.session.execute(ShoppingListItem.__table__.insert(), [
+        {'shopping_list_id': list_id, 'ingredient_id': ingredient_id, 'amount': 1, 'is_purchased': i % 3 == 0}
+        for list_id in list_ids for i, ingredient_id in enumerate(ingredient_ids)
+    ])
+
+    db.session.execute(Recipe.__table__.insert(), [
+        {'name': f'菜谱{i}', 'category': '家常菜'} for i in range(FAVORITE_RECIPES)
+    ])
+    recipe_ids = [row[0] for row in db.session.query(Recipe.id).all()]
+    db.session.execute(Step.__table__.insert(), [
+        {'recipe_id': recipe_id, 'step_number': number, 'description': f'步骤{number}'}
+        for recipe_id in recipe_ids for number in range(1, 4)
+    ])
+    db.session.execute(RecipeIngredient.__table__.insert(), [
+        {'recipe_id': recipe_id, 'ingredient_id': ingredient_id, 'amount': 1}
+        for recipe_id in recipe_ids for ingredient_id in ingredient_ids[:2]
+    ])
+    db.session.execute(FavoriteRecipe.__table__.insert(), [
+        {'user_id': user.id, 'recipe_id': recipe_id} for recipe_id in recipe_ids
+    ])
+    db.session.commit()
+    return user.id, list_ids[0]
+
+def main():
+    parser = argparse.ArgumentParser(description='查询次数回归检查')
+    parser.add_argument('--lists', type=int, default=50, help='购物清单数量')
+    parser.add_argument('--items', type=int, default=30, help='每个清单的项目数量')
+    args = parser.parse_args()
+
+    app = create_app(CheckConfig)
+    client = app.test_client()
+    with app.app_context():
+        db.create_all()
+        user_id, list_id = seed(args.lists, args.items)
+
+        statements = []
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: statements.append(a[2]))
+
+        failures = 0
+        for method, template, budget in BUDGETS:
+            url = template.format(user_id=user_id, list_id=list_id)
+            statements.clear()
+            db.session.remove()  # 每个请求使用新的会话，避免身份映射掩盖查询
+            response = getattr(client, method)(url)
+            count = len(statements)
+            ok = response.status_code < 400 and count <= budget
+            failures += not ok
+            print(f"{'✅' if ok else '❌'} {method.upper()} {url}: {count} 次查询（预算 {budget}），状态 {response.status_code}")
+
+    if failures:
+        print(f"\n❌ {failures} 个接口超出查询预算")
+        sys.exit(1)
+    print("\n✅ 所有接口均在查询预算内")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+JSON序列化微基准
+对比1000个完整菜谱（含步骤和食材）在以下方式下的序列化吞吐：
+  1. 旧实现：手工拼装字典 + isoformat + 标准库json
+  2. 预编译编码器 + 标准库json
+  3. 预编译编码器 + orjson（未安装时跳过）
+
+用法: python benchmarks/serialization_bench.py [--recipes 1000] [--repeat 5]
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+from collections import defaultdict
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.json_provider import FastJSONProvider, orjson
+from app.models.recipe import Recipe, Step, _encode_recipe
+from app.models.ingredient import Ingredient, RecipeIngredient
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+
+def seed(recipe_count, steps_per_recipe=8, ingredients_per_recipe=8):
+    """生成测试菜谱"""
+    ingredients = [Ingredient(name=f'食材{i}', unit='克', category='蔬菜') for i in range(200)]
+    db.session.add_all(ingredients)
+    db.session.flush()
+
+    for i in range(recipe_count):
+        recipe = Recipe(
+            name=f'测试菜谱{i}', description='家常美味，简单易做' * 3, difficulty='简单',
+            cooking_time=30, servings=2, category='家常菜',
+            image_url=f'https://example.com/{i}.jpg'
+        )
+        db.session.add(recipe)
+        db.session.flush()
+        for n in range(steps_per_recipe):
+            db.session.add(Step(recipe_id=recipe.id, step_number=n + 1, description=f'第{n + 1}步，翻炒均匀'))
+        for n in range(ingredients_per_recipe):
+            db.session.add(RecipeIngredient(
+                recipe_id=recipe.id, ingredient_id=ingredients[(i + n * 7) % 200].id, amount=100, note='切片'
+            ))
+    db.session.commit()
+
+def load():
+    """一次性加载菜谱及其关联，排除数据库查询对计时的影响"""
+    recipes = Recipe.query.order_by(Recipe.id).all()
+    steps = defaultdict(list)
+    for step in Step.query.order_by(Step.recipe_id, Step.step_number):
+        steps[step.recipe_id].append(step)
+    recipe_ingredients = defaultdict(list)
+    for ri in RecipeIngredient.query.options(db.joinedload(RecipeIngredient.ingredient)):
+        recipe_ingredients[ri.recipe_id].append(ri)
+    return [(recipe, steps[recipe.id], recipe_ingredients[recipe.id]) for recipe in recipes]
+
+def legacy_payload(recipe, steps, recipe_ingredients):
+    """改造前Recipe.to_dict的字典拼装方式"""
+    return {
+        'id': recipe.id,
+        'name': recipe.name,
+        'description': recipe.description,
+        'difficulty': recipe.difficulty,
+        'cooking_time': recipe.cooking_time,
+        'servings': recipe.servings,
+        'image_url': recipe.image_url,
+        'category': recipe.category,
+        'created_at': recipe.created_at.isoformat() if recipe.created_at else None,
+        'updated_at': recipe.updated_at.isoformat() if recipe.updated_at else None,
+        'steps': [{
+            'id': step.id,
+            'recipe_id': step.recipe_id,
+            'step_number': step.step_number,
+            'description': step.description,
+            'image_url': step.image_url
+        } for step in steps],
+        'ingredients': [{
+            'recipe_id': ri.recipe_id,
+            'ingredient_id': ri.ingredient_id,
+            'ingredient_name': ri.ingredient.name if ri.ingredient else None,
+            'amount': ri.amount,
+            'unit': ri.ingredient.unit if ri.ingredient else None,
+            'note': ri.note
+        } for ri in recipe_ingredients]
+    }
+
+def encoded_payload(recipe, steps, recipe_ingredients):
+    """预编译编码器方式，与Recipe.to_dict一致"""
+    data = _encode_recipe(recipe)
+    data['steps'] = [step.to_dict() for step in steps]
+    data['ingredients'] = [ri.to_dict() for ri in recipe_ingredients]
+    return data
+
+def measure(name, rows, build, dumps, repeat):
+    """返回最优一轮的耗时"""
+    best = None
+    size = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = dumps({'items': [build(*row) for row in rows]})
+        elapsed = time.perf_counter() - start
+        size = len(body)
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<28} {best * 1000:8.1f} ms  {len(rows) / best:10.0f} 菜谱/秒  {size / 1024:8.1f} KB")
+    return best
+
+def main():
+    parser = argparse.ArgumentParser(description='JSON序列化微基准')
+    parser.add_argument('--recipes', type=int, default=1000, help='菜谱数量')
+    parser.add_argument('--repeat', type=int, default=5, help='重复次数（取最优）')
+    args = parser.parse_args()
+
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        seed(args.recipes)
+        rows = load()
+        provider = FastJSONProvider(app)
+
+        print(f"📊 序列化 {len(rows)} 个完整菜谱（最优 / {args.repeat} 轮）")
+        baseline = measure(
+            '旧实现 + json', rows, legacy_payload,
+            lambda obj: json.dumps(obj, ensure_ascii=True, sort_keys=True), args.repeat
+        )
+        measure(
+            '编码器 + json', rows, encoded_payload,
+            lambda obj: json.dumps(obj, default=provider.default, ensure_ascii=True, sort_keys=True), args.repeat
+        )
+        if orjson is not None:
+            fastest = measure('编码器 + orjson', rows, encoded_payload, provider._orjson_dumps, args.repeat)
+            print(f"\n🚀 相对旧实现加速: {baseline / fastest:.1f}x")
+        else:
+            print("\n⚠️  未安装orjson，跳过orjson测试")
+
+if __name__ == '__main__':
+    main()
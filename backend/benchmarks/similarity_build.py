@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+相似菜谱计算基准
+生成合成菜谱目录（食材使用频率服从Zipf分布），统计全量计算、修改少量菜谱后的增量计算和接口读取耗时。
+
+用法: python benchmarks/similarity_build.py [--recipes 100000] [--ingredients 2000]
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from itertools import accumulate
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from config import Config
+from app import create_app, db
+from app.models.recipe import Recipe
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.services.similarity_service import SimilarRecipeService
+from app.services.recipe_summary_service import RecipeSummaryService
+
+class BenchConfig(Config):
+    SQLALCHEMY_DATABASE_URI = os.environ.get('BENCH_DATABASE_URL') or 'sqlite://'
+
+def seed(args, rng, start):
+    """批量插入测试菜谱和食材关联"""
+    db.session.execute(Ingredient.__table__.insert(), [
+        {'name': f'食材{i}', 'unit': '克', 'category': '测试'} for i in range(args.ingredients)
+    ])
+    db.session.execute(Recipe.__table__.insert(), [{
+        'name': f'测试菜谱{i}', 'difficulty': '简单', 'cooking_time': 30, 'servings': 2,
+        'category': '午餐', 'created_at': start, 'updated_at': start
+    } for i in range(args.recipes)])
+
+    ingredient_ids = [row[0] for row in db.session.query(Ingredient.id).order_by(Ingredient.id).all()]
+    cum_weights = list(accumulate(1 / (rank + 1) ** args.zipf for rank in range(len(ingredient_ids))))
+    recipe_ids = [row[0] for row in db.session.query(Recipe.id).order_by(Recipe.id).all()]
+    rows = []
+    for recipe_id in recipe_ids:
+        chosen = set(rng.choices(ingredient_ids, cum_weights=cum_weights, k=rng.randint(4, 14)))
+        rows.extend({'recipe_id': recipe_id, 'ingredient_id': ingredient_id, 'amount': 1} for ingredient_id in chosen)
+        if len(rows) >= 50000:
+            db.session.execute(RecipeIngredient.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(RecipeIngredient.__table__.insert(), rows)
+    db.session.commit()
+    return recipe_ids
+
+def main():
+    parser = argparse.ArgumentParser(description='相似菜谱计算基准')
+    parser.add_argument('--recipes', type=int, default=100000, help='菜谱数量')
+    parser.add_argument('--ingredients', type=int, default=2000, help='食材数量')
+    parser.add_argument('--changed', type=int, default=100, help='增量计算前修改的菜谱数量')
+    parser.add_argument('--top-k', type=int, default=20, help='每个菜谱保存的相似菜谱数量')
+    parser.add_argument('--zipf', type=float, default=1.0, help='食材频率的Zipf分布参数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    app = create_app(BenchConfig)
+    with app.app_context():
+        db.create_all()
+        start = datetime(2024, 1, 1)
+        begin = time.perf_counter()
+        recipe_ids = seed(args, rng, start)
+        RecipeSummaryService.rebuild_all()
+        seed_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        SimilarRecipeService.build(top_k=args.top_k)
+        full_time = time.perf_counter() - begin
+
+        # 修改少量菜谱后增量计算
+        changed = rng.sample(recipe_ids, args.changed)
+        Recipe.query.filter(Recipe.id.in_(changed)).update(
+            {Recipe.updated_at: datetime.utcnow() + timedelta(seconds=1)}, synchronize_session=False
+        )
+        db.session.commit()
+        begin = time.perf_counter()
+        rebuilt = SimilarRecipeService.build_incremental(top_k=args.top_k)
+        incremental_time = time.perf_counter() - begin
+
+        begin = time.perf_counter()
+        for recipe_id in rng.sample(recipe_ids, 200):
+            [(score, summary.to_dict()) for score, summary in SimilarRecipeService.get_similar(recipe_id, 10)]
+        read_time = (time.perf_counter() - begin) / 200
+
+    print(f"📊 {args.recipes} 个菜谱、{args.ingredients} 种食材（造数 {seed_time:.1f}s）")
+    print(f"  全量计算 Top-{args.top_k}: {full_time:.1f}s")
+    print(f"  修改 {args.changed} 个菜谱后增量计算: {incremental_time:.1f}s（重新计算 {rebuilt} 个菜谱）")
+    print(f"  读取相似菜谱: 平均 {read_time * 1000:.2f} ms")
+
+if __name__ == '__main__':
+    main()
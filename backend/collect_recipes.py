@@ -21,6 +21,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 from app import create_app, db
 from app.models.recipe import Recipe, Step
 from app.models.ingredient import Ingredient, RecipeIngredient
+from app.services.catalog_snapshot import CatalogStore
 
 # 配置日志
 logging.basicConfig(
@@ -378,6 +379,7 @@ class RecipeCollector:
                 )
                 db.session.add(recipe_ingredient)
             
+            CatalogStore.bump()
             db.session.commit()
             logger.info(f"成功保存菜谱: {recipe_data['name']}")
             return True
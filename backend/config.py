@@ -22,4 +22,52 @@ class Config:
     
     # DeepSeek API配置
     DEEPSEEK_API_KEY = os.environ.get('DEEPSEEK_API_KEY') or 'your-deepseek-api-key'
-    DEEPSEEK_API_URL = os.environ.get('DEEPSEEK_API_URL') or 'https://api.deepseek.com/v1/chat/completions'
\ No newline at end of file
+    DEEPSEEK_API_URL = os.environ.get('DEEPSEEK_API_URL') or 'https://api.deepseek.com/v1/chat/completions'
+    
+    # 收藏缓存配置
+    FAVORITE_CACHE_MAX_USERS = int(os.environ.get('FAVORITE_CACHE_MAX_USERS') or 1000)
+    FAVORITE_CACHE_MAX_ENTRIES = int(os.environ.get('FAVORITE_CACHE_MAX_ENTRIES') or 200000)
+    FAVORITE_CACHE_TTL = int(os.environ.get('FAVORITE_CACHE_TTL') or 60)
+    
+    # 事件采集配置
+    EVENT_PIPELINE_ENABLED = (os.environ.get('EVENT_PIPELINE_ENABLED') or 'true').lower() == 'true'
+    EVENT_BUFFER_CAPACITY = int(os.environ.get('EVENT_BUFFER_CAPACITY') or 10000)
+    EVENT_FLUSH_BATCH_SIZE = int(os.environ.get('EVENT_FLUSH_BATCH_SIZE') or 500)
+    EVENT_FLUSH_INTERVAL = float(os.environ.get('EVENT_FLUSH_INTERVAL') or 2.0)
+    
+    # 个性化推荐配置
+    RECOMMENDATION_MAX_PROFILES = int(os.environ.get('RECOMMENDATION_MAX_PROFILES') or 2000)
+    RECOMMENDATION_PROFILE_TTL = int(os.environ.get('RECOMMENDATION_PROFILE_TTL') or 300)
+    RECOMMENDATION_CATALOG_TTL = int(os.environ.get('RECOMMENDATION_CATALOG_TTL') or 600)
+    
+    # 库存临期建议配置
+    PANTRY_EXPIRY_HORIZON_DAYS = int(os.environ.get('PANTRY_EXPIRY_HORIZON_DAYS') or 3)
+    PANTRY_CACHE_MAX_USERS = int(os.environ.get('PANTRY_CACHE_MAX_USERS') or 1000)
+    PANTRY_CACHE_TTL = int(os.environ.get('PANTRY_CACHE_TTL') or 300)
+    
+    # 进程内菜谱目录快照配置
+    CATALOG_SNAPSHOT_ENABLED = (os.environ.get('CATALOG_SNAPSHOT_ENABLED') or 'true').lower() == 'true'
+    CATALOG_VERSION_POLL_INTERVAL = float(os.environ.get('CATALOG_VERSION_POLL_INTERVAL') or 2.0)
+    CATALOG_SNAPSHOT_SHARED = (os.environ.get('CATALOG_SNAPSHOT_SHARED') or 'true').lower() == 'true'  # 多个工作进程mmap同一快照文件
+    CATALOG_SNAPSHOT_DIR = os.environ.get('CATALOG_SNAPSHOT_DIR')  # 共享快照文件目录，默认系统临时目录
+    
+    # 请求级SQL统计配置
+    QUERY_STATS_ENABLED = (os.environ.get('QUERY_STATS_ENABLED') or 'true').lower() == 'true'
+    QUERY_STATS_HEADERS = os.environ.get('QUERY_STATS_HEADERS')  # 是否输出Server-Timing/X-Query-Count，未设置时跟随调试模式
+    QUERY_LOG_MAX_QUERIES = int(os.environ.get('QUERY_LOG_MAX_QUERIES') or 30)
+    QUERY_LOG_MAX_DB_MS = float(os.environ.get('QUERY_LOG_MAX_DB_MS') or 500)
+    QUERY_LOG_REPEAT_THRESHOLD = int(os.environ.get('QUERY_LOG_REPEAT_THRESHOLD') or 5)  # 同一语句形状重复执行次数，疑似N+1
+    
+    # 指标配置
+    METRICS_ENABLED = (os.environ.get('METRICS_ENABLED') or 'true').lower() == 'true'
+    METRICS_DIR = os.environ.get('METRICS_DIR') or os.environ.get('PROMETHEUS_MULTIPROC_DIR')  # 各工作进程共享的指标文件目录，默认系统临时目录
+    METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL') or 1.0)
+    
+    # 慢请求采样分析配置（默认关闭）
+    SLOW_REQUEST_PROFILER_ENABLED = (os.environ.get('SLOW_REQUEST_PROFILER_ENABLED') or 'false').lower() == 'true'
+    SLOW_REQUEST_PROFILER_ROUTES = os.environ.get('SLOW_REQUEST_PROFILER_ROUTES') or '/api/meal-plan/generate,/api/recipes/search'  # 逗号分隔的URL规则
+    SLOW_REQUEST_PROFILER_THRESHOLD_MS = float(os.environ.get('SLOW_REQUEST_PROFILER_THRESHOLD_MS') or 1000)
+    SLOW_REQUEST_PROFILER_SAMPLE_RATE = float(os.environ.get('SLOW_REQUEST_PROFILER_SAMPLE_RATE') or 1.0)  # 被采样的请求比例
+    SLOW_REQUEST_PROFILER_INTERVAL_MS = float(os.environ.get('SLOW_REQUEST_PROFILER_INTERVAL_MS') or 5)
+    SLOW_REQUEST_PROFILER_DIR = os.environ.get('SLOW_REQUEST_PROFILER_DIR')  # 折叠栈文件目录，默认系统临时目录
+    SLOW_REQUEST_PROFILER_MAX_FILES = int(os.environ.get('SLOW_REQUEST_PROFILER_MAX_FILES') or 200)  # 每个进程最多写出的文件数
@@ -12,11 +12,17 @@ from datetime import datetime
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+from flask_migrate import stamp
 from app import create_app, db
 from app.models.recipe import Recipe, Step
 from app.models.ingredient import Ingredient, RecipeIngredient
 from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
 from app.models.favorite import FavoriteRecipe
+from app.services.recipe_summary_service import RecipeSummaryService
+from app.services.popularity_service import PopularityService
+from app.services.similarity_service import SimilarRecipeService, DEFAULT_TOP_K
+from app.services.migration_runner import MigrationRunner
+from app.services.backup_service import BackupService
 
 class DatabaseManager:
     def __init__(self):
@@ -26,9 +32,17 @@ class DatabaseManager:
         """初始化数据库"""
         with self.app.app_context():
             try:
-                # 创建所有表
-                db.create_all()
-                print("✅ 数据库表创建成功")
+                if not db.inspect(db.engine).get_table_names():
+                    # 空库建出的就是最新结构，直接标记为最新迁移版本
+                    db.create_all()
+                    stamp()
+                    print("✅ 数据库表创建成功")
+                else:
+                    # 已有数据库：create_all只会补建缺失的表、不会添加新列，按迁移版本升级
+                    runner = MigrationRunner()
+                    runner.stamp_existing()
+                    runner.run()
+                    print(f"✅ 数据库架构为最新版本 {runner.current_revision()}")
                 
                 # 检查是否已有数据
                 if Ingredient.query.count() > 0:
@@ -95,6 +109,44 @@ class DatabaseManager:
                 print(f"❌ 图片URL更新失败: {str(e)}")
                 raise
     
+    def rebuild_summaries(self):
+        """重建菜谱摘要表"""
+        with self.app.app_context():
+            try:
+                count = RecipeSummaryService.rebuild_all()
+                print(f"✅ 重建了 {count} 条菜谱摘要")
+                
+            except Exception as e:
+                print(f"❌ 菜谱摘要重建失败: {str(e)}")
+                raise
+    
+    def recompute_popularity(self):
+        """批量计算菜谱热度分（建议由定时任务每小时或每天执行）"""
+        with self.app.app_context():
+            try:
+                count = PopularityService.recompute_scores()
+                print(f"✅ 更新了 {count} 个菜谱的热度分")
+                
+            except Exception as e:
+                print(f"❌ 热度计算失败: {str(e)}")
+                raise
+    
+    def build_similar(self, incremental=False, top_k=DEFAULT_TOP_K):
+        """计算相似菜谱（incremental时只重新计算受变更影响的菜谱）"""
+        with self.app.app_context():
+            try:
+                start = datetime.now()
+                if incremental:
+                    count = SimilarRecipeService.build_incremental(top_k=top_k)
+                else:
+                    count = SimilarRecipeService.build(top_k=top_k)
+                elapsed = (datetime.now() - start).total_seconds()
+                print(f"✅ 计算了 {count} 个菜谱的相似菜谱，耗时 {elapsed:.1f}s")
+                
+            except Exception as e:
+                print(f"❌ 相似菜谱计算失败: {str(e)}")
+                raise
+    
     def reset_database(self):
         """重置数据库（危险操作）"""
         with self.app.app_context():
@@ -109,8 +161,9 @@ class DatabaseManager:
                 db.drop_all()
                 print("✅ 数据库表已删除")
                 
-                # 重新创建表
+                # 重新创建表（最新结构），标记为最新迁移版本
                 db.create_all()
+                stamp()
                 print("✅ 数据库表已重新创建")
                 
                 # 重新初始化数据
@@ -122,86 +175,92 @@ class DatabaseManager:
                 print(f"❌ 数据库重置失败: {str(e)}")
                 raise
     
-    def backup_data(self):
-        """备份关键数据"""
+    def backup_data(self, output=None, batch_size=None):
+        """
+        流式备份全部表（每张表一个gzip压缩的JSONL文件）
+        
+        Args:
+            output: 备份目录，默认为 backup_<时间戳>
+            batch_size: 每次从游标读取的行数
+        """
         with self.app.app_context():
             try:
-                backup_data = {
-                    'timestamp': datetime.now().isoformat(),
-                    'recipes': [],
-                    'ingredients': [],
-                    'users': []
-                }
-                
-                # 备份菜谱
-                for recipe in Recipe.query.all():
-                    backup_data['recipes'].append({
-                        'name': recipe.name,
-                        'description': recipe.description,
-                        'category': recipe.category,
-                        'difficulty': recipe.difficulty,
-                        'cooking_time': recipe.cooking_time,
-                        'image_url': recipe.image_url
-                    })
-                
-                # 备份食材
-                for ingredient in Ingredient.query.all():
-                    backup_data['ingredients'].append({
-                        'name': ingredient.name,
-                        'unit': ingredient.unit,
-                        'category': ingredient.category
-                    })
-                
-                # 备份用户（不包含敏感信息）
-                for user in User.query.all():
-                    backup_data['users'].append({
-                        'username': user.username,
-                        'email': user.email,
-                        'created_at': user.created_at.isoformat() if user.created_at else None
-                    })
-                
-                # 保存备份文件
-                import json
-                backup_filename = f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-                with open(backup_filename, 'w', encoding='utf-8') as f:
-                    json.dump(backup_data, f, ensure_ascii=False, indent=2)
-                
-                print(f"✅ 数据备份完成: {backup_filename}")
+                output = output or f"backup_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+                stats = BackupService.backup(output, batch_size or 5000, progress=self._report_table)
+                self._report_total(stats)
+                print(f"✅ 数据备份完成: {output}（文件中包含密码哈希，请妥善保管）")
                 
             except Exception as e:
                 print(f"❌ 数据备份失败: {str(e)}")
                 raise
     
-    def migrate_schema(self):
-        """执行数据库架构迁移"""
+    def restore_data(self, source, batch_size=None, confirmed=False):
+        """
+        从backup生成的目录恢复全部表（会清空现有数据）
+        
+        Args:
+            source: 备份目录
+            batch_size: 每批插入的行数
+            confirmed: 跳过确认提示
+        """
         with self.app.app_context():
             try:
-                # 这里可以添加具体的迁移逻辑
-                # 例如：添加新字段、修改表结构等
+                manifest = BackupService.read_manifest(source)
+                print(f"📦 备份时间: {manifest['created_at']}，迁移版本: {manifest['revision']}")
+                current = MigrationRunner.current_revision()
+                if manifest['revision'] != current:
+                    print(f"⚠️  当前数据库迁移版本为 {current}，与备份不一致，缺失的列将使用默认值")
                 
-                # 示例：为Recipe表添加新字段（如果不存在）
-                from sqlalchemy import text
+                if not confirmed:
+                    confirm = input("⚠️  这将清空现有数据！请输入 'RESTORE' 确认: ")
+                    if confirm != 'RESTORE':
+                        print("❌ 操作已取消")
+                        return
                 
-                # 检查字段是否存在
-                with db.engine.connect() as connection:
-                    result = connection.execute(text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='recipe' AND column_name='nutrition_info'
-                    """))
-                    
-                    if not result.fetchone():
-                        # 添加新字段
-                        connection.execute(text("""
-                            ALTER TABLE recipe 
-                            ADD COLUMN nutrition_info TEXT
-                        """))
-                        connection.commit()
-                        print("✅ 添加了 nutrition_info 字段")
-                    else:
-                        print("ℹ️  nutrition_info 字段已存在")
-                
-                print("✅ 数据库架构迁移完成")
+                stats = BackupService.restore(source, batch_size or 5000, progress=self._report_table)
+                self._report_total(stats)
+                print("✅ 数据恢复完成")
+                
+            except Exception as e:
+                print(f"❌ 数据恢复失败: {str(e)}")
+                raise
+    
+    @staticmethod
+    def _report_table(stats):
+        print(f"   {stats.table}: {stats.rows} 行, {stats.elapsed:.1f}s, {stats.rate:.0f} 行/秒")
+    
+    @staticmethod
+    def _report_total(stats):
+        rows = sum(item.rows for item in stats.values())
+        elapsed = sum(item.elapsed for item in stats.values())
+        print(f"📊 共 {len(stats)} 张表, {rows} 行, {elapsed:.1f}s, {rows / elapsed if elapsed else 0:.0f} 行/秒")
+    
+    def migrate_schema(self, target='head', dry_run=False, batch_size=None, pause=None, backfill=None):
+        """
+        执行数据库架构迁移（Flask-Migrate版本，逐个版本升级并分批回填数据）
+        
+        Args:
+            target: 目标版本
+            dry_run: 只输出将执行的SQL和回填的行数、耗时预估
+            batch_size: 回填每批的行数
+            pause: 回填批间暂停秒数
+            backfill: 只重跑指定版本的回填（回填中断后使用）
+        """
+        with self.app.app_context():
+            try:
+                runner = MigrationRunner(batch_size=batch_size, pause=pause)
+                if backfill:
+                    rows = runner.run_backfills(backfill)
+                    print(f"✅ 版本 {backfill} 回填完成，更新 {rows} 行")
+                    return
+                
+                # migrations引入前用create_all建立的库：按表和列判断对应的版本，都不一致时报错，不做标记
+                start = runner.stamp_existing(dry_run)
+                revisions = runner.run(target, dry_run=dry_run, start=start)
+                if dry_run:
+                    print(f"\nℹ️  dry-run: {len(revisions)} 个待执行版本，数据库未修改")
+                else:
+                    print(f"✅ 数据库架构迁移完成，当前版本 {runner.current_revision()}")
                 
             except Exception as e:
                 print(f"❌ 数据库迁移失败: {str(e)}")
@@ -210,8 +269,19 @@ class DatabaseManager:
 def main():
     parser = argparse.ArgumentParser(description='EasyCook数据库管理工具')
     parser.add_argument('action', choices=[
-        'init', 'status', 'update-images', 'reset', 'backup', 'migrate'
+        'init', 'status', 'update-images', 'reset', 'backup', 'restore', 'migrate',
+        'rebuild-summaries', 'recompute-popularity', 'build-similar'
     ], help='要执行的操作')
+    parser.add_argument('--incremental', action='store_true', help='build-similar时只计算受变更影响的菜谱')
+    parser.add_argument('--top-k', type=int, default=DEFAULT_TOP_K, help='build-similar时每个菜谱保存的相似菜谱数量')
+    parser.add_argument('--dry-run', action='store_true', help='migrate时只输出SQL和回填预估，不修改数据库')
+    parser.add_argument('--target', default='head', help='migrate的目标版本')
+    parser.add_argument('--batch-size', type=int, help='每批的行数（migrate回填、backup、restore）')
+    parser.add_argument('--pause', type=float, help='migrate回填时批间暂停的秒数')
+    parser.add_argument('--backfill', metavar='REVISION', help='migrate时只重跑指定版本的回填')
+    parser.add_argument('--output', help='backup的输出目录')
+    parser.add_argument('--input', help='restore的备份目录')
+    parser.add_argument('--yes', action='store_true', help='restore时跳过确认提示')
     
     args = parser.parse_args()
     
@@ -232,9 +302,19 @@ def main():
         elif args.action == 'reset':
             manager.reset_database()
         elif args.action == 'backup':
-            manager.backup_data()
+            manager.backup_data(args.output, args.batch_size)
+        elif args.action == 'restore':
+            if not args.input:
+                parser.error('restore需要指定 --input 备份目录')
+            manager.restore_data(args.input, args.batch_size, args.yes)
         elif args.action == 'migrate':
-            manager.migrate_schema()
+            manager.migrate_schema(args.target, args.dry_run, args.batch_size, args.pause, args.backfill)
+        elif args.action == 'rebuild-summaries':
+            manager.rebuild_summaries()
+        elif args.action == 'recompute-popularity':
+            manager.recompute_popularity()
+        elif args.action == 'build-similar':
+            manager.build_similar(args.incremental, args.top_k)
         
         print("\n✅ 操作完成!")
         
@@ -1,23 +1,55 @@
 import os
 import sys
+import argparse
 from datetime import datetime, timedelta
 import random
 
 # 添加项目根目录到 Python 路径
 sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
 
+from flask_migrate import stamp
 from app import create_app, db
 from app.models.recipe import Recipe, Step
 from app.models.ingredient import Ingredient, RecipeIngredient
 from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
 from app.models.favorite import FavoriteRecipe
+from app.services.recipe_summary_service import RecipeSummaryService
+from app.services.popularity_service import PopularityService
+from app.services.catalog_snapshot import CatalogStore
+from app.services.migration_runner import MigrationRunner
 
 app = create_app()
 
+def create_tables():
+    """
+    创建所有表；空库建出的就是最新结构，直接标记为最新迁移版本，之后可用flask db upgrade升级。
+    已有数据库按迁移版本升级（create_all只会补建缺失的表、不会添加新列）
+    """
+    if not db.inspect(db.engine).get_table_names():
+        db.create_all()
+        stamp()
+        return
+    runner = MigrationRunner()
+    runner.stamp_existing()
+    runner.run()
+
+def init_synthetic(config):
+    """在空库上生成大规模合成数据（压测、基准用），参数见synthetic_data.SyntheticConfig"""
+    from synthetic_data import generate
+    
+    with app.app_context():
+        create_tables()
+        if Recipe.query.first() is not None:
+            print("数据库中已有菜谱，合成数据只能生成到空库，跳过")
+            return
+        
+        counts = generate(config)
+        for table, rows in counts.items():
+            print(f"  {table}: {rows} 行")
+
 def init_db():
     with app.app_context():
-        # 创建所有表
-        db.create_all()
+        create_tables()
         
         # 检查是否已有数据
         if Ingredient.query.count() > 0:
@@ -324,6 +356,7 @@ def init_db():
                     )
                     db.session.add(recipe_ingredient)
         
+        CatalogStore.bump()
         db.session.commit()
         print(f"添加了 {len(recipes)} 个菜谱")
         
@@ -481,7 +514,33 @@ def init_db():
         
         db.session.commit()
         print(f"添加了{len(created_users)}个测试用户和相关数据，包括收藏菜谱")
+        
+        # 生成菜谱摘要投影
+        summary_count = RecipeSummaryService.rebuild_all()
+        print(f"生成了 {summary_count} 条菜谱摘要")
+        
+        # 初始化热度计数
+        PopularityService.rebuild_counters()
 
 if __name__ == "__main__":
-    init_db()
+    parser = argparse.ArgumentParser(description='初始化数据库')
+    parser.add_argument('--synthetic', action='store_true', help='生成大规模合成数据，而不是内置的示例菜谱')
+    parser.add_argument('--recipes', type=int, default=10000, help='合成菜谱数量')
+    parser.add_argument('--users', type=int, default=1000, help='合成用户数量')
+    parser.add_argument('--ingredients', type=int, default=2000, help='合成食材数量')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子，相同种子和参数生成相同的数据')
+    parser.add_argument('--recipe-zipf', type=float, default=1.1, help='菜谱热度（收藏）的Zipf指数')
+    parser.add_argument('--ingredient-zipf', type=float, default=1.0, help='食材使用频率的Zipf指数')
+    parser.add_argument('--favorites-per-user', type=float, default=20, help='每个用户收藏数的均值')
+    args = parser.parse_args()
+    
+    if args.synthetic:
+        from synthetic_data import SyntheticConfig
+        init_synthetic(SyntheticConfig(
+            recipes=args.recipes, users=args.users, ingredients=args.ingredients, seed=args.seed,
+            recipe_zipf=args.recipe_zipf, ingredient_zipf=args.ingredient_zipf,
+            favorites_per_user=args.favorites_per_user
+        ))
+    else:
+        init_db()
     print("数据库初始化完成")
\ No newline at end of file
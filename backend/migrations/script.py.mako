@@ -0,0 +1,29 @@
+"""${message}
+
+Revision ID: ${up_revision}
+Revises: ${down_revision | comma,n}
+Create Date: ${create_date}
+
+"""
+from alembic import op
+import sqlalchemy as sa
+${imports if imports else ""}
+
+# revision identifiers, used by Alembic.
+revision = ${repr(up_revision)}
+down_revision = ${repr(down_revision)}
+branch_labels = ${repr(branch_labels)}
+depends_on = ${repr(depends_on)}
+
+# 大表数据回填：新增列以可空、无默认值的方式添加，数据由 db_manager.py migrate 在upgrade()后分批写入，例如
+# from app.services.backfill import Backfill
+# BACKFILLS = [Backfill('recipes', {'nutrition_info': "'{}'"}, where='nutrition_info IS NULL')]
+BACKFILLS = []
+
+
+def upgrade():
+    ${upgrades if upgrades else "pass"}
+
+
+def downgrade():
+    ${downgrades if downgrades else "pass"}
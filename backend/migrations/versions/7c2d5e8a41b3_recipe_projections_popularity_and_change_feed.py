@@ -0,0 +1,208 @@
+"""recipe projections, popularity and change feed
+
+Revision ID: 7c2d5e8a41b3
+Revises: 0e94ecbc14e5
+Create Date: 2026-10-19 16:47:52.308417
+
+基线之后新增的表和列：
+- recipe_summaries：列表视图读取的菜谱摘要投影
+- recipes的累计计数和热度分列，recipe_events：浏览、加入规划事件的批量写入缓冲
+- recipe_neighbors：预先计算的相似菜谱（由 db_manager.py build-similar 生成，迁移不回填）
+- users.change_seq、user_changes：移动端增量同步的变更序号和变更记录
+- shopping_list_items.updated_at：离线批量更新按此判断先后
+- catalog_version：菜谱目录版本号（首次写入菜谱时创建）
+
+计数列带常量默认值，添加时只修改表定义（PostgreSQL 11+、SQLite），不重写表；
+摘要、热度分和变更序号由BACKFILLS分批写入。
+已有表上的索引在PostgreSQL上使用CREATE/DROP INDEX CONCURRENTLY，不阻塞线上写入。
+"""
+from alembic import op
+import sqlalchemy as sa
+
+from app.services.backfill import Backfill
+
+
+# revision identifiers, used by Alembic.
+revision = '7c2d5e8a41b3'
+down_revision = '0e94ecbc14e5'
+branch_labels = None
+depends_on = None
+
+_FAVORITES = '(SELECT count(*) FROM favorite_recipes WHERE favorite_recipes.recipe_id = {table}.{key})'
+_UTC_NOW = {'postgresql': "timezone('utc', now())", 'default': 'CURRENT_TIMESTAMP'}
+_INGREDIENT_CATEGORIES = (
+    "FROM recipe_ingredients JOIN ingredients ON ingredients.id = recipe_ingredients.ingredient_id "
+    "WHERE recipe_ingredients.recipe_id = recipe_summaries.recipe_id AND ingredients.category <> '' "
+    "AND ingredients.category <> COALESCE(recipe_summaries.category, '')"
+)
+_LAST_SEQ = '(SELECT COALESCE(max(seq), 0) FROM user_changes WHERE user_changes.user_id = users.id)'
+
+# 已有表上新增的索引：(索引名, 表名, 列)
+EXISTING_TABLE_INDEXES = [
+    ('ix_recipes_category_popularity', 'recipes', ['category', 'popularity_score']),
+    ('ix_recipes_popularity_score', 'recipes', ['popularity_score']),
+    ('ix_shopping_list_items_shopping_list_id', 'shopping_list_items', ['shopping_list_id']),
+]
+
+BACKFILLS = [
+    # 与PopularityService.rebuild_counters()一致：按收藏表计算累计收藏数，以收藏数 * 收藏权重(5.0)作为初始热度
+    Backfill('recipes', {
+        'favorite_count': _FAVORITES.format(table='recipes', key='id'),
+        'popularity_score': _FAVORITES.format(table='recipes', key='id') + ' * 5.0',
+        'popularity_updated_at': _UTC_NOW,
+    }, where='popularity_updated_at IS NULL'),
+    # 与RecipeSummaryService.refresh()一致：标签为菜谱分类加上去重后的食材分类
+    Backfill('recipe_summaries', {
+        'ingredient_count': '(SELECT count(*) FROM recipe_ingredients '
+                            'WHERE recipe_ingredients.recipe_id = recipe_summaries.recipe_id)',
+        'step_count': '(SELECT count(*) FROM steps WHERE steps.recipe_id = recipe_summaries.recipe_id)',
+        'favorite_count': _FAVORITES.format(table='recipe_summaries', key='recipe_id'),
+        'tags': {
+            'postgresql': "left(btrim(COALESCE(recipe_summaries.category, '') || ',' || COALESCE("
+                          f"(SELECT string_agg(DISTINCT ingredients.category, ',') {_INGREDIENT_CATEGORIES}), ''), ','), 255)",
+            'default': "substr(trim(COALESCE(recipe_summaries.category, '') || ',' || COALESCE("
+                       f"(SELECT group_concat(DISTINCT ingredients.category) {_INGREDIENT_CATEGORIES}), ''), ','), 1, 255)",
+        },
+    }, key='recipe_id', where='step_count IS NULL'),
+    # 变更序号与已有的变更记录对齐（基线库没有变更记录，保持默认值0）
+    Backfill('users', {'change_seq': _LAST_SEQ}, where=f'change_seq < {_LAST_SEQ}'),
+]
+
+
+def _create_indexes(indexes):
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes:
+                op.create_index(name, table, columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def _drop_indexes(indexes):
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in indexes:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in indexes:
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade():
+    op.create_table('catalog_version',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_table('recipe_events',
+    sa.Column('id', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('event_type', sa.String(length=20), nullable=False),
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('recipe_events', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipe_events_created_at'), ['created_at'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recipe_events_recipe_id'), ['recipe_id'], unique=False)
+
+    op.create_table('user_changes',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('seq', sa.BigInteger().with_variant(sa.Integer(), 'sqlite'), nullable=False),
+    sa.Column('entity', sa.String(length=30), nullable=False),
+    sa.Column('entity_id', sa.Integer(), nullable=False),
+    sa.Column('op', sa.String(length=10), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('user_id', 'seq')
+    )
+    op.create_table('recipe_neighbors',
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('rank', sa.Integer(), nullable=False),
+    sa.Column('neighbor_id', sa.Integer(), nullable=False),
+    sa.Column('score', sa.Float(), nullable=False),
+    sa.Column('built_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ),
+    sa.PrimaryKeyConstraint('recipe_id', 'rank')
+    )
+    with op.batch_alter_table('recipe_neighbors', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipe_neighbors_neighbor_id'), ['neighbor_id'], unique=False)
+
+    op.create_table('recipe_summaries',
+    sa.Column('recipe_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('difficulty', sa.String(length=20), nullable=True),
+    sa.Column('cooking_time', sa.Integer(), nullable=True),
+    sa.Column('image_url', sa.String(length=255), nullable=True),
+    sa.Column('category', sa.String(length=50), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('ingredient_count', sa.Integer(), nullable=True),
+    sa.Column('step_count', sa.Integer(), nullable=True),
+    sa.Column('favorite_count', sa.Integer(), nullable=True),
+    sa.Column('tags', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['recipe_id'], ['recipes.id'], ),
+    sa.PrimaryKeyConstraint('recipe_id')
+    )
+    with op.batch_alter_table('recipe_summaries', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_recipe_summaries_category'), ['category'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recipe_summaries_created_at'), ['created_at'], unique=False)
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('favorite_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('view_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('plan_count', sa.Integer(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('recent_activity', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('popularity_score', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('popularity_updated_at', sa.DateTime(), nullable=True))
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('change_seq', sa.BigInteger(), server_default='0', nullable=False))
+
+    with op.batch_alter_table('shopping_list_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('updated_at', sa.DateTime(), nullable=True))
+
+    # 摘要行先按菜谱的基本字段插入，统计和标签由回填写入（step_count为NULL表示尚未回填）
+    op.execute(
+        'INSERT INTO recipe_summaries (recipe_id, name, difficulty, cooking_time, image_url, category, created_at) '
+        'SELECT id, name, difficulty, cooking_time, image_url, category, created_at FROM recipes'
+    )
+
+    # PostgreSQL上会先提交之前的DDL，索引在事务外并发创建
+    _create_indexes(EXISTING_TABLE_INDEXES)
+
+
+def downgrade():
+    _drop_indexes(EXISTING_TABLE_INDEXES)
+
+    with op.batch_alter_table('shopping_list_items', schema=None) as batch_op:
+        batch_op.drop_column('updated_at')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_column('change_seq')
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_column('popularity_updated_at')
+        batch_op.drop_column('popularity_score')
+        batch_op.drop_column('recent_activity')
+        batch_op.drop_column('plan_count')
+        batch_op.drop_column('view_count')
+        batch_op.drop_column('favorite_count')
+
+    with op.batch_alter_table('recipe_summaries', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipe_summaries_created_at'))
+        batch_op.drop_index(batch_op.f('ix_recipe_summaries_category'))
+
+    op.drop_table('recipe_summaries')
+    with op.batch_alter_table('recipe_neighbors', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipe_neighbors_neighbor_id'))
+
+    op.drop_table('recipe_neighbors')
+    op.drop_table('user_changes')
+    with op.batch_alter_table('recipe_events', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_recipe_events_recipe_id'))
+        batch_op.drop_index(batch_op.f('ix_recipe_events_created_at'))
+
+    op.drop_table('recipe_events')
+    op.drop_table('catalog_version')
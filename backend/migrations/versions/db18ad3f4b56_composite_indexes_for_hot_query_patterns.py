@@ -0,0 +1,76 @@
+"""composite indexes for hot query patterns
+
+Revision ID: db18ad3f4b56
+Revises: 7c2d5e8a41b3
+Create Date: 2026-10-19 16:48:09.796253
+
+按路由和服务中的实际查询补充索引（benchmarks/explain_check.py逐条验证）：
+- 菜谱列表按创建时间倒序分页，可按分类筛选；AI查询按难度和烹饪时间筛选
+- 步骤按菜谱读取并按序号排序，按食材反查菜谱
+- 收藏按用户和时间倒序读取、按菜谱统计；购物清单按用户和时间倒序分页
+- 食材按分类筛选并按名称排序；用户偏好按用户和类型读取
+以分类开头的单列索引被新的组合索引覆盖，一并删除。
+
+PostgreSQL上使用CREATE/DROP INDEX CONCURRENTLY，不阻塞线上写入。
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'db18ad3f4b56'
+down_revision = '7c2d5e8a41b3'
+branch_labels = None
+depends_on = None
+
+# (索引名, 表名, 列)
+NEW_INDEXES = [
+    ('ix_recipes_created_at', 'recipes', ['created_at']),
+    ('ix_recipes_category_created', 'recipes', ['category', 'created_at']),
+    ('ix_recipes_difficulty_cooking_time', 'recipes', ['difficulty', 'cooking_time']),
+    ('ix_steps_recipe_step', 'steps', ['recipe_id', 'step_number']),
+    ('ix_recipe_ingredients_ingredient_id', 'recipe_ingredients', ['ingredient_id']),
+    ('ix_recipe_summaries_category_created', 'recipe_summaries', ['category', 'created_at']),
+    ('ix_ingredients_category_name', 'ingredients', ['category', 'name']),
+    ('ix_favorite_recipes_user_created', 'favorite_recipes', ['user_id', 'created_at']),
+    ('ix_favorite_recipes_recipe_id', 'favorite_recipes', ['recipe_id']),
+    ('ix_shopping_lists_user_created', 'shopping_lists', ['user_id', 'created_at']),
+    ('ix_user_preferences_user_type', 'user_preferences', ['user_id', 'preference_type']),
+]
+
+# 被组合索引覆盖的单列索引
+REPLACED_INDEXES = [
+    ('ix_recipes_category', 'recipes', ['category']),
+    ('ix_recipe_summaries_category', 'recipe_summaries', ['category']),
+]
+
+
+def _create_indexes(indexes):
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, columns in indexes:
+                op.create_index(name, table, columns, unique=False,
+                                postgresql_concurrently=True, if_not_exists=True)
+    else:
+        for name, table, columns in indexes:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True)
+
+
+def _drop_indexes(indexes):
+    if op.get_bind().dialect.name == 'postgresql':
+        with op.get_context().autocommit_block():
+            for name, table, _ in indexes:
+                op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+    else:
+        for name, table, _ in indexes:
+            op.drop_index(name, table_name=table, if_exists=True)
+
+
+def upgrade():
+    # 先建新索引再删旧索引，过程中查询始终有可用的索引
+    _create_indexes(NEW_INDEXES)
+    _drop_indexes(REPLACED_INDEXES)
+
+
+def downgrade():
+    _create_indexes(REPLACED_INDEXES)
+    _drop_indexes(NEW_INDEXES)
@@ -0,0 +1,57 @@
+"""
+pytest插件：接口查询预算
+
+用query_budget标记声明测试中每个请求允许执行的最大SQL语句数（以及同一语句形状的最大重复次数），
+测试期间完成的任何请求超出预算时测试失败，并列出超出的请求和重复最多的语句：
+
+    @pytest.mark.query_budget(3)
+    def test_shopping_lists(client):
+        client.get('/api/users/1/shopping-lists')
+
+    @pytest.mark.query_budget(5, max_repeats=2, endpoint='api.search_recipes')
+    def test_search(client):
+        ...
+
+endpoint指定时只检查该endpoint的请求。未标记的测试不受影响；统计来自app.services.query_stats，
+需要通过create_app()创建的应用（默认QUERY_STATS_ENABLED=true）。
+
+启用: pytest -p pytest_query_budget（在backend目录下运行），或在conftest.py中声明
+      pytest_plugins = ['pytest_query_budget']（tests/conftest.py已声明，示例见tests/test_query_budgets.py）
+需要pytest>=8（hookimpl(wrapper=True)），开发依赖见requirements-dev.txt
+"""
+
+import pytest
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        'markers',
+        'query_budget(max_queries, max_repeats=None, endpoint=None): 每个请求允许的最大SQL语句数'
+    )
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker('query_budget')
+    if marker is None:
+        return (yield)
+
+    from app.services.query_stats import abbreviate, query_instrumentation
+
+    max_queries = marker.args[0] if marker.args else marker.kwargs.get('max_queries')
+    max_repeats = marker.kwargs.get('max_repeats')
+    endpoint = marker.kwargs.get('endpoint')
+    with query_instrumentation.record() as records:
+        result = yield  # 测试本身失败时异常在此处继续抛出，保留原始错误
+
+    violations = []
+    for method, path, request_endpoint, stats in records:
+        if endpoint is not None and request_endpoint != endpoint:
+            continue
+        repeated = stats.repeated(max_repeats + 1) if max_repeats is not None else []
+        if (max_queries is not None and stats.count > max_queries) or repeated:
+            line = f'{method} {path}: {stats.count} 条查询（预算 {max_queries}）'
+            for shape, count in (repeated or stats.repeated(2))[:3]:
+                line += f'\n    重复 {count} 次: {abbreviate(shape)}'
+            violations.append(line)
+    if violations:
+        pytest.fail('超出查询预算:\n  ' + '\n  '.join(violations), pytrace=False)
+    return result
@@ -0,0 +1,349 @@
+#!/usr/bin/env python3
+"""
+合成测试数据生成
+按可配置的分布生成菜谱、食材、用户、收藏、库存和购物清单，用Core分批插入，供压测和基准使用：
+  - 菜谱热度服从Zipf分布：少数菜谱获得大部分收藏，热门菜谱与ID无关（按随机排列分配排名）
+  - 食材使用频率服从Zipf分布：盐、油等调味料出现在大多数菜谱中
+  - 每个菜谱的食材数、步骤数为截断的泊松分布；每个用户的收藏数为几何分布（长尾）
+  - 摘要表、收藏计数和热度分在生成时直接算出，与RecipeSummaryService、PopularityService重建的结果一致
+
+相同的seed和参数生成完全相同的数据（时间以reference_date为基准，不依赖当前时间）。
+
+用法: python init_db.py --synthetic --recipes 1000000 --users 100000 --seed 42
+"""
+
+import time
+from datetime import datetime, timedelta
+from typing import Callable, Dict, NamedTuple, Optional
+
+import numpy as np
+
+from app import db
+from app.models.recipe import Recipe, Step, RecipeSummary
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.user import User, UserIngredient, ShoppingList, ShoppingListItem, UserPreference
+from app.models.favorite import FavoriteRecipe
+from app.services.bulk_sql import reset_sequences
+from app.services.catalog_snapshot import CatalogStore
+from app.services.popularity_service import EVENT_WEIGHTS
+
+# 基础食材（分类, 单位, 名称），按常用程度排列：排名越靠前在Zipf分布下出现越频繁
+BASE_INGREDIENTS = [
+    ('调味料', '克', '盐'), ('调味料', '毫升', '食用油'), ('其他', '根', '葱'), ('其他', '块', '姜'),
+    ('其他', '瓣', '蒜'), ('调味料', '毫升', '生抽'), ('调味料', '克', '糖'), ('调味料', '毫升', '料酒'),
+    ('其他', '个', '鸡蛋'), ('调味料', '毫升', '醋'), ('蔬菜', '个', '西红柿'), ('肉类', '克', '猪肉'),
+    ('蔬菜', '个', '土豆'), ('调味料', '毫升', '老抽'), ('蔬菜', '个', '洋葱'), ('蔬菜', '个', '青椒'),
+    ('肉类', '克', '鸡胸肉'), ('调味料', '毫升', '蚝油'), ('蔬菜', '根', '胡萝卜'), ('肉类', '克', '牛肉'),
+    ('其他', '块', '豆腐'), ('调味料', '克', '花椒'), ('蔬菜', '颗', '白菜'), ('调味料', '克', '辣椒粉'),
+    ('主食', '克', '面粉'), ('其他', '朵', '香菇'), ('蔬菜', '根', '黄瓜'), ('肉类', '克', '五花肉'),
+    ('主食', '克', '米饭'), ('调味料', '个', '八角'), ('蔬菜', '把', '菠菜'), ('主食', '克', '面条'),
+    ('肉类', '个', '鸡腿'), ('其他', '把', '木耳'), ('蔬菜', '把', '豆芽'), ('蔬菜', '颗', '生菜'),
+    ('海鲜', '克', '虾仁'), ('海鲜', '条', '鲈鱼'), ('蔬菜', '根', '茄子'), ('蔬菜', '根', '西兰花'),
+]
+
+# 菜谱分类，按菜谱数量从多到少排列
+CATEGORIES = ['家常菜', '川菜', '汤类', '凉菜', '早餐', '粤菜', '面食', '炖菜', '湘菜', '小吃', '素食', '甜点']
+DIFFICULTIES = ['简单', '中等', '困难']
+DIFFICULTY_WEIGHTS = [0.55, 0.33, 0.12]
+COOKING_METHODS = ['清炒', '红烧', '凉拌', '清蒸', '爆炒', '炖', '香煎', '干煸', '水煮', '烤', '糖醋', '酱爆']
+DESCRIPTIONS = ['家常美味，简单易做', '营养丰富，味道浓郁', '清淡爽口，老少皆宜', '下饭神器，香辣过瘾', '快手菜，十分钟上桌']
+STEP_TEMPLATES = ['食材洗净切好备用', '锅中倒油烧热', '放入葱姜蒜爆香', '下入主料大火翻炒', '加入调味料翻炒均匀',
+                  '加适量清水小火焖煮', '大火收汁', '撒上葱花出锅装盘']
+NOTES = ['切片', '切丁', '切块', '切丝', '适量', '少许', None, None]
+PREFERENCES = [('allergy', '花生'), ('allergy', '海鲜'), ('taste', '辣'), ('taste', '清淡'),
+               ('preferred_category', '川菜'), ('preferred_category', '家常菜'), ('diet', '素食')]
+
+class SyntheticConfig(NamedTuple):
+    """合成数据参数"""
+    recipes: int = 10000
+    users: int = 1000
+    ingredients: int = 2000
+    seed: int = 42
+    recipe_zipf: float = 1.1  # 菜谱热度的Zipf指数
+    ingredient_zipf: float = 1.0  # 食材使用频率的Zipf指数
+    ingredients_per_recipe: float = 8  # 每个菜谱食材数的均值
+    steps_per_recipe: float = 6  # 每个菜谱步骤数的均值
+    favorites_per_user: float = 20  # 每个用户收藏数的均值
+    pantry_per_user: float = 12  # 每个用户库存食材数的均值
+    lists_per_user: int = 2  # 每个用户最多的购物清单数
+    items_per_list: float = 8  # 每个清单条目数的均值
+    batch_size: int = 20000  # 每批插入的菜谱（或用户）数量
+    reference_date: datetime = datetime(2025, 1, 1)  # 生成数据的“当前时间”
+
+class ZipfSampler:
+    """有限集合上的Zipf分布：排名k（从0开始）的概率与 1/(k+1)^s 成正比"""
+
+    def __init__(self, n: int, s: float, rng: np.random.Generator):
+        weights = 1.0 / np.arange(1, n + 1, dtype=np.float64) ** s
+        self.cdf = np.cumsum(weights / weights.sum())
+        self.rng = rng
+
+    def sample(self, size) -> np.ndarray:
+        ranks = np.searchsorted(self.cdf, self.rng.random(size), side='right')
+        return np.minimum(ranks, len(self.cdf) - 1)
+
+def _truncated_poisson(rng, mean, low, high, size) -> np.ndarray:
+    return np.clip(rng.poisson(mean - low, size) + low, low, high)
+
+def _distinct_rows(candidates: np.ndarray, counts: np.ndarray) -> list:
+    """每行按出现顺序取前counts[i]个不重复的值"""
+    rows = []
+    for row, count in zip(candidates.tolist(), counts.tolist()):
+        rows.append(list(dict.fromkeys(row))[:count])
+    return rows
+
+class SyntheticDataGenerator:
+    """按SyntheticConfig生成并批量写入合成数据（需在应用上下文中、空库上运行）"""
+
+    def __init__(self, config: SyntheticConfig, progress: Optional[Callable[[str], None]] = print):
+        self.config = config
+        self.progress = progress or (lambda message: None)
+        self.rng = np.random.default_rng(config.seed)
+        self.counts: Dict[str, int] = {}
+
+    def _insert(self, connection, model, rows) -> None:
+        if rows:
+            connection.execute(model.__table__.insert(), rows)
+            table = model.__tablename__
+            self.counts[table] = self.counts.get(table, 0) + len(rows)
+
+    def run(self) -> Dict[str, int]:
+        """
+        生成全部数据
+
+        Returns:
+            Dict[str, int]: 表名 -> 插入行数
+        """
+        start = time.perf_counter()
+        with db.engine.connect() as connection:
+            sqlite = connection.dialect.name == 'sqlite'
+            if sqlite:
+                # 批量导入期间不逐次fsync，结束后恢复
+                synchronous = connection.exec_driver_sql('PRAGMA synchronous').scalar()
+                connection.exec_driver_sql('PRAGMA synchronous = OFF')
+                connection.commit()
+            try:
+                with connection.begin():
+                    categories = self._ingredients(connection)
+                    self._users(connection)
+                favorite_counts = self._favorites(connection)
+                self._recipes(connection, categories, favorite_counts)
+                self._pantries(connection)
+                self._shopping_lists(connection)
+                with connection.begin():
+                    # 用户、菜谱、食材和购物清单使用了显式主键
+                    for model in (Ingredient, User, Recipe, ShoppingList):
+                        reset_sequences(connection, model.__table__)
+            finally:
+                if sqlite:
+                    connection.exec_driver_sql(f'PRAGMA synchronous = {synchronous}')
+
+        CatalogStore.bump()
+        db.session.commit()
+        elapsed = time.perf_counter() - start
+        total = sum(self.counts.values())
+        self.progress(f'生成 {total} 行, {elapsed:.1f}s, {total / elapsed:.0f} 行/秒')
+        return self.counts
+
+    def _ingredients(self, connection) -> list:
+        """插入食材，返回按ID（从1开始）索引的分类"""
+        rows, categories = [], [None]
+        for i in range(self.config.ingredients):
+            category, unit, name = BASE_INGREDIENTS[i % len(BASE_INGREDIENTS)]
+            generation = i // len(BASE_INGREDIENTS)
+            rows.append({
+                'id': i + 1, 'name': f'{name}{generation}' if generation else name,
+                'unit': unit, 'category': category
+            })
+            categories.append(category)
+        self._insert(connection, Ingredient, rows)
+        return categories
+
+    def _users(self, connection) -> None:
+        config = self.config
+        offsets = self.rng.integers(0, 730 * 86400, config.users)
+        rows = [
+            {'id': i + 1, 'username': f'user{i + 1}', 'email': f'user{i + 1}@example.com',
+             'created_at': config.reference_date - timedelta(seconds=int(offset)), 'change_seq': 0}
+            for i, offset in enumerate(offsets.tolist())
+        ]
+        for begin in range(0, len(rows), config.batch_size):
+            self._insert(connection, User, rows[begin:begin + config.batch_size])
+
+        preferences = []
+        for user_id in range(1, config.users + 1):
+            for index in self.rng.choice(len(PREFERENCES), int(self.rng.integers(0, 3)), replace=False).tolist():
+                preference_type, value = PREFERENCES[index]
+                preferences.append({'user_id': user_id, 'preference_type': preference_type, 'value': value})
+        self._insert(connection, UserPreference, preferences)
+
+    def _favorites(self, connection) -> np.ndarray:
+        """按Zipf热度生成收藏，返回按菜谱ID索引的收藏数"""
+        config = self.config
+        per_user = np.minimum(self.rng.geometric(1 / config.favorites_per_user, config.users), config.recipes)
+        user_ids = np.repeat(np.arange(1, config.users + 1), per_user)
+        ranking = self.rng.permutation(config.recipes) + 1  # 热度排名 -> 菜谱ID
+        recipe_ids = ranking[ZipfSampler(config.recipes, config.recipe_zipf, self.rng).sample(len(user_ids))]
+
+        # 同一用户重复收藏同一菜谱只保留一次
+        pairs = np.unique(user_ids.astype(np.int64) * (config.recipes + 1) + recipe_ids)
+        user_ids, recipe_ids = pairs // (config.recipes + 1), pairs % (config.recipes + 1)
+        offsets = self.rng.integers(0, 365 * 86400, len(pairs))
+
+        for begin in range(0, len(pairs), config.batch_size * 5):
+            end = begin + config.batch_size * 5
+            with connection.begin():
+                self._insert(connection, FavoriteRecipe, [
+                    {'user_id': user_id, 'recipe_id': recipe_id,
+                     'created_at': config.reference_date - timedelta(seconds=offset)}
+                    for user_id, recipe_id, offset in zip(
+                        user_ids[begin:end].tolist(), recipe_ids[begin:end].tolist(), offsets[begin:end].tolist()
+                    )
+                ])
+        self.progress(f'收藏: {len(pairs)} 条')
+        return np.bincount(recipe_ids, minlength=config.recipes + 1)
+
+    def _recipes(self, connection, ingredient_categories, favorite_counts) -> None:
+        """分批插入菜谱、步骤、食材关联和摘要"""
+        config = self.config
+        rng = self.rng
+        ingredient_sampler = ZipfSampler(config.ingredients, config.ingredient_zipf, rng)
+        ingredient_names = {}
+        for i in range(config.ingredients):
+            _, _, name = BASE_INGREDIENTS[i % len(BASE_INGREDIENTS)]
+            ingredient_names[i + 1] = name
+        span = 3 * 365 * 86400  # 菜谱创建时间分布在最近三年，ID越大越新
+        favorite_weight = EVENT_WEIGHTS['favorite']
+        started = time.perf_counter()
+
+        for begin in range(1, config.recipes + 1, config.batch_size):
+            ids = np.arange(begin, min(begin + config.batch_size, config.recipes + 1))
+            size = len(ids)
+            ingredient_counts = _truncated_poisson(rng, config.ingredients_per_recipe, 2, 20, size)
+            step_counts = _truncated_poisson(rng, config.steps_per_recipe, 2, 15, size)
+            # 多抽一些候选，去重后取前N个（Zipf头部的食材重复较多）
+            candidates = ingredient_sampler.sample((size, 40)) + 1
+            chosen = _distinct_rows(candidates, ingredient_counts)
+            categories = rng.choice(len(CATEGORIES), size, p=_category_weights())
+            difficulties = rng.choice(len(DIFFICULTIES), size, p=DIFFICULTY_WEIGHTS)
+            cooking_times = np.clip(np.round(rng.lognormal(np.log(30), 0.6, size) / 5) * 5, 5, 240)
+            servings = rng.integers(1, 7, size)
+            methods = rng.integers(0, len(COOKING_METHODS), size)
+            descriptions = rng.integers(0, len(DESCRIPTIONS), size)
+            created = config.reference_date - timedelta(seconds=span)
+            jitter = rng.integers(0, 3600, size)
+            amounts = rng.integers(1, 51, (size, 20)) * 10
+            notes = rng.integers(0, len(NOTES), (size, 20))
+
+            recipes, steps, recipe_ingredients, summaries = [], [], [], []
+            for i, recipe_id in enumerate(ids.tolist()):
+                created_at = created + timedelta(seconds=recipe_id * span // config.recipes + int(jitter[i]))
+                category = CATEGORIES[categories[i]]
+                ingredient_ids = chosen[i]
+                favorite_count = int(favorite_counts[recipe_id])
+                recipe = {
+                    'id': recipe_id,
+                    'name': f'{COOKING_METHODS[methods[i]]}{ingredient_names[ingredient_ids[-1]]}',
+                    'description': DESCRIPTIONS[descriptions[i]],
+                    'difficulty': DIFFICULTIES[difficulties[i]],
+                    'cooking_time': int(cooking_times[i]),
+                    'servings': int(servings[i]),
+                    'image_url': f'https://example.com/recipes/{recipe_id}.jpg',
+                    'category': category,
+                    'created_at': created_at,
+                    'updated_at': created_at,
+                    'favorite_count': favorite_count,
+                    'view_count': 0,
+                    'plan_count': 0,
+                    'recent_activity': 0,
+                    'popularity_score': favorite_count * favorite_weight,
+                    'popularity_updated_at': config.reference_date
+                }
+                recipes.append(recipe)
+
+                for n in range(int(step_counts[i])):
+                    steps.append({
+                        'recipe_id': recipe_id, 'step_number': n + 1,
+                        'description': f'第{n + 1}步，{STEP_TEMPLATES[n % len(STEP_TEMPLATES)]}'
+                    })
+
+                tags = [category]
+                # 按主键顺序插入，标签顺序与RecipeSummaryService按关联表读取的顺序一致
+                for n, ingredient_id in enumerate(sorted(ingredient_ids)):
+                    recipe_ingredients.append({
+                        'recipe_id': recipe_id, 'ingredient_id': ingredient_id,
+                        'amount': int(amounts[i, n]), 'note': NOTES[notes[i, n]]
+                    })
+                    ingredient_category = ingredient_categories[ingredient_id]
+                    if ingredient_category not in tags:
+                        tags.append(ingredient_category)
+
+                summaries.append({
+                    'recipe_id': recipe_id, 'name': recipe['name'], 'difficulty': recipe['difficulty'],
+                    'cooking_time': recipe['cooking_time'], 'image_url': recipe['image_url'],
+                    'category': category, 'created_at': created_at,
+                    'ingredient_count': len(ingredient_ids), 'step_count': int(step_counts[i]),
+                    'favorite_count': favorite_count, 'tags': ','.join(tags)[:255]
+                })
+
+            with connection.begin():
+                self._insert(connection, Recipe, recipes)
+                self._insert(connection, Step, steps)
+                self._insert(connection, RecipeIngredient, recipe_ingredients)
+                self._insert(connection, RecipeSummary, summaries)
+
+            done = int(ids[-1])
+            elapsed = time.perf_counter() - started
+            self.progress(f'菜谱: {done}/{config.recipes}, {done / elapsed:.0f} 个/秒')
+
+    def _pantries(self, connection) -> None:
+        config = self.config
+        sampler = ZipfSampler(config.ingredients, config.ingredient_zipf, self.rng)
+        for begin in range(1, config.users + 1, config.batch_size):
+            user_ids = range(begin, min(begin + config.batch_size, config.users + 1))
+            size = len(user_ids)
+            counts = np.minimum(self.rng.poisson(config.pantry_per_user, size), 40)
+            chosen = _distinct_rows(sampler.sample((size, 60)) + 1, counts)
+            amounts = self.rng.integers(1, 11, (size, 40))
+            expiry = self.rng.integers(-5, 30, (size, 40))
+            rows = []
+            for i, user_id in enumerate(user_ids):
+                for n, ingredient_id in enumerate(chosen[i]):
+                    days = int(expiry[i, n])
+                    rows.append({
+                        'user_id': user_id, 'ingredient_id': ingredient_id, 'amount': int(amounts[i, n]),
+                        # 约七分之一的库存不记录过期日期
+                        'expiry_date': None if days % 7 == 0 else (config.reference_date + timedelta(days=days)).date()
+                    })
+            with connection.begin():
+                self._insert(connection, UserIngredient, rows)
+
+    def _shopping_lists(self, connection) -> None:
+        config = self.config
+        sampler = ZipfSampler(config.ingredients, config.ingredient_zipf, self.rng)
+        list_counts = self.rng.integers(0, config.lists_per_user + 1, config.users)
+        list_id = 0
+        for begin in range(0, config.users, config.batch_size):
+            lists, items = [], []
+            for user_index in range(begin, min(begin + config.batch_size, config.users)):
+                for n in range(int(list_counts[user_index])):
+                    list_id += 1
+                    created_at = config.reference_date - timedelta(days=int(self.rng.integers(0, 90)))
+                    lists.append({'id': list_id, 'user_id': user_index + 1, 'name': f'购物清单{n + 1}',
+                                  'created_at': created_at})
+                    count = int(min(self.rng.poisson(config.items_per_list), 30))
+                    for ingredient_id in dict.fromkeys((sampler.sample(count) + 1).tolist()):
+                        items.append({'shopping_list_id': list_id, 'ingredient_id': ingredient_id,
+                                      'amount': int(self.rng.integers(1, 6)),
+                                      'is_purchased': bool(self.rng.random() < 0.3), 'updated_at': created_at})
+            with connection.begin():
+                self._insert(connection, ShoppingList, lists)
+                self._insert(connection, ShoppingListItem, items)
+
+def _category_weights() -> np.ndarray:
+    weights = 1.0 / np.arange(1, len(CATEGORIES) + 1) ** 0.8
+    return weights / weights.sum()
+
+def generate(config: SyntheticConfig, progress: Optional[Callable[[str], None]] = print) -> Dict[str, int]:
+    """在空库上生成合成数据，返回各表插入的行数"""
+    return SyntheticDataGenerator(config, progress).run()
@@ -0,0 +1,39 @@
+"""
+测试公共配置：内存数据库上的应用和测试客户端
+
+运行: cd backend && python -m pytest -q
+"""
+
+import os
+import sys
+
+# 添加项目根目录到 Python 路径
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+from config import Config
+from app import create_app, db
+
+pytest_plugins = ['pytest_query_budget']
+
+class TestConfig(Config):
+    TESTING = True
+    SQLALCHEMY_DATABASE_URI = 'sqlite://'
+    EVENT_PIPELINE_ENABLED = False
+    CATALOG_SNAPSHOT_ENABLED = False  # 测试数据库读取路径，不使用进程内快照
+    METRICS_ENABLED = False
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_app(TestConfig)
+    with app.app_context():
+        db.create_all()
+    yield app
+    with app.app_context():
+        db.session.remove()
+        db.drop_all()
+
+@pytest.fixture(scope='module')
+def client(app):
+    # 请求各自推入应用上下文，使用独立的会话，身份映射不会掩盖查询
+    return app.test_client()
@@ -0,0 +1,39 @@
+"""目录版本由会话flush事件递增，脚本直接修改ORM对象后提交也会使快照失效"""
+
+import pytest
+from app import db
+from app.models.recipe import Recipe
+from app.services.catalog_snapshot import CatalogStore
+
+@pytest.fixture(scope='module')
+def recipe_id(app):
+    with app.app_context():
+        recipe = Recipe(name='番茄炒蛋')
+        db.session.add(recipe)
+        db.session.commit()
+        return recipe.id
+
+def test_orm_write_bumps_version(app, recipe_id):
+    with app.app_context():
+        version, _ = CatalogStore.read_version()
+        recipe = db.session.get(Recipe, recipe_id)
+        recipe.image_url = '/static/images/recipes/1.jpg'
+        db.session.commit()
+        assert CatalogStore.read_version()[0] == version + 1
+
+def test_counter_write_keeps_version(app, recipe_id):
+    with app.app_context():
+        version, _ = CatalogStore.read_version()
+        recipe = db.session.get(Recipe, recipe_id)
+        recipe.view_count += 1
+        db.session.commit()
+        assert CatalogStore.read_version()[0] == version
+
+def test_bumped_once_per_transaction(app):
+    with app.app_context():
+        version, _ = CatalogStore.read_version()
+        db.session.add(Recipe(name='红烧肉'))
+        db.session.flush()
+        db.session.add(Recipe(name='清蒸鱼'))
+        db.session.commit()
+        assert CatalogStore.read_version()[0] == version + 1
@@ -0,0 +1,29 @@
+"""收藏缓存：加载期间发生的写入不会被旧的加载结果覆盖"""
+
+from datetime import datetime
+from types import SimpleNamespace
+from app.services.favorite_cache import FavoriteCache, _UserFavorites
+
+def test_write_during_load_discards_stale_result():
+    cache = FavoriteCache()
+    favorite = SimpleNamespace(recipe_id=2, id=20, created_at=datetime(2026, 1, 2))
+
+    def load(user_id):
+        # 模拟另一个请求在查询返回前提交了收藏
+        stale = _UserFavorites([(1, 10, datetime(2026, 1, 1))])
+        cache.add(user_id, favorite)
+        return stale
+
+    cache._load = load
+    assert cache.get_favorite_ids(7, [1, 2]) == {1}
+
+    cache._load = lambda user_id: _UserFavorites([(2, 20, favorite.created_at), (1, 10, datetime(2026, 1, 1))])
+    assert cache.get_favorite_ids(7, [1, 2]) == {1, 2}
+    assert cache._loading == {}
+
+def test_load_without_writes_is_cached():
+    cache = FavoriteCache()
+    cache._load = lambda user_id: _UserFavorites([(1, 10, datetime(2026, 1, 1))])
+    cache.get_favorite_ids(7, [1])
+    cache.get_favorite_ids(7, [1])
+    assert (cache.hits, cache.misses) == (1, 1)
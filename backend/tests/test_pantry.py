@@ -0,0 +1,55 @@
+"""用户食材库存：批量同步的参数校验和临期建议的排序"""
+
+from datetime import date, timedelta
+import pytest
+from app import db
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.recipe import Recipe
+from app.models.user import User, UserIngredient
+from app.services.pantry_service import pantry_suggester
+from app.services.recommendation_service import _Catalog
+
+@pytest.fixture(scope='module')
+def user_id(app):
+    with app.app_context():
+        user = User(username='pantry', email='pantry@example.com')
+        db.session.add(user)
+        db.session.commit()
+        return user.id
+
+@pytest.mark.parametrize('item', [
+    {'ingredient_id': '1'},
+    {'ingredient_id': True},
+    {'ingredient_id': 1.5},
+    {'ingredient_name': 42},
+    {'ingredient_name': ['番茄']},
+])
+def test_sync_rejects_invalid_ingredient_reference(client, user_id, item):
+    response = client.put(f'/api/users/{user_id}/ingredients', json={'items': [item]})
+    assert response.status_code == 400
+    assert 'error' in response.get_json()
+
+def test_suggestions_tie_broken_by_missing_count(app, user_id):
+    """得分相同（1/(1+0) = 1/(1+1) * 2）时缺少2种食材的菜谱排在缺少3种的前面，尽管后者库存占比更高"""
+    with app.app_context():
+        today = date.today()
+        ingredients = {name: Ingredient(name=name) for name in ('鸡蛋', '豆腐', '青菜', '盐', '糖', '醋')}
+        fewer_missing = Recipe(name='鸡蛋羹')
+        more_missing = Recipe(name='豆腐青菜汤')
+        db.session.add_all(list(ingredients.values()) + [fewer_missing, more_missing])
+        db.session.flush()
+        for recipe, names in ((fewer_missing, ('鸡蛋', '盐', '糖')), (more_missing, ('豆腐', '青菜', '盐', '糖', '醋'))):
+            db.session.add_all(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ingredients[name].id, amount=1)
+                               for name in names)
+        db.session.add_all([
+            UserIngredient(user_id=user_id, ingredient_id=ingredients['鸡蛋'].id, expiry_date=today),
+            UserIngredient(user_id=user_id, ingredient_id=ingredients['豆腐'].id, expiry_date=today + timedelta(days=1)),
+            UserIngredient(user_id=user_id, ingredient_id=ingredients['青菜'].id, expiry_date=today + timedelta(days=1)),
+        ])
+        db.session.commit()
+
+        items = pantry_suggester._compute(user_id, _Catalog(0), today)
+        assert [(recipe_id, missing_count) for recipe_id, _, _, missing_count in items] == [
+            (fewer_missing.id, 2), (more_missing.id, 3)
+        ]
+        assert items[0][1] == items[1][1]
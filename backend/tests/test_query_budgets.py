@@ -0,0 +1,28 @@
+"""接口查询预算：用户拥有大量购物清单、项目和收藏时，各接口的SQL语句数不随数据量增长"""
+
+import pytest
+from benchmarks.query_counts import BUDGETS, seed
+
+LISTS = 50
+ITEMS = 30
+
+@pytest.fixture(scope='module')
+def seeded(app):
+    """与benchmarks/query_counts.py相同的数据：LISTS个购物清单（每个ITEMS个项目）和收藏的菜谱"""
+    with app.app_context():
+        user_id, list_id = seed(LISTS, ITEMS)
+        return {'user_id': user_id, 'list_id': list_id}
+
+# 预算与查询次数检查脚本共用；测试额外要求同一形状的语句只执行一次（没有N+1）
+@pytest.mark.parametrize('method,url', [
+    pytest.param(method, url, marks=pytest.mark.query_budget(budget, max_repeats=1), id=url)
+    for method, url, budget in BUDGETS
+])
+def test_query_budget(client, seeded, method, url):
+    response = getattr(client, method)(url.format(**seeded))
+    assert response.status_code == 200
+
+@pytest.mark.xfail(strict=True, reason='超出预算时插件应使测试失败')
+@pytest.mark.query_budget(1)
+def test_budget_exceeded_fails(client, seeded):
+    client.get('/api/users/{user_id}/favorites'.format(**seeded))
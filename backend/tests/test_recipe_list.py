@@ -0,0 +1,24 @@
+"""菜谱列表的数据库回退路径：创建时间相同时按ID倒序，与目录快照的顺序一致"""
+
+from datetime import datetime
+import pytest
+from app import db
+from app.models.recipe import Recipe
+
+@pytest.fixture(scope='module')
+def recipe_ids(app):
+    with app.app_context():
+        created_at = datetime(2026, 1, 1)
+        recipes = [Recipe(name=f'菜谱{i}', difficulty='简单', created_at=created_at) for i in range(5)]
+        db.session.add_all(recipes)
+        db.session.commit()
+        return [recipe.id for recipe in recipes]
+
+@pytest.mark.parametrize('view', ['', 'summary'])
+def test_same_created_at_ordered_by_id_desc(client, recipe_ids, view):
+    # 按难度筛选时SQLite不走created_at索引，而是额外排序，相同时间的顺序不再由索引决定
+    listed = []
+    for page in (1, 2, 3):
+        response = client.get(f'/api/recipes?view={view}&difficulty=简单&page={page}&per_page=2')
+        listed.extend(item['id'] for item in response.get_json()['items'])
+    assert listed == sorted(recipe_ids, reverse=True)
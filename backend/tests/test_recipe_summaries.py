@@ -0,0 +1,43 @@
+"""菜谱摘要由会话事件在提交前刷新，脚本直接修改ORM对象后提交也会同步到摘要"""
+
+import pytest
+from app import db
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.recipe import Recipe, RecipeSummary
+
+@pytest.fixture(scope='module')
+def recipe_id(app):
+    with app.app_context():
+        ingredient = Ingredient(name='番茄', category='蔬菜')
+        recipe = Recipe(name='番茄炒蛋', category='家常菜')
+        db.session.add_all([ingredient, recipe])
+        db.session.flush()
+        db.session.add(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ingredient.id, amount=2))
+        db.session.commit()
+        return recipe.id
+
+def _summary(recipe_id):
+    db.session.expire_all()
+    return db.session.get(RecipeSummary, recipe_id)
+
+def test_created_recipe_has_summary(app, recipe_id):
+    with app.app_context():
+        summary = _summary(recipe_id)
+        assert summary.ingredient_count == 1
+        assert summary.tags == '家常菜,蔬菜'
+
+def test_orm_image_update_refreshes_summary(app, recipe_id):
+    with app.app_context():
+        db.session.get(Recipe, recipe_id).image_url = '/static/images/recipes/1.jpg'
+        db.session.commit()
+        assert _summary(recipe_id).image_url == '/static/images/recipes/1.jpg'
+
+def test_ingredient_category_update_refreshes_tags(app, client, recipe_id):
+    with app.app_context():
+        ingredient_id = db.session.query(RecipeIngredient.ingredient_id).filter_by(recipe_id=recipe_id).scalar()
+
+    response = client.put(f'/api/ingredients/{ingredient_id}', json={'category': '水果'})
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert _summary(recipe_id).tags == '家常菜,水果'
@@ -0,0 +1,40 @@
+"""相似菜谱增量计算：只修改步骤或食材的菜谱也会被重新计算"""
+
+import pytest
+from app import db
+from app.models.ingredient import Ingredient, RecipeIngredient
+from app.models.recipe import Recipe, RecipeNeighbor
+from app.services.similarity_service import SimilarRecipeService
+
+@pytest.fixture(scope='module')
+def recipes(app):
+    """三组食材互不重叠的菜谱，每组两个（任一食材都不超过半数菜谱，不会被max_df排除）"""
+    with app.app_context():
+        ingredients = [Ingredient(name=name) for name in ('鸡蛋', '番茄', '牛肉', '土豆', '鱼', '姜')]
+        recipes = [Recipe(name=f'菜谱{i}') for i in range(6)]
+        db.session.add_all(ingredients + recipes)
+        db.session.flush()
+        for index, recipe in enumerate(recipes):
+            group = index // 2
+            for ingredient in ingredients[group * 2:group * 2 + 2]:
+                db.session.add(RecipeIngredient(recipe_id=recipe.id, ingredient_id=ingredient.id, amount=1))
+        db.session.commit()
+        return [recipe.id for recipe in recipes], [ingredient.id for ingredient in ingredients]
+
+def _top_neighbor(recipe_id):
+    return db.session.query(RecipeNeighbor.neighbor_id).filter_by(recipe_id=recipe_id, rank=1).scalar()
+
+def test_ingredient_only_update_is_rebuilt_incrementally(app, client, recipes):
+    recipe_ids, ingredient_ids = recipes
+    with app.app_context():
+        SimilarRecipeService.build()
+        assert _top_neighbor(recipe_ids[0]) == recipe_ids[1]
+
+    response = client.put(f'/api/recipes/{recipe_ids[0]}', json={'ingredients': [
+        {'ingredient_id': ingredient_id, 'amount': 1} for ingredient_id in ingredient_ids[2:4]
+    ]})
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert SimilarRecipeService.build_incremental() >= 1
+        assert _top_neighbor(recipe_ids[0]) in recipe_ids[2:4]